@@ -1,4 +1,4 @@
 """API 模块"""
-from .routes import app
+from .routes import router
 
-__all__ = ["app"]
\ No newline at end of file
+__all__ = ["router"]
@@ -4,22 +4,38 @@ API 路由 - 集成数据库版本
 这个文件定义了所有的 API 端点，现在所有操作都会保存到数据库
 """
 
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import text
+from pydantic import ValidationError
+from sqlalchemy import select, text, tuple_
 from typing import List, Optional
 from datetime import datetime
+import asyncio
+import base64
 import json
 
 # 更新导入路径（使用新的模块化结构）
-from app.schemas.stock import StockRequest, StockResponse, HistoryResponse
-from app.services.fetch_data import fetch_data
-from app.services.strategy import turtle_strategy
-from app.database.connection import get_db
-from app.database.models import Stock, AlertHistory
+from app.schemas.stock import (
+    StockRequest, StockResponse, HistoryResponse, BatchAnalyzeRequest, JobRequest, JobResponse
+)
+from app.services.analysis import analyze, analyze_batch
+from app.services.broadcast import broadcaster, sse_events
+from app.services.jobs import FINISHED, JobQueueFull, job_queue
+from app.services import metrics
+from app.services.memory_cache import data_cache, signal_cache
+from app.services.metrics import stage
+from app.services.response_cache import response_cache
+from app.database.connection import get_db, get_async_db, get_async_sessionmaker
+from app.database.writes import save_analyses
+from app.database.models import Stock, AlertHistory, Job
 
 router = APIRouter()
 
+# /history 每页最多返回的记录数
+HISTORY_MAX_LIMIT = 500
+
 @router.get("/")
 def root():
     """根路径 - API 信息"""
@@ -29,24 +45,31 @@ def root():
         "features": ["数据库存储", "历史查询", "股票管理"],
         "endpoints": {
             "分析股票": "POST /analyze",
+            "批量分析": "POST /analyze/batch",
+            "信号推送": "GET /stream/signals (SSE) / WS /ws/signals",
+            "后台任务": "POST /jobs",
             "查询历史": "GET /history",
             "股票列表": "GET /stocks",
+            "运行指标": "GET /metrics",
             "API文档": "/docs"
         }
     }
 
 
 @router.post("/analyze", response_model=StockResponse)
-def analyze_stock(
+async def analyze_stock(
         request: StockRequest,
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_async_db)
 ):
     """
     分析股票并保存结果到数据库
 
+    整个流程不阻塞事件循环：下载在下载线程池中进行（相同请求合并），
+    策略计算在计算线程池中进行，数据库读写使用异步会话。
+
     参数:
         request: 股票分析请求（symbol, period等）
-        db: 数据库会话（自动注入）
+        db: 异步数据库会话（自动注入）
 
     返回:
         分析结果，包括信号、价格等信息
@@ -55,157 +78,456 @@ def analyze_stock(
         # 自动转大写，用户友好
         symbol = request.symbol.upper()
 
-        # 1. 获取股票数据（使用你原来的函数）
-        data = fetch_data(
-            symbol,
-            request.period  # 只传两个参数
-        )
+        # 1-3. 获取数据并计算信号（同一参数在缓存有效期内不再重新下载和计算）
+        try:
+            result = await analyze(
+                symbol,
+                request.period,
+                request.interval,
+                request.entry_period,
+                request.exit_period
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
 
-        if data is None or data.empty:  # 先检查是否是 None
+        if result is None:
             raise HTTPException(
                 status_code=404,
                 detail=f"无法获取 {symbol} 的数据，请检查股票代码是否正确"
             )
 
-        # 2. 运行海龟策略（只返回信号字符串）
-        signal = turtle_strategy(
-            data,
-            request.entry_period,
-            request.exit_period
-        )
-
-        # 3. 手动计算需要的价格信息
-        current_price = float(data['Close'].iloc[-1])
-        high_20d = float(data['High'].iloc[-request.entry_period:].max())
-        low_10d = float(data['Low'].iloc[-request.exit_period:].min())
-
-        # 4. 更新或创建股票记录
-        stock = db.query(Stock).filter(Stock.symbol == symbol).first()
+        current_price = result["current_price"]
 
-        if stock:
-            # 更新现有股票
-            stock.current_price = current_price
-            stock.last_updated = datetime.now()
-        else:
-            # 创建新股票
-            stock = Stock(
-                symbol=symbol,
-                name=symbol,  # 可以后续从 API 获取完整名称
-                current_price=current_price,
-                is_active=True
+        # 4-6. 更新或创建股票记录、保存提醒历史并提交
+        #      （upsert + INSERT RETURNING 两条 SQL，不需要先 SELECT 也不需要 refresh）
+        with stage("db_write"):
+            alert_id, = await save_analyses(
+                db, {symbol: current_price}, [_alert_values(symbol, request, result)]
             )
-            db.add(stock)
-
-        # 5. 保存提醒历史
-        alert = AlertHistory(
-            symbol=symbol,
-            signal=signal,  # 直接使用字符串
-            price=current_price,
-            strategy_params=json.dumps({
-                'entry_period': request.entry_period,
-                'exit_period': request.exit_period,
-                'entry_price': high_20d,
-                'exit_price': low_10d
-            }),
-            message=f"{symbol} 当前信号: {signal}",
-            sent=False  # 还没发送邮件
-        )
-        db.add(alert)
-
-        # 6. 提交到数据库
-        db.commit()
-        db.refresh(stock)
-        db.refresh(alert)
+            await db.commit()
+        response_cache.bump(symbol)
 
         # 7. 返回结果
-        return StockResponse(
-            symbol=symbol,
-            current_price=current_price,
-            signal=signal,
-            entry_price=high_20d,
-            exit_price=low_10d,
-            high_20d=high_20d,
-            low_10d=low_10d,
-            timestamp=datetime.now(),
-            alert_id=alert.id  # 返回提醒记录的 ID
-        )
+        with stage("serialize"):
+            body = _stock_response(symbol, result, alert_id).model_dump_json()
+        return Response(content=body, media_type="application/json")
 
     except HTTPException:
         raise
     except Exception as e:
-        db.rollback()  # 出错回滚
+        await db.rollback()  # 出错回滚
         raise HTTPException(status_code=500, detail=f"分析失败: {str(e)}")
 
 
+@router.post("/analyze/batch")
+async def analyze_stocks_batch(
+        batch: BatchAnalyzeRequest,
+        session_factory=Depends(get_async_sessionmaker)
+):
+    """
+    批量分析整个自选股列表
+
+    同一 (period, interval) 的股票只下载一次、一次向量化计算信号，
+    每组用一条多行 upsert 和一次批量 INSERT 写入并单独提交，
+    提交成功后才返回这一组的结果（客户端拿到的 alert_id 都已经写入数据库）。
+    结果以 NDJSON 流式返回（每行一个 JSON），每组股票算完就立即返回：
+    - 成功: StockResponse 的字段
+    - 失败: {"symbol": ..., "status": 404/400/500, "error": ...}（500 表示保存失败，这一组已回滚）
+    - 最后一行: {"done": true, "saved": 保存的记录数}（有保存失败的组时 done 为 false）
+
+    参数:
+        batch: {"requests": [StockRequest, ...]}
+        session_factory: 异步会话工厂（自动注入）
+    """
+    async def stream():
+        async with session_factory() as db:
+            saved = 0
+            failed = False
+            try:
+                async for group in analyze_batch(batch.requests):
+                    prices = {}
+                    alerts = []
+                    rows = []
+                    for request, result, error in group:
+                        symbol = request.symbol.upper()
+                        if error is not None:
+                            rows.append({"symbol": symbol, "status": error[0], "error": error[1]})
+                            continue
+
+                        prices[symbol] = result["current_price"]
+                        alerts.append(_alert_values(symbol, request, result))
+                        rows.append((symbol, result))
+
+                    # 每组一条多行 upsert + 一次批量 INSERT RETURNING，提交成功后再返回
+                    try:
+                        with stage("db_write"):
+                            alert_ids = iter(await save_analyses(db, prices, alerts))
+                            await db.commit()
+                    except Exception as e:
+                        await db.rollback()
+                        print(f"❌ 保存分析结果失败: {str(e)}")
+                        failed = True
+                        rows = [
+                            row if isinstance(row, dict)
+                            else {"symbol": row[0], "status": 500, "error": f"保存失败: {str(e)}"}
+                            for row in rows
+                        ]
+                    else:
+                        saved += len(alerts)
+                        response_cache.bump(*prices)
+
+                    for row in rows:
+                        if isinstance(row, dict):
+                            yield json.dumps(row, ensure_ascii=False) + "\n"
+                        else:
+                            yield _stock_response(*row, next(alert_ids)).model_dump_json() + "\n"
+
+                yield json.dumps({"done": not failed, "saved": saved}) + "\n"
+
+            except Exception as e:
+                await db.rollback()
+                yield json.dumps({"done": False, "saved": saved, "error": f"分析失败: {str(e)}"},
+                                 ensure_ascii=False) + "\n"
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+
+def _alert_values(symbol, request, result):
+    """根据分析结果生成提醒历史记录的字段"""
+    return dict(
+        symbol=symbol,
+        signal=result["signal"],  # 直接使用字符串
+        price=result["current_price"],
+        strategy_params=json.dumps({
+            'entry_period': request.entry_period,
+            'exit_period': request.exit_period,
+            'entry_price': result["high_20d"],
+            'exit_price': result["low_10d"]
+        }),
+        message=f"{symbol} 当前信号: {result['signal']}",
+        sent=False  # 还没发送邮件
+    )
+
+
+def _stock_response(symbol, result, alert_id):
+    """分析结果转换为响应格式"""
+    return StockResponse(
+        symbol=symbol,
+        current_price=result["current_price"],
+        signal=result["signal"],
+        entry_price=result["high_20d"],
+        exit_price=result["low_10d"],
+        high_20d=result["high_20d"],
+        low_10d=result["low_10d"],
+        timestamp=datetime.now(),
+        alert_id=alert_id  # 返回提醒记录的 ID
+    )
+
+
+@router.get("/stream/signals")
+async def stream_signals(symbols: Optional[str] = None):
+    """
+    Server-Sent Events 信号推送
+
+    连接后先收到每只股票最近一次的结果，之后每当后台算出的信号或通道价格
+    发生变化就推送一条 `event: signal`，不需要再轮询 /analyze 或 /history。
+
+    参数:
+        symbols: 逗号分隔的股票代码（可选，不提供则订阅全部）
+    """
+    subscription = broadcaster.subscribe(_parse_symbols(symbols))
+
+    async def events():
+        try:
+            async for chunk in sse_events(subscription):
+                yield chunk
+        finally:
+            broadcaster.unsubscribe(subscription)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.websocket("/ws/signals")
+async def websocket_signals(websocket: WebSocket, symbols: Optional[str] = None):
+    """
+    WebSocket 信号推送（消息格式与 SSE 相同）
+
+    连接后可以发送 {"subscribe": ["AAPL"]} 更换订阅的股票，
+    发送空列表表示订阅全部；格式不对时返回 {"type": "error", "error": ...}，订阅不变。
+
+    参数:
+        symbols: 逗号分隔的股票代码（可选，不提供则订阅全部）
+    """
+    await websocket.accept()
+    subscriptions = [broadcaster.subscribe(_parse_symbols(symbols))]
+
+    async def receive():
+        # 读取客户端消息；断开连接时关闭订阅，让发送循环结束
+        try:
+            while True:
+                try:
+                    message = json.loads(await websocket.receive_text())
+                except ValueError:
+                    continue  # 忽略格式错误的消息
+                if isinstance(message, dict) and "subscribe" in message:
+                    requested = message["subscribe"]
+                    if not isinstance(requested, list) or not all(isinstance(item, str) for item in requested):
+                        await websocket.send_text(json.dumps(
+                            {"type": "error", "error": "subscribe 必须是股票代码（字符串）的列表"},
+                            ensure_ascii=False
+                        ))
+                        continue
+                    old = subscriptions[0]
+                    subscriptions[0] = broadcaster.subscribe(
+                        [item.strip().upper() for item in requested if item.strip()]
+                    )
+                    broadcaster.unsubscribe(old)
+        except WebSocketDisconnect:
+            pass
+        finally:
+            broadcaster.unsubscribe(subscriptions[0])
+
+    receiver = asyncio.create_task(receive())
+    try:
+        while True:
+            current = subscriptions[0]
+            message = await current.get()
+            if message is not None:
+                await websocket.send_text(message)
+            elif current is subscriptions[0]:
+                break
+    except WebSocketDisconnect:
+        pass
+    finally:
+        receiver.cancel()
+        broadcaster.unsubscribe(subscriptions[0])
+
+
+def _parse_symbols(symbols):
+    """逗号分隔的股票代码 -> 列表"""
+    return [symbol.strip().upper() for symbol in (symbols or "").split(",") if symbol.strip()]
+
+
+@router.post("/jobs", response_model=JobResponse, status_code=202)
+def submit_job(
+        job_request: JobRequest,
+        db: Session = Depends(get_db)
+):
+    """
+    提交后台任务（长周期分析、回测等），立即返回任务 ID
+
+    任务由后台工作线程按优先级执行，结果保存在数据库中，
+    用 GET /jobs/{job_id} 查询状态，GET /jobs/{job_id}/result 获取结果。
+    积压的任务过多时返回 503，客户端应稍后重试。
+
+    参数:
+        job_request: {"kind": "analyze"/"backtest", "params": {...}, "priority": 0-9}
+        db: 数据库会话（自动注入）
+
+    返回:
+        任务状态
+    """
+    try:
+        job_id = job_queue.submit(job_request.kind, job_request.params, job_request.priority)
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=e.errors(include_url=False, include_context=False))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except JobQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+
+    return _job_response(db.get(Job, job_id))
+
+
+@router.get("/jobs/{job_id}", response_model=JobResponse)
+def get_job(
+        job_id: str,
+        db: Session = Depends(get_db)
+):
+    """
+    查询后台任务状态
+
+    参数:
+        job_id: 任务ID
+        db: 数据库会话（自动注入）
+
+    返回:
+        任务状态（queued / running / succeeded / failed）
+    """
+    return _job_response(_find_job(db, job_id))
+
+
+@router.get("/jobs/{job_id}/result")
+def get_job_result(
+        job_id: str,
+        db: Session = Depends(get_db)
+):
+    """
+    获取后台任务结果
+
+    任务还没结束时返回 202 和当前状态；失败时 result 为 null，error 为失败原因
+
+    参数:
+        job_id: 任务ID
+        db: 数据库会话（自动注入）
+
+    返回:
+        {"job_id", "status", "result", "error"}
+    """
+    job = _find_job(db, job_id)
+    if job.status not in FINISHED:
+        return JSONResponse(status_code=202, content={"job_id": job.id, "status": job.status})
+
+    return {
+        "job_id": job.id,
+        "status": job.status,
+        "result": json.loads(job.result) if job.result else None,
+        "error": job.error
+    }
+
+
+def _find_job(db, job_id):
+    job = db.get(Job, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"任务 {job_id} 不存在")
+    return job
+
+
+def _job_response(job):
+    return JobResponse(
+        job_id=job.id,
+        kind=job.kind,
+        status=job.status,
+        priority=job.priority,
+        created_at=job.created_at,
+        started_at=job.started_at,
+        finished_at=job.finished_at,
+        error=job.error
+    )
+
+
 @router.get("/history", response_model=List[HistoryResponse])
 def get_history(
+        request: Request,
         symbol: Optional[str] = None,
-        limit: int = 10,
+        signal: Optional[str] = None,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        cursor: Optional[str] = None,
+        limit: int = Query(10, ge=1, le=HISTORY_MAX_LIMIT),
         db: Session = Depends(get_db)
 ):
     """
-    查询历史提醒记录
+    查询历史提醒记录（游标分页）
+
+    按 (created_at, id) 倒序做 keyset 分页：下一页从上一页最后一条之后继续，
+    由复合索引直接定位，不用 OFFSET，翻到多深响应时间都一样。
+    只查询需要的列，不构造 ORM 对象。
+    响应按版本缓存（ETag），数据没有变化时不查数据库。
 
     参数:
+        request: 当前请求（读取 If-None-Match）
         symbol: 股票代码（可选，不提供则查询所有，自动转大写）
-        limit: 返回记录数量（默认10条）
+        signal: 交易信号（可选，BUY / SELL / HOLD）
+        start: 起始时间（可选，包含）
+        end: 结束时间（可选，不包含）
+        cursor: 上一页响应头 X-Next-Cursor 的值（可选，不提供则从最新一条开始）
+        limit: 每页记录数量（默认10条，最多 500 条）
         db: 数据库会话（自动注入）
 
     返回:
-        历史记录列表
+        历史记录列表；还有下一页时，响应头 X-Next-Cursor 为下一页的游标
     """
-    try:
-        # 构建查询
-        query = db.query(AlertHistory)
-
-        # 如果指定了股票代码，添加过滤（自动转大写）
-        if symbol:
-            symbol = symbol.upper()
-            query = query.filter(AlertHistory.symbol == symbol)
-
-        # 按时间倒序，取最新的 N 条
-        alerts = query.order_by(AlertHistory.created_at.desc()).limit(limit).all()
-
-        # 转换为响应格式
-        return [
-            HistoryResponse(
-                id=alert.id,
-                symbol=alert.symbol,
-                signal=alert.signal,
-                price=alert.price,
-                message=alert.message,
-                created_at=alert.created_at,
-                sent=alert.sent
+    position = _decode_cursor(cursor) if cursor else None
+    symbol = symbol.upper() if symbol else None
+    signal = signal.upper() if signal else None
+
+    def build():
+        try:
+            query = select(
+                AlertHistory.id, AlertHistory.symbol, AlertHistory.signal, AlertHistory.price,
+                AlertHistory.message, AlertHistory.created_at, AlertHistory.sent
             )
-            for alert in alerts
-        ]
 
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"查询失败: {str(e)}")
+            if symbol:
+                query = query.where(AlertHistory.symbol == symbol)
+            if signal:
+                query = query.where(AlertHistory.signal == signal)
+            if start:
+                query = query.where(AlertHistory.created_at >= start)
+            if end:
+                query = query.where(AlertHistory.created_at < end)
+            if position:
+                query = query.where(tuple_(AlertHistory.created_at, AlertHistory.id) < position)
+
+            # 按时间倒序，多取一条用来判断是否还有下一页
+            query = query.order_by(AlertHistory.created_at.desc(), AlertHistory.id.desc()).limit(limit + 1)
+            rows = db.execute(query).all()
+
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"查询失败: {str(e)}")
+
+        headers = {}
+        if len(rows) > limit:
+            rows = rows[:limit]
+            headers["X-Next-Cursor"] = _encode_cursor(rows[-1].created_at, rows[-1].id)
+
+        return [row._asdict() for row in rows], headers
+
+    key = ("history", symbol, signal, start, end, cursor, limit)
+    return response_cache.respond(request, key, build, symbol=symbol)
+
+
+def _encode_cursor(created_at, alert_id):
+    """(created_at, id) -> 游标字符串（URL 安全的 base64）"""
+    raw = f"{created_at.isoformat()}|{alert_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor):
+    """游标字符串 -> (created_at, id)，格式不对时返回 400"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, alert_id = base64.urlsafe_b64decode(padded.encode()).decode().split("|")
+        return datetime.fromisoformat(created_at), int(alert_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="无效的分页游标")
 
 
 @router.get("/stocks")
 def get_stocks(
+        request: Request,
         active_only: bool = True,
         db: Session = Depends(get_db)
 ):
     """
     获取所有股票列表
 
+    响应按版本缓存（ETag），任何股票有写入时才重新查询。
+
     参数:
+        request: 当前请求（读取 If-None-Match）
         active_only: 只返回活跃的股票（默认 True）
         db: 数据库会话（自动注入）
 
     返回:
         股票列表
     """
-    try:
-        query = db.query(Stock)
+    def build():
+        try:
+            query = db.query(Stock)
+
+            if active_only:
+                query = query.filter(Stock.is_active == True)
 
-        if active_only:
-            query = query.filter(Stock.is_active == True)
+            stocks = query.order_by(Stock.symbol).all()
 
-        stocks = query.order_by(Stock.symbol).all()
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"查询失败: {str(e)}")
 
         return {
             "total": len(stocks),
@@ -219,43 +541,52 @@ def get_stocks(
                 }
                 for stock in stocks
             ]
-        }
+        }, {}
 
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"查询失败: {str(e)}")
+    return response_cache.respond(request, ("stocks", active_only), build)
 
 
 @router.get("/stocks/{symbol}")
 def get_stock_detail(
+        request: Request,
         symbol: str,
         db: Session = Depends(get_db)
 ):
     """
     获取单个股票的详细信息
 
+    响应按这只股票的版本缓存（ETag），只有这只股票有写入时才重新查询。
+
     参数:
+        request: 当前请求（读取 If-None-Match）
         symbol: 股票代码（自动转大写）
         db: 数据库会话（自动注入）
 
     返回:
         股票详情 + 最近的提醒记录
     """
-    try:
-        # 自动转大写，用户友好
-        symbol = symbol.upper()
+    # 自动转大写，用户友好
+    symbol = symbol.upper()
 
-        # 查找股票
-        stock = db.query(Stock).filter(Stock.symbol == symbol).first()
+    def build():
+        try:
+            # 查找股票
+            stock = db.query(Stock).filter(Stock.symbol == symbol).first()
 
-        if not stock:
-            raise HTTPException(status_code=404, detail=f"股票 {symbol} 不存在")
+            if not stock:
+                raise HTTPException(status_code=404, detail=f"股票 {symbol} 不存在")
+
+            # 查询最近 5 条提醒
+            recent_alerts = db.query(AlertHistory) \
+                .filter(AlertHistory.symbol == symbol) \
+                .order_by(AlertHistory.created_at.desc(), AlertHistory.id.desc()) \
+                .limit(5) \
+                .all()
 
-        # 查询最近 5 条提醒
-        recent_alerts = db.query(AlertHistory) \
-            .filter(AlertHistory.symbol == symbol) \
-            .order_by(AlertHistory.created_at.desc()) \
-            .limit(5) \
-            .all()
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"查询失败: {str(e)}")
 
         return {
             "stock": {
@@ -274,12 +605,9 @@ def get_stock_detail(
                 }
                 for alert in recent_alerts
             ]
-        }
+        }, {}
 
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"查询失败: {str(e)}")
+    return response_cache.respond(request, ("stock", symbol), build, symbol=symbol)
 
 
 @router.delete("/stocks/{symbol}")
@@ -309,6 +637,7 @@ def delete_stock(
         # 软删除
         stock.is_active = False
         db.commit()
+        response_cache.bump(symbol)
 
         return {
             "message": f"股票 {symbol} 已标记为不活跃",
@@ -355,4 +684,23 @@ def health_check(db: Session = Depends(get_db)):
             "database": "disconnected",
             "error": str(e),
             "timestamp": datetime.now()
-        }
\ No newline at end of file
+        }
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def get_metrics():
+    """
+    Prometheus 格式的运行指标
+
+    - turtle_stage_seconds: 各阶段耗时直方图（fetch / clean / strategy / db_write / serialize）
+    - turtle_provider_errors_total: 数据源错误次数
+    - turtle_cache_*: 数据、信号、响应缓存的命中率和占用
+
+    返回:
+        text/plain 格式的指标
+    """
+    caches = [data_cache.stats(), signal_cache.stats(), response_cache.stats()]
+    return PlainTextResponse(
+        metrics.render(caches),
+        media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
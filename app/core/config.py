@@ -19,6 +19,44 @@ class Config:
     ENTRY_PERIOD = 20
     EXIT_PERIOD = 10
 
+    # 行情数据源配置
+    MARKET_DATA_PROVIDER = os.getenv("MARKET_DATA_PROVIDER", "yfinance")  # yfinance / local / synthetic / replay
+    LOCAL_DATA_DIR = os.getenv("LOCAL_DATA_DIR", os.getenv("CACHE_DIR", "data/cache"))
+
+    # 合成数据 / 回放配置（压测用）
+    SYNTHETIC_BARS = int(os.getenv("SYNTHETIC_BARS", "2520"))  # 每只股票的K线数（约10年）
+    SYNTHETIC_SEED = int(os.getenv("SYNTHETIC_SEED", "0"))
+    REPLAY_RATE = float(os.getenv("REPLAY_RATE", "1.0"))  # 每秒放出多少根K线
+    REPLAY_WARMUP = int(os.getenv("REPLAY_WARMUP", "250"))  # 回放开始时已有的K线数
+
+    # 异步下载配置
+    FETCH_MAX_WORKERS = int(os.getenv("FETCH_MAX_WORKERS", "8"))  # 下载线程池大小
+    FETCH_MAX_CONCURRENCY = int(os.getenv("FETCH_MAX_CONCURRENCY", "4"))  # 同时访问数据源的请求数
+    CPU_WORKERS = int(os.getenv("CPU_WORKERS", str(os.cpu_count() or 4)))  # 策略计算线程池大小
+
+    # 后台任务配置
+    JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))  # 后台任务线程数
+    JOB_MAX_PENDING = int(os.getenv("JOB_MAX_PENDING", "100"))  # 排队 + 运行中的任务上限，超出时拒绝新任务
+
+    # 行情数据缓存配置
+    CACHE_DIR = os.getenv("CACHE_DIR", "data/cache")
+    CACHE_MAX_AGE = int(os.getenv("CACHE_MAX_AGE", "900"))  # 缓存多少秒内不重新下载
+    OFFLINE = os.getenv("TURTLE_OFFLINE", "0").lower() in ("1", "true", "yes")  # 离线模式：只读缓存
+
+    # 列式K线存储（memmap）
+    BAR_STORE_DIR = os.getenv("BAR_STORE_DIR", "data/bars")
+
+    # 内存缓存配置
+    DATA_CACHE_BYTES = int(os.getenv("DATA_CACHE_BYTES", str(256 * 1024 * 1024)))
+    SIGNAL_CACHE_BYTES = int(os.getenv("SIGNAL_CACHE_BYTES", str(16 * 1024 * 1024)))
+    CACHE_TTL_OPEN = int(os.getenv("CACHE_TTL_OPEN", "60"))  # 交易时段内缓存多少秒
+    RESPONSE_CACHE_BYTES = int(os.getenv("RESPONSE_CACHE_BYTES", str(32 * 1024 * 1024)))  # 读接口的响应缓存
+
+    # 信号推送配置（SSE / WebSocket）
+    STREAM_QUEUE_SIZE = int(os.getenv("STREAM_QUEUE_SIZE", "100"))  # 每个连接最多缓存多少条消息
+    STREAM_HEARTBEAT = int(os.getenv("STREAM_HEARTBEAT", "15"))  # 心跳间隔（秒）
+    STREAM_MAX_KEYS = int(os.getenv("STREAM_MAX_KEYS", "10000"))  # 最多记住多少组参数的最新信号（超出时淘汰最久没更新的）
+
     # 历史记录配置
     HISTORY_FILE = "data/analysis_history.json"
     MAX_HISTORY = 1000  # 最多保存1000条
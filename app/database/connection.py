@@ -2,12 +2,14 @@
 数据库连接配置
 
 这个文件负责：
-1. 创建数据库引擎（Engine）
-2. 创建会话工厂（SessionLocal）
+1. 创建数据库引擎（Engine）和异步引擎（AsyncEngine）
+2. 创建会话工厂（SessionLocal / AsyncSessionLocal）
 3. 提供 Base 类给所有模型继承
 """
 
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import os
@@ -19,14 +21,45 @@ load_dotenv()
 # 从环境变量读取数据库 URL
 DATABASE_URL = os.getenv("DATABASE_URL", "postgresql://localhost/turtle_trading")
 
+# 异步驱动：PostgreSQL 用 asyncpg，SQLite 用 aiosqlite
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+# echo=True 会打印所有 SQL 语句，方便调试（压测 / 生产环境设置 SQL_ECHO=0）
+SQL_ECHO = os.getenv("SQL_ECHO", "1").lower() in ("1", "true", "yes")
+
+
+def to_async_url(url):
+    """
+    把同步数据库 URL 换成对应的异步驱动
+
+    例如 postgresql://localhost/db -> postgresql+asyncpg://localhost/db
+    """
+    url = make_url(url)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"不支持的异步数据库: {backend}")
+    return url.set(drivername=ASYNC_DRIVERS[backend]).render_as_string(hide_password=False)
+
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or to_async_url(DATABASE_URL)
+
 # 创建数据库引擎
-# echo=True 会打印所有 SQL 语句，方便调试
 engine = create_engine(
     DATABASE_URL,
-    echo=True,  # 开发时设为 True，生产环境设为 False
+    echo=SQL_ECHO,  # 开发时设为 True，生产环境设为 False
     pool_pre_ping=True  # 检查连接是否有效
 )
 
+# 异步引擎：async 路由的数据库读写不占用线程池
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    echo=SQL_ECHO,
+    pool_pre_ping=True
+)
+
 # 创建会话工厂
 # 每次需要操作数据库时，用这个工厂创建一个新会话
 SessionLocal = sessionmaker(
@@ -35,6 +68,15 @@ SessionLocal = sessionmaker(
     bind=engine  # 绑定到我们的引擎
 )
 
+# 异步会话工厂
+# expire_on_commit=False：提交后仍然可以读取对象属性（例如新记录的 id），不会触发额外的查询
+AsyncSessionLocal = async_sessionmaker(
+    async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False
+)
+
 # 创建基类
 # 所有数据库模型都继承这个类
 Base = declarative_base()
@@ -60,6 +102,30 @@ def get_db():
         db.close()
 
 
+async def get_async_db():
+    """
+    异步依赖注入函数
+
+    用法：
+        @app.get("/items/")
+        async def read_items(db: AsyncSession = Depends(get_async_db)):
+            result = await db.execute(select(Item))
+            return result.scalars().all()
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def get_async_sessionmaker():
+    """
+    返回异步会话工厂（依赖注入用）
+
+    流式响应在生成内容时才访问数据库，需要自己管理会话的生命周期，
+    所以注入会话工厂而不是会话本身
+    """
+    return AsyncSessionLocal
+
+
 def init_db():
     """
     初始化数据库
@@ -67,9 +133,15 @@ def init_db():
     创建所有定义的表
     只在第一次运行时需要调用
     """
-    from app.database.models import Stock, AlertHistory  # 更新导入路径
+    from app.database.models import Stock, AlertHistory, Job, PriceBar  # 更新导入路径
 
     Base.metadata.create_all(bind=engine)
+
+    # create_all 不会给已经存在的表补索引，这里单独检查
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+
     print("✅ 数据库表创建成功！")
 
 
@@ -4,7 +4,9 @@
 定义数据库表的结构，就像建筑图纸一样
 """
 
-from sqlalchemy import Column, Integer, String, Float, DateTime, Text, Boolean
+from datetime import datetime
+
+from sqlalchemy import Column, Integer, String, Float, DateTime, Text, Boolean, Index
 from sqlalchemy.sql import func
 from app.database.connection import Base  # 更新导入路径
 
@@ -70,7 +72,16 @@ class AlertHistory(Base):
     sent = Column(Boolean, default=False)
 
     # 创建时间（自动设置，不可修改）
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # 由 Python 端生成：/history 的游标和存储的值类型、格式一致
+    # （SQLite 的 CURRENT_TIMESTAMP 没有微秒，按字符串比较时游标永远翻不过同一秒的记录）
+    created_at = Column(DateTime(timezone=True), default=datetime.now, server_default=func.now())
+
+    # 复合索引：/history 按 (created_at, id) 倒序做游标分页，
+    # 按股票查询时先用 symbol 过滤，翻到多深都是一次索引范围扫描
+    __table_args__ = (
+        Index("ix_alert_history_created_id", "created_at", "id"),
+        Index("ix_alert_history_symbol_created_id", "symbol", "created_at", "id"),
+    )
 
     def __repr__(self):
         return f"<AlertHistory(symbol='{self.symbol}', signal='{self.signal}', price={self.price})>"
@@ -110,4 +121,71 @@ class Subscription(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
     def __repr__(self):
-        return f"<Subscription(user_id={self.user_id}, symbol='{self.symbol}')>"
\ No newline at end of file
+        return f"<Subscription(user_id={self.user_id}, symbol='{self.symbol}')>"
+
+
+class Job(Base):
+    """
+    后台任务表 - 记录提交的分析 / 回测任务及其结果
+
+    类比：这是一个"工单记录"
+    """
+    __tablename__ = "jobs"
+
+    # 任务 ID（uuid 十六进制字符串）
+    id = Column(String(32), primary_key=True)
+
+    # 任务类型（analyze, backtest）
+    kind = Column(String(20), nullable=False)
+
+    # 状态（queued, running, succeeded, failed）
+    status = Column(String(10), nullable=False, default="queued", index=True)
+
+    # 优先级（0-9，越大越先执行）
+    priority = Column(Integer, nullable=False, default=5)
+
+    # 任务参数和结果（存储为 JSON 字符串）
+    params = Column(Text, nullable=True)
+    result = Column(Text, nullable=True)
+
+    # 失败原因
+    error = Column(Text, nullable=True)
+
+    # 创建 / 开始 / 结束时间
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+    def __repr__(self):
+        return f"<Job(id='{self.id}', kind='{self.kind}', status='{self.status}')>"
+
+
+class PriceBar(Base):
+    """
+    K线表 - 存储原始行情（日线和分钟线）
+
+    类比：这是一个"价格账本"
+
+    主键为 (symbol, interval, date)：按股票和周期取一段时间的K线
+    正好是主键索引上的一次范围扫描，不需要额外的索引。
+    """
+    __tablename__ = "price_bars"
+
+    # 股票代码
+    symbol = Column(String(10), primary_key=True)
+
+    # K线周期（1d, 1m, 5m ...）
+    interval = Column(String(5), primary_key=True)
+
+    # K线起始时间（日线为当天 00:00，分钟线为交易所当地时间）
+    date = Column(DateTime, primary_key=True)
+
+    # 开盘 / 最高 / 最低 / 收盘价和成交量
+    open = Column(Float)
+    high = Column(Float)
+    low = Column(Float)
+    close = Column(Float)
+    volume = Column(Float)
+
+    def __repr__(self):
+        return f"<PriceBar(symbol='{self.symbol}', interval='{self.interval}', date={self.date}, close={self.close})>"
@@ -0,0 +1,244 @@
+"""
+K线存储 - price_bars 表的批量写入和读取
+
+写入:
+- PostgreSQL (psycopg2): COPY 到临时表，再一条 INSERT ... SELECT ... ON CONFLICT DO UPDATE 合并
+- SQLite: executemany INSERT ... ON CONFLICT DO UPDATE
+- 其他数据库: executemany DELETE + INSERT
+
+读取直接从 DBAPI 游标取出原始元组，按列转换成 numpy 数组，不构造 ORM 对象。
+
+设置 MARKET_DATA_PROVIDER=database 后，fetch_data / /analyze 从数据库读取K线，不访问网络；
+用 update_bars() 定时从网络数据源同步。
+"""
+
+import csv
+import io
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import bindparam, delete, insert, select
+
+from app.database import connection
+from app.database.models import PriceBar
+from app.database.writes import UPSERT_DIALECTS
+from app.services.disk_cache import period_start, slice_period
+from app.services.providers import (
+    COLUMNS, PRICE_FIELDS, MarketDataProvider, _slice_intraday, frames_to_panel,
+    get_provider, is_daily, panel_to_frames, register_provider
+)
+
+# price_bars 的列（写入顺序）
+BAR_COLUMNS = ("symbol", "interval", "date", "open", "high", "low", "close", "volume")
+KEY_COLUMNS = BAR_COLUMNS[:3]
+VALUE_COLUMNS = BAR_COLUMNS[3:]
+
+
+def bar_rows(symbol, data, interval="1d"):
+    """
+    fetch_data 格式的 DataFrame -> price_bars 的行（元组）
+
+    参数:
+    symbol: 股票代码
+    data: 包含 Date / Open / High / Low / Close / Volume 列的 DataFrame
+    interval: K线周期
+
+    返回:
+    [(symbol, interval, date, open, high, low, close, volume), ...]
+    """
+    if data is None or len(data) == 0:
+        return []
+
+    symbol = symbol.upper()
+    # datetime64[us] 转 object 得到 datetime.datetime（date 对象和时间戳都能直接转换，不经过 pandas）
+    dates = np.asarray(data['Date'], dtype='datetime64[us]').astype(object).tolist()
+    values = [np.asarray(data[field], dtype=float).tolist() for field in PRICE_FIELDS]
+    return [(symbol, interval, date, *bar) for date, *bar in zip(dates, *values)]
+
+
+def ingest_bars(frames, interval="1d", engine=None):
+    """
+    批量写入K线（已存在的 (symbol, interval, date) 会被覆盖）
+
+    参数:
+    frames: {symbol: DataFrame}
+    interval: K线周期
+    engine: 数据库引擎（默认 connection.engine）
+
+    返回:
+    写入的K线数量
+    """
+    rows = [row for symbol, data in frames.items() for row in bar_rows(symbol, data, interval)]
+    if not rows:
+        return 0
+
+    engine = engine or connection.engine
+    with engine.begin() as conn:
+        if conn.dialect.name == "postgresql" and conn.dialect.driver == "psycopg2":
+            _copy_upsert(conn, rows)
+        else:
+            _executemany_upsert(conn, rows)
+    return len(rows)
+
+
+def _copy_upsert(conn, rows):
+    """PostgreSQL: COPY 到临时表，再合并到 price_bars（COPY 本身不能处理冲突）"""
+    columns = ", ".join(f'"{column}"' for column in BAR_COLUMNS)
+    updates = ", ".join(f'"{column}" = EXCLUDED."{column}"' for column in VALUE_COLUMNS)
+
+    conn.exec_driver_sql(
+        "CREATE TEMP TABLE price_bars_staging (LIKE price_bars INCLUDING DEFAULTS) ON COMMIT DROP"
+    )
+
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    buffer.seek(0)
+    cursor = conn.connection.dbapi_connection.cursor()
+    cursor.copy_expert(f"COPY price_bars_staging ({columns}) FROM STDIN WITH (FORMAT csv)", buffer)
+
+    conn.exec_driver_sql(
+        f"INSERT INTO price_bars ({columns}) SELECT {columns} FROM price_bars_staging "
+        f'ON CONFLICT ("symbol", "interval", "date") DO UPDATE SET {updates}'
+    )
+
+
+def _executemany_upsert(conn, rows):
+    """其他数据库: executemany INSERT ... ON CONFLICT，不支持时先删除再插入"""
+    params = [dict(zip(BAR_COLUMNS, row)) for row in rows]
+    table = PriceBar.__table__
+
+    dialect_insert = UPSERT_DIALECTS.get(conn.dialect.name)
+    if dialect_insert is not None:
+        statement = dialect_insert(table)
+        statement = statement.on_conflict_do_update(
+            index_elements=list(KEY_COLUMNS),
+            set_={column: statement.excluded[column] for column in VALUE_COLUMNS}
+        )
+        conn.execute(statement, params)
+        return
+
+    conn.execute(
+        delete(table).where(
+            table.c.symbol == bindparam("b_symbol"),
+            table.c.interval == bindparam("b_interval"),
+            table.c.date == bindparam("b_date")
+        ),
+        [{"b_symbol": row[0], "b_interval": row[1], "b_date": row[2]} for row in rows]
+    )
+    conn.execute(insert(table), params)
+
+
+def read_many(symbols, interval="1d", start=None, end=None, engine=None):
+    """
+    读取多只股票的K线（一条 SQL），直接从游标转换成 numpy 数组
+
+    参数:
+    symbols: 股票代码列表
+    interval: K线周期
+    start: 起始时间（包含，可选）
+    end: 结束时间（不包含，可选）
+    engine: 数据库引擎（默认 connection.engine）
+
+    返回:
+    {symbol: {"Date": datetime64[s] 数组, "Open"/"High"/"Low"/"Close"/"Volume": float64 数组}}
+    没有数据的股票不在结果中
+    """
+    table = PriceBar.__table__
+    statement = (
+        select(table.c.symbol, table.c.date, *(table.c[column] for column in VALUE_COLUMNS))
+        .where(table.c.symbol.in_([symbol.upper() for symbol in symbols]), table.c.interval == interval)
+        .order_by(table.c.symbol, table.c.date)
+    )
+    if start is not None:
+        statement = statement.where(table.c.date >= pd.Timestamp(start).to_pydatetime())
+    if end is not None:
+        statement = statement.where(table.c.date < pd.Timestamp(end).to_pydatetime())
+
+    engine = engine or connection.engine
+    with engine.connect() as conn:
+        # 原始 DBAPI 元组，不经过 SQLAlchemy 的逐行类型转换
+        rows = conn.execute(statement).cursor.fetchall()
+    if not rows:
+        return {}
+
+    symbol_column, date_column, *value_columns = zip(*rows)
+    row_symbols = np.array(symbol_column)
+    dates = np.array(date_column, dtype='datetime64[s]')
+    values = {field: np.array(column, dtype=float) for field, column in zip(PRICE_FIELDS, value_columns)}
+
+    starts = np.concatenate(([0], np.flatnonzero(row_symbols[1:] != row_symbols[:-1]) + 1))
+    ends = np.append(starts[1:], len(row_symbols))
+    return {
+        str(row_symbols[a]): {'Date': dates[a:b], **{field: column[a:b] for field, column in values.items()}}
+        for a, b in zip(starts, ends)
+    }
+
+
+def read_bars(symbol, interval="1d", start=None, end=None, engine=None):
+    """读取一只股票的K线（格式同 read_many 的单个元素，没有数据时为 None）"""
+    return read_many([symbol], interval, start, end, engine).get(symbol.upper())
+
+
+def arrays_to_frame(arrays, interval="1d"):
+    """read_many 的数组 -> fetch_data 格式的 DataFrame"""
+    dates = pd.DatetimeIndex(arrays['Date'].astype('datetime64[ns]'))
+    data = pd.DataFrame({'Date': dates.date if is_daily(interval) else dates})
+    for field in PRICE_FIELDS:
+        data[field] = arrays[field]
+    return data
+
+
+def update_bars(symbols, period="5d", interval="1d", provider="yfinance", engine=None):
+    """
+    从网络数据源批量下载最近的K线并写入数据库（每日收盘后运行）
+
+    参数:
+    symbols: 股票代码列表
+    period: 下载多长时间的数据（覆盖已有的K线，默认最近 5 个交易日）
+    interval: K线周期
+    provider: 数据源名称
+    engine: 数据库引擎（默认 connection.engine）
+
+    返回:
+    写入的K线数量
+    """
+    panel = get_provider(provider).fetch_many(symbols, period, interval)
+    count = ingest_bars(panel_to_frames(panel), interval, engine)
+    print(f"✅ 写入 {count} 根K线（{len(symbols)} 只股票，{interval}）")
+    return count
+
+
+class DatabaseProvider(MarketDataProvider):
+    """
+    数据库数据源：从 price_bars 表读取K线，不访问网络
+
+    批量获取时所有股票只查询一次。
+    """
+
+    name = "database"
+
+    def __init__(self, engine=None):
+        self.engine = engine
+
+    def history(self, symbol, period=None, start=None, end=None, interval="1d"):
+        frames = self._frames([symbol], period, start, end, interval)
+        return frames.get(symbol.upper(), pd.DataFrame(columns=COLUMNS))
+
+    def fetch_many(self, symbols, period="1mo", interval="1d"):
+        return frames_to_panel(self._frames(symbols, period, None, None, interval))
+
+    def _frames(self, symbols, period, start, end, interval):
+        if period is not None:
+            start = period_start(period)
+
+        frames = {}
+        for symbol, arrays in read_many(symbols, interval, start, end, self.engine).items():
+            data = arrays_to_frame(arrays, interval)
+            if period is not None:
+                # "Nd" 周期只保留最后 N 个交易日
+                data = slice_period(data, period, start) if is_daily(interval) else _slice_intraday(data, period)
+            frames[symbol] = data
+        return frames
+
+
+register_provider(DatabaseProvider.name, DatabaseProvider)
@@ -0,0 +1,136 @@
+"""
+批量写入 - 股票和提醒历史
+
+一次分析只需要两条 SQL：
+1. INSERT ... ON CONFLICT (symbol) DO UPDATE 更新或创建股票（多只股票时一条多行 INSERT）
+2. INSERT ... RETURNING id 写入提醒历史（多条时合并成一条多行 INSERT，按参数顺序返回 id）
+
+PostgreSQL 和 SQLite（3.24+）都支持 ON CONFLICT，其他数据库退回到
+“一次 SELECT 已存在的股票 + executemany UPDATE / INSERT”。
+"""
+
+from datetime import datetime
+
+from sqlalchemy import bindparam, insert, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+
+from app.database.models import AlertHistory, Stock
+
+# 支持 INSERT ... ON CONFLICT 的数据库
+UPSERT_DIALECTS = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
+# 多行 INSERT 每条语句最多包含的股票数（避免超过数据库的参数数量上限）
+UPSERT_CHUNK = 1000
+
+
+def stock_rows(prices, now=None):
+    """
+    {symbol: current_price} -> stocks 表的行
+
+    参数:
+    prices: 股票代码 -> 最新价格（同一股票只保留一行）
+    now: 更新时间（默认当前时间）
+    """
+    now = now or datetime.now()
+    return [
+        {
+            "symbol": symbol,
+            "name": symbol,  # 可以后续从 API 获取完整名称
+            "current_price": price,
+            "last_updated": now,
+            "is_active": True
+        }
+        for symbol, price in prices.items()
+    ]
+
+
+def upsert_stocks_statement(dialect_name, rows):
+    """
+    生成股票的 INSERT ... ON CONFLICT (symbol) DO UPDATE 语句
+
+    已存在的股票只更新价格和更新时间（名称、是否活跃保持不变）
+
+    参数:
+    dialect_name: 数据库类型（engine.dialect.name）
+    rows: stock_rows() 的结果
+
+    返回:
+    语句；数据库不支持 ON CONFLICT 时返回 None
+    """
+    dialect_insert = UPSERT_DIALECTS.get(dialect_name)
+    if dialect_insert is None:
+        return None
+
+    statement = dialect_insert(Stock).values(rows)
+    return statement.on_conflict_do_update(
+        index_elements=[Stock.symbol],
+        set_={
+            "current_price": statement.excluded.current_price,
+            "last_updated": statement.excluded.last_updated
+        }
+    )
+
+
+async def save_analyses(db, prices, alerts):
+    """
+    保存一批分析结果（不提交，由调用方控制事务）
+
+    参数:
+    db: 异步数据库会话
+    prices: {symbol: current_price}
+    alerts: AlertHistory 字段的 dict 列表
+
+    返回:
+    与 alerts 顺序相同的提醒记录 ID 列表
+    """
+    rows = stock_rows(prices)
+    dialect_name = db.get_bind().dialect.name
+
+    for start in range(0, len(rows), UPSERT_CHUNK):
+        chunk = rows[start:start + UPSERT_CHUNK]
+        statement = upsert_stocks_statement(dialect_name, chunk)
+        if statement is None:
+            await _merge_stocks(db, chunk)
+        else:
+            await db.execute(statement)
+
+    if not alerts:
+        return []
+
+    if dialect_name == "sqlite":
+        # SQLite 不支持 SQLAlchemy 的插入顺序标记，要求按参数顺序返回时会退化成逐行 INSERT；
+        # 它的写入是串行的，同一条语句里的自增 id 按插入顺序递增，排序后就是参数顺序
+        result = await db.execute(insert(AlertHistory).returning(AlertHistory.id), alerts)
+        return sorted(result.scalars())
+
+    result = await db.execute(
+        insert(AlertHistory).returning(AlertHistory.id, sort_by_parameter_order=True),
+        alerts
+    )
+    return list(result.scalars())
+
+
+async def _merge_stocks(db, rows):
+    """不支持 ON CONFLICT 时：一次查出已存在的股票，再分别批量 UPDATE / INSERT"""
+    table = Stock.__table__
+    symbols = [row["symbol"] for row in rows]
+    existing = set((await db.execute(select(table.c.symbol).where(table.c.symbol.in_(symbols)))).scalars())
+
+    updates = [
+        {"b_symbol": row["symbol"], "b_price": row["current_price"], "b_updated": row["last_updated"]}
+        for row in rows if row["symbol"] in existing
+    ]
+    inserts = [row for row in rows if row["symbol"] not in existing]
+
+    if updates:
+        await db.execute(
+            update(table)
+            .where(table.c.symbol == bindparam("b_symbol"))
+            .values(current_price=bindparam("b_price"), last_updated=bindparam("b_updated")),
+            updates
+        )
+    if inserts:
+        await db.execute(insert(table), inserts)
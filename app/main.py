@@ -5,11 +5,25 @@ FastAPI 应用入口文件
 """
 
 import sys
+from contextlib import asynccontextmanager
 from pathlib import Path
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-app = FastAPI()
+from app.services import jobs
+
+
+@asynccontextmanager
+async def lifespan(app):
+    """启动时恢复上次进程留下的后台任务"""
+    try:
+        jobs.job_queue.recover()
+    except Exception as e:
+        print(f"⚠️  恢复后台任务失败: {str(e)}")
+    yield
+
+
+app = FastAPI(lifespan=lifespan)
 
 
 # CORS配置
@@ -19,6 +33,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],  # 前端需要读取分页游标和缓存标识
 )
 
 # 导入并注册路由
@@ -38,7 +53,7 @@ if __name__ == "__main__":
     print("\n按 Ctrl+C 停止服务器\n")
 
     uvicorn.run(
-        "app.api.routes:app",  # 指向 app 对象的路径
+        "app.main:app",  # 指向 app 对象的路径
         host="0.0.0.0",
         port=8000,
         reload=True  # 开发模式：代码改动自动重启
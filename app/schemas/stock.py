@@ -5,7 +5,7 @@ Pydantic 模型 - API 数据验证
 """
 
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import Any, Dict, List, Optional
 from datetime import datetime
 
 
@@ -18,6 +18,11 @@ class StockRequest(BaseModel):
     exit_period: int = Field(default=10, description="离场周期（天）", example=10)
 
 
+class BatchAnalyzeRequest(BaseModel):
+    """批量分析请求模型"""
+    requests: List[StockRequest] = Field(..., min_length=1, max_length=500, description="分析请求列表")
+
+
 class StockResponse(BaseModel):
     """股票分析响应模型"""
     symbol: str = Field(..., description="股票代码")
@@ -66,4 +71,33 @@ class HistoryResponse(BaseModel):
                 "created_at": "2024-10-13T15:30:00",
                 "sent": False
             }
-        }
\ No newline at end of file
+        }
+
+
+class BacktestRequest(BaseModel):
+    """回测任务参数"""
+    symbol: str = Field(..., description="股票代码", example="AAPL")
+    period: str = Field(default="2y", description="数据周期", example="2y")
+    system: int = Field(default=1, ge=1, le=2, description="海龟系统（1 或 2）", example=1)
+    entry_period: Optional[int] = Field(None, gt=0, description="入场周期（默认由 system 决定）")
+    exit_period: Optional[int] = Field(None, gt=0, description="离场周期（默认由 system 决定）")
+    initial_capital: float = Field(default=100000.0, gt=0, description="初始资金")
+
+
+class JobRequest(BaseModel):
+    """后台任务提交请求"""
+    kind: str = Field(..., description="任务类型：analyze / backtest", example="backtest")
+    params: Dict[str, Any] = Field(default_factory=dict, description="任务参数（StockRequest / BacktestRequest 的字段）")
+    priority: int = Field(default=5, ge=0, le=9, description="优先级（0-9，越大越先执行）")
+
+
+class JobResponse(BaseModel):
+    """后台任务状态响应模型"""
+    job_id: str = Field(..., description="任务ID")
+    kind: str = Field(..., description="任务类型")
+    status: str = Field(..., description="状态：queued/running/succeeded/failed")
+    priority: int = Field(..., description="优先级")
+    created_at: Optional[datetime] = Field(None, description="提交时间")
+    started_at: Optional[datetime] = Field(None, description="开始时间")
+    finished_at: Optional[datetime] = Field(None, description="结束时间")
+    error: Optional[str] = Field(None, description="失败原因")
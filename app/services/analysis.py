@@ -0,0 +1,250 @@
+# analysis.py - 股票分析流水线（异步版本，供 /analyze 使用）
+
+import asyncio
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+import numpy as np
+
+from app.core.config import config
+from app.services.async_fetch import fetch_data_async, fetcher
+from app.services.fetch_data import fetch_many_data
+from app.services.broadcast import broadcaster
+from app.services.memory_cache import data_cache, signal_cache, market_ttl
+from app.services.metrics import provider_errors, stage
+from app.services.panel import align_frames, evaluate_panel
+from app.services.resample import base_interval, is_intraday
+from app.services.strategy import turtle_strategy
+
+# 策略计算用的有界线程池（numpy 计算时会释放 GIL），
+# 和下载线程池、FastAPI 默认线程池分开，计算再多也不会挤占 I/O
+cpu_executor = ThreadPoolExecutor(max_workers=config.CPU_WORKERS, thread_name_prefix="cpu")
+
+
+def signal_summary(data, entry_period=20, exit_period=10):
+    """
+    计算信号和通道价格（同步，CPU 部分）
+
+    参数:
+    data: 股票历史数据
+    entry_period: 入场周期
+    exit_period: 出场周期
+
+    返回:
+    dict: {"signal", "current_price", "high_20d", "low_10d"}
+    """
+    signal = turtle_strategy(data, entry_period, exit_period)
+    high_channel, low_channel = channel_levels(data, entry_period, exit_period)
+
+    close = np.asarray(data['Close'], dtype=float)
+    return {
+        "signal": signal,
+        "current_price": float(close[-1]),
+        "high_20d": high_channel,
+        "low_10d": low_channel
+    }
+
+
+def channel_levels(data, entry_period=20, exit_period=10):
+    """
+    通道价格：最近 entry_period 根K线的最高价、最近 exit_period 根K线的最低价
+
+    数据不足 entry_period 根时用已有的K线计算（此时信号固定为 HOLD）。
+    /analyze 和 /analyze/batch 都用它，两边返回的通道一致。
+
+    返回:
+    (high_20d, low_10d)
+    """
+    high = np.asarray(data['High'], dtype=float)
+    low = np.asarray(data['Low'], dtype=float)
+    return float(np.nanmax(high[-entry_period:])), float(np.nanmin(low[-exit_period:]))
+
+
+async def run_cpu(func, *args, **kwargs):
+    """在策略计算线程池中运行同步函数"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(cpu_executor, partial(func, *args, **kwargs))
+
+
+async def analyze(symbol, period="2mo", interval="1d", entry_period=20, exit_period=10):
+    """
+    异步分析一只股票
+
+    1. 查信号缓存
+    2. 异步获取数据（相同请求合并为一次下载）
+    3. 在计算线程池中运行策略
+    4. 信号或通道有变化时推送给订阅者（broadcast）
+
+    参数:
+    symbol: 股票代码（已转大写）
+    period, interval: 数据周期和K线周期
+    entry_period, exit_period: 海龟通道周期
+
+    返回:
+    signal_summary 的结果；没有数据时返回 None
+    （interval / period 不合法时抛出 ValueError）
+    """
+    cache_key = (symbol.upper(), period, interval, entry_period, exit_period)
+    result = signal_cache.get(cache_key)
+    if result is not None:
+        return result
+
+    with stage("fetch"):
+        data = await fetch_data_async(symbol, period, interval=interval)
+    if data is None or len(data) == 0:
+        return None
+
+    with stage("strategy"):
+        result = await run_cpu(signal_summary, data, entry_period, exit_period)
+    signal_cache.set(cache_key, result, ttl=market_ttl())
+    broadcaster.publish_signal(*cache_key, result)
+    return result
+
+
+async def analyze_batch(requests):
+    """
+    批量分析（异步生成器）
+
+    按 (period, interval) 分组：每组只发一次批量下载（fetch_many_data，周期处理同 fetch_data），
+    再用 evaluate_panel 一次算出整组的信号。哪一组先完成就先返回哪一组。
+
+    参数:
+    requests: StockRequest 列表
+
+    生成:
+    每组一个列表 [(request, result, error)]
+    result 为 signal_summary 格式的 dict；失败时 result 为 None，error 为 (状态码, 原因)
+    """
+    groups = defaultdict(list)
+    for request in requests:
+        groups[(request.period, request.interval)].append(request)
+
+    tasks = [asyncio.ensure_future(_analyze_group(period, interval, group))
+             for (period, interval), group in groups.items()]
+    try:
+        for finished in asyncio.as_completed(tasks):
+            yield await finished
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+async def _analyze_group(period, interval, requests):
+    """分析同一 (period, interval) 的一组请求"""
+    # 和 fetch_data 相同的校验：不支持的周期、分钟线回看范围太长都返回 400
+    try:
+        if is_intraday(interval):
+            base_interval(interval, period)
+    except ValueError as e:
+        return [(request, None, (400, str(e))) for request in requests]
+
+    # 信号缓存命中的请求不需要数据
+    results = {}
+    pending = []
+    for request in requests:
+        key = _signal_key(request)
+        cached = signal_cache.get(key)
+        if cached is not None:
+            results[key] = cached
+        elif key not in results:
+            results[key] = None
+            pending.append(request)
+
+    if pending:
+        symbols = list(dict.fromkeys(request.symbol.upper() for request in pending))
+        try:
+            with stage("fetch"):
+                frames = await load_frames(symbols, period, interval)
+        except Exception as e:
+            provider_errors.inc(config.MARKET_DATA_PROVIDER)
+            print(f"❌ 批量下载失败: {str(e)}")
+            frames = {}
+        with stage("strategy"):
+            computed = await run_cpu(evaluate_requests, frames, pending)
+        for request, result in zip(pending, computed):
+            key = _signal_key(request)
+            if result is not None:
+                signal_cache.set(key, result, ttl=market_ttl())
+                broadcaster.publish_signal(*key, result)
+            results[key] = result
+
+    output = []
+    for request in requests:
+        result = results[_signal_key(request)]
+        if result is None:
+            error = (404, f"无法获取 {request.symbol.upper()} 的数据，请检查股票代码是否正确")
+            output.append((request, None, error))
+        else:
+            output.append((request, result, None))
+    return output
+
+
+async def load_frames(symbols, period, interval):
+    """
+    获取一组股票的数据：内存缓存里有的直接用，其余的交给 fetch_many_data
+    （离线模式只读本地缓存；在线时日线先读本地缓存，不够的一次批量下载）
+
+    返回:
+    {symbol: DataFrame}，没有数据的股票不在结果中
+    """
+    frames = {}
+    missing = []
+    for symbol in symbols:
+        data = data_cache.get((symbol, period, interval, "frame"))
+        if data is None:
+            missing.append(symbol)
+        else:
+            frames[symbol] = data
+
+    if missing:
+        loaded = await fetcher.call(fetch_many_data, missing, period, interval)
+        ttl = market_ttl()
+        for symbol, data in loaded.items():
+            data_cache.set((symbol, period, interval, "frame"), data, ttl=ttl)
+            frames[symbol] = data
+
+    return frames
+
+
+def evaluate_requests(frames, requests):
+    """
+    一次向量化计算一组请求的信号（同步，CPU 部分）
+
+    相同 (entry_period, exit_period) 的请求共用一次 evaluate_panel 算出信号，
+    通道价格用每只股票自己的K线按 channel_levels 计算（和 signal_summary 相同）
+
+    返回:
+    与 requests 顺序相同的列表，元素为 signal_summary 格式的 dict，没有数据时为 None
+    """
+    if not frames:
+        return [None] * len(requests)
+
+    symbols, _, arrays = align_frames(frames, ['High', 'Low', 'Close'])
+    row = {symbol: i for i, symbol in enumerate(symbols)}
+
+    tables = {}
+    for params in {(request.entry_period, request.exit_period) for request in requests}:
+        tables[params] = evaluate_panel(arrays['High'], arrays['Low'], arrays['Close'], *params)
+
+    results = []
+    for request in requests:
+        symbol = request.symbol.upper()
+        if symbol not in row:
+            results.append(None)
+            continue
+        table = tables[(request.entry_period, request.exit_period)]
+        values = table.iloc[row[symbol]]
+        high_channel, low_channel = channel_levels(frames[symbol], request.entry_period, request.exit_period)
+        results.append({
+            "signal": values['Signal'],
+            "current_price": float(values['Close']),
+            "high_20d": high_channel,
+            "low_10d": low_channel
+        })
+    return results
+
+
+def _signal_key(request):
+    return (request.symbol.upper(), request.period, request.interval,
+            request.entry_period, request.exit_period)
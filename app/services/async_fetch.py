@@ -0,0 +1,107 @@
+# async_fetch.py - 异步数据获取（并发限制 + 相同请求合并）
+
+import asyncio
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from app.core.config import config
+from app.services.fetch_data import fetch_data
+
+
+class AsyncFetcher:
+    """
+    fetch_data 的异步包装
+
+    - 阻塞的下载在有界线程池中执行，不占用事件循环
+    - 信号量限制同时访问数据源的请求数
+    - 相同 (symbol, period, ...) 的并发请求共享同一个下载任务（single-flight），
+      新闻发布时几十个用户同时分析同一只股票，也只下载一次
+
+    用法:
+        fetcher = AsyncFetcher()
+        data = await fetcher.fetch("AAPL", "2mo")
+    """
+
+    def __init__(self, fetch=fetch_data, max_workers=None, max_concurrency=None):
+        self._fetch = fetch
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers or config.FETCH_MAX_WORKERS,
+            thread_name_prefix="fetch"
+        )
+        self.max_concurrency = max_concurrency or config.FETCH_MAX_CONCURRENCY
+        # 信号量和进行中的任务都属于某个事件循环，按循环分开保存
+        self._semaphores = weakref.WeakKeyDictionary()
+        self._inflight = {}
+
+        # 统计：实际下载次数 / 被合并的请求数
+        self.calls = 0
+        self.coalesced = 0
+
+    async def fetch(self, symbol, period="1mo", **kwargs):
+        """
+        异步获取一只股票的数据（参数同 fetch_data）
+
+        返回:
+        DataFrame，失败时返回 None
+        """
+        loop = asyncio.get_running_loop()
+        key = (loop, symbol.upper(), period, tuple(sorted(kwargs.items())))
+
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._run(symbol, period, kwargs))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            self.coalesced += 1
+
+        # shield：某个调用方被取消时，不影响其他等待同一下载的调用方
+        return await asyncio.shield(task)
+
+    async def fetch_many(self, symbols, period="1mo", **kwargs):
+        """
+        并发获取多只股票
+
+        返回:
+        {symbol: DataFrame 或 None}
+        """
+        results = await asyncio.gather(
+            *(self.fetch(symbol, period, **kwargs) for symbol in symbols),
+            return_exceptions=True
+        )
+        return {
+            symbol: None if isinstance(result, BaseException) else result
+            for symbol, result in zip(symbols, results)
+        }
+
+    async def call(self, func, *args, **kwargs):
+        """
+        在下载线程池中运行任意阻塞的数据源调用（同样受并发数限制）
+
+        例如批量下载: await fetcher.call(provider.fetch_many, symbols, "2mo")
+        """
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = self._semaphores[loop] = asyncio.Semaphore(self.max_concurrency)
+
+        async with semaphore:
+            self.calls += 1
+            return await loop.run_in_executor(self._executor, partial(func, *args, **kwargs))
+
+    async def _run(self, symbol, period, kwargs):
+        return await self.call(self._fetch, symbol, period, **kwargs)
+
+    def shutdown(self):
+        """关闭线程池"""
+        self._executor.shutdown(wait=False)
+
+
+# 默认实例
+fetcher = AsyncFetcher()
+
+
+async def fetch_data_async(symbol, period="1mo", **kwargs):
+    """fetch_data 的异步版本（使用默认的 AsyncFetcher）"""
+    return await fetcher.fetch(symbol, period, **kwargs)
@@ -0,0 +1,312 @@
+# backtest.py - 海龟交易系统回测引擎
+
+import math
+
+import numpy as np
+import pandas as pd
+
+from app.services.strategy import rolling_max, rolling_min
+
+# 海龟系统的入场/离场周期
+SYSTEMS = {
+    1: (20, 10),  # System 1：20日突破入场，10日低点离场
+    2: (55, 20),  # System 2：55日突破入场，20日低点离场
+}
+
+TRADING_DAYS = 252
+
+TRADE_COLUMNS = [
+    'entry_date', 'exit_date', 'entry_price', 'exit_price', 'shares',
+    'units', 'pnl', 'return', 'exit_reason'
+]
+
+
+def average_true_range(high, low, close, period=20):
+    """
+    计算 N 值（海龟法则中的 ATR，Wilder 平滑）
+
+    N = (19 × 前一日N + 当日真实波幅) / 20，第一个 N 为前 period 日真实波幅的平均
+
+    参数:
+    high, low, close: 一维价格数组
+    period: 平滑周期（默认20天）
+
+    返回:
+    numpy 数组，前 period-1 个位置为 NaN
+    """
+    high = np.asarray(high, dtype=float)
+    low = np.asarray(low, dtype=float)
+    close = np.asarray(close, dtype=float)
+
+    prev_close = np.concatenate(([np.nan], close[:-1]))
+    true_range = np.fmax(high - low, np.fmax(np.abs(high - prev_close), np.abs(low - prev_close)))
+
+    atr = np.full(len(high), np.nan)
+    if len(high) < period:
+        return atr
+
+    # Wilder 平滑等价于 alpha=1/period 的指数平均，用前 period 日均值作为起点
+    seeded = np.concatenate(([true_range[:period].mean()], true_range[period:]))
+    atr[period - 1:] = pd.Series(seeded).ewm(alpha=1 / period, adjust=False).mean().to_numpy()
+    return atr
+
+
+def run_backtest(data, system=1, **kwargs):
+    """
+    对单只股票运行海龟系统回测
+
+    参数:
+    data: 股票历史数据 (DataFrame 或 CompactBars)，需要 Open / High / Low / Close 列，
+          有 Date 列时用作交易日期
+    system: 1 或 2，决定默认的入场/离场周期
+    **kwargs: 传给 backtest_arrays 的其他参数
+
+    返回:
+    dict: {"trades": 交易记录 DataFrame, "equity": 权益曲线 Series, "stats": 统计指标 dict}
+    """
+    dates = np.asarray(data['Date']) if 'Date' in data else data.index.to_numpy()
+    return backtest_arrays(
+        np.asarray(data['Open'], dtype=float),
+        np.asarray(data['High'], dtype=float),
+        np.asarray(data['Low'], dtype=float),
+        np.asarray(data['Close'], dtype=float),
+        dates=dates,
+        system=system,
+        **kwargs
+    )
+
+
+def backtest_arrays(open_, high, low, close, dates=None, system=1,
+                    entry_period=None, exit_period=None,
+                    initial_capital=100000.0, risk_per_unit=0.01,
+                    max_units=4, pyramid_step=0.5, stop_multiple=2.0,
+                    atr_period=20, skip_after_winner=None):
+    """
+    海龟系统回测（numpy 数组版本）
+
+    规则（只做多）:
+    - 入场: 盘中突破前 entry_period 日最高价，按突破价成交（跳空时按开盘价）
+    - 头寸单位: 账户权益 × risk_per_unit / N，即 1N 的波动等于账户的 1%
+    - 加仓: 价格每比上次成交价上涨 pyramid_step × N 加 1 个单位，最多 max_units 个
+    - 止损: 最后一次成交价下方 stop_multiple × N，所有单位一起止损
+    - 离场: 盘中跌破前 exit_period 日最低价
+    - System 1 过滤: 如果上一次突破（无论是否实际交易）是盈利的，跳过本次突破
+
+    注意：通道和 turtle_strategy 一样是 N 日最高 / M 日最低，但不包含当天，
+    这是原版海龟的挂单突破规则（包含当天的话，只有收在最高点的K线才会触发）。
+    头寸按权益计算（和原版期货规则一样），不限制现金，允许超过 100% 仓位。
+
+    参数:
+    open_, high, low, close: 一维价格数组
+    dates: 交易日期（可选，用于交易记录和权益曲线索引）
+    system: 1 或 2
+    entry_period / exit_period: 覆盖 system 对应的默认周期
+    initial_capital: 初始资金
+    risk_per_unit: 每个单位承担的账户风险比例
+    max_units: 最多持有单位数
+    pyramid_step: 加仓间隔（N 的倍数）
+    stop_multiple: 止损距离（N 的倍数）
+    atr_period: N 值的计算周期
+    skip_after_winner: 是否启用 System 1 过滤（默认 System 1 启用）
+
+    返回:
+    dict: {"trades": DataFrame, "equity": Series, "stats": dict}
+    """
+    if system not in SYSTEMS:
+        raise ValueError(f"system 必须是 {list(SYSTEMS)} 之一")
+
+    default_entry, default_exit = SYSTEMS[system]
+    entry_period = entry_period or default_entry
+    exit_period = exit_period or default_exit
+    if skip_after_winner is None:
+        skip_after_winner = system == 1
+
+    entry_levels, exit_levels = breakout_levels(high, low, entry_period, exit_period)
+    atr = average_true_range(high, low, close, atr_period)
+    if dates is None:
+        dates = np.arange(len(close))
+
+    # 主循环在 Python 原生列表上运行，比逐个访问 numpy 元素快得多
+    opens, highs, lows, closes = (np.asarray(a, dtype=float).tolist() for a in (open_, high, low, close))
+    entry_levels = entry_levels.tolist()
+    exit_levels = exit_levels.tolist()
+    atr = atr.tolist()
+
+    equity = np.empty(len(closes))
+    trades = []
+
+    cash = float(initial_capital)
+    fills = []  # 当前持仓的每个单位：(成交价, 股数)
+    shares = 0
+    entry_index = 0
+    unit_n = 0.0
+    stop = next_add = 0.0
+
+    # System 1 过滤用的“影子交易”（被跳过的突破）
+    last_breakout_won = False
+    shadow_entry = shadow_stop = None
+
+    for t in range(len(closes)):
+        n = atr[t]
+        entry_level = entry_levels[t]
+        exit_level = exit_levels[t]
+
+        # 跟踪被跳过的突破，判断它是否会盈利
+        if shadow_entry is not None:
+            level = max(shadow_stop, exit_level)
+            if lows[t] <= level:
+                last_breakout_won = min(opens[t], level) > shadow_entry
+                shadow_entry = None
+
+        if fills:
+            exit_price = reason = None
+            # 止损和离场通道哪个更高就先触发哪个
+            if lows[t] <= stop and stop >= exit_level:
+                exit_price, reason = min(opens[t], stop), 'stop'
+            elif lows[t] <= exit_level:
+                exit_price, reason = min(opens[t], exit_level), 'exit'
+            else:
+                # 加仓：一根K线内可能连续触发多次
+                while len(fills) < max_units and highs[t] >= next_add:
+                    price = max(opens[t], next_add)
+                    size = _unit_size(cash + shares * price, risk_per_unit, unit_n)
+                    if size <= 0:
+                        break
+                    fills.append((price, size))
+                    shares += size
+                    cash -= size * price
+                    stop = price - stop_multiple * unit_n
+                    next_add = price + pyramid_step * unit_n
+
+            if exit_price is not None:
+                trade = _close_trade(fills, exit_price, dates[entry_index], dates[t], reason)
+                trades.append(trade)
+                last_breakout_won = trade['pnl'] > 0
+                cash += shares * exit_price
+                fills, shares = [], 0
+
+        elif highs[t] > entry_level and n > 0 and shadow_entry is None:
+            price = max(opens[t], entry_level)
+            if skip_after_winner and last_breakout_won:
+                # 跳过这次突破，但继续跟踪它的结果
+                shadow_entry = price
+                shadow_stop = price - stop_multiple * n
+                last_breakout_won = False
+            else:
+                size = _unit_size(cash, risk_per_unit, n)
+                if size > 0:
+                    fills = [(price, size)]
+                    shares = size
+                    cash -= size * price
+                    unit_n = n
+                    entry_index = t
+                    stop = price - stop_multiple * n
+                    next_add = price + pyramid_step * n
+
+        equity[t] = cash + shares * closes[t]
+
+    # 回测结束时仍持仓，按最后收盘价平仓
+    if fills:
+        trades.append(_close_trade(fills, closes[-1], dates[entry_index], dates[-1], 'end'))
+
+    trades = pd.DataFrame(trades, columns=TRADE_COLUMNS)
+    equity = pd.Series(equity, index=dates, name='equity')
+
+    return {
+        "trades": trades,
+        "equity": equity,
+        "stats": summarize(equity, trades, initial_capital)
+    }
+
+
+def breakout_levels(high, low, entry_period, exit_period):
+    """
+    海龟挂单价格：前 entry_period 日最高价（入场）和前 exit_period 日最低价（离场）
+
+    返回:
+    (entry_levels, exit_levels)，数据不足的位置分别为 +inf / -inf（不会触发）
+    """
+    high = np.asarray(high, dtype=float)
+    low = np.asarray(low, dtype=float)
+
+    entry_levels = np.full(len(high), np.inf)
+    exit_levels = np.full(len(low), -np.inf)
+    if len(high) > entry_period:
+        entry_levels[entry_period:] = rolling_max(high, entry_period)[entry_period - 1:-1]
+    if len(low) > exit_period:
+        exit_levels[exit_period:] = rolling_min(low, exit_period)[exit_period - 1:-1]
+    return entry_levels, exit_levels
+
+
+def _unit_size(account, risk_per_unit, n):
+    """一个头寸单位的股数"""
+    if n <= 0 or account <= 0:
+        return 0
+    return int(math.floor(account * risk_per_unit / n))
+
+
+def _close_trade(fills, exit_price, entry_date, exit_date, reason):
+    """把一组加仓记录合并成一笔交易"""
+    shares = sum(size for _, size in fills)
+    cost = sum(price * size for price, size in fills)
+    pnl = exit_price * shares - cost
+    return {
+        'entry_date': entry_date,
+        'exit_date': exit_date,
+        'entry_price': cost / shares,
+        'exit_price': exit_price,
+        'shares': shares,
+        'units': len(fills),
+        'pnl': pnl,
+        'return': pnl / cost,
+        'exit_reason': reason
+    }
+
+
+def summarize(equity, trades, initial_capital):
+    """
+    计算回测统计指标
+
+    参数:
+    equity: 权益曲线
+    trades: 交易记录
+    initial_capital: 初始资金
+
+    返回:
+    dict
+    """
+    values = equity.to_numpy(dtype=float)
+    if len(values) == 0:
+        return {}
+
+    final = float(values[-1])
+    years = len(values) / TRADING_DAYS
+    running_max = np.maximum.accumulate(np.concatenate(([initial_capital], values)))[1:]
+    drawdown = values / running_max - 1
+
+    daily = np.diff(values, prepend=initial_capital) / np.concatenate(([initial_capital], values[:-1]))
+    std = daily.std()
+
+    pnl = trades['pnl'].to_numpy(dtype=float)
+    wins, losses = pnl[pnl > 0], pnl[pnl <= 0]
+
+    return {
+        "initial_capital": float(initial_capital),
+        "final_equity": final,
+        "total_return": final / initial_capital - 1,
+        "cagr": (final / initial_capital) ** (1 / years) - 1 if final > 0 else -1.0,
+        "max_drawdown": float(drawdown.min()),
+        "sharpe": float(daily.mean() / std * math.sqrt(TRADING_DAYS)) if std > 0 else 0.0,
+        "trades": int(len(pnl)),
+        "win_rate": float(len(wins) / len(pnl)) if len(pnl) else 0.0,
+        "avg_win": float(wins.mean()) if len(wins) else 0.0,
+        "avg_loss": float(losses.mean()) if len(losses) else 0.0,
+        "profit_factor": _profit_factor(wins, losses)
+    }
+
+
+def _profit_factor(wins, losses):
+    """盈利总额 / 亏损总额"""
+    if losses.sum() < 0:
+        return float(wins.sum() / -losses.sum())
+    return float('inf') if len(wins) else 0.0
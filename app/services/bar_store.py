@@ -0,0 +1,247 @@
+# bar_store.py - 列式K线存储（numpy.memmap + 追加写）
+
+import json
+import os
+import threading
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from app.core.config import config
+
+# 每一列固定的数据类型，文件就是这一列的原始字节
+COLUMN_DTYPES = {
+    'Open': np.float64,
+    'High': np.float64,
+    'Low': np.float64,
+    'Close': np.float64,
+    'Volume': np.float64,
+}
+
+META_FILE = "meta.json"
+
+
+def date_unit(interval):
+    """日线及以上按天存储，分钟线按秒存储"""
+    return "D" if interval.endswith(("d", "wk", "mo")) else "s"
+
+
+class BarStore:
+    """
+    每只股票一个目录，每一列一个定长二进制文件：
+
+        {root}/{SYMBOL}_{interval}/Date.bin   datetime64
+                                   Open.bin   float64
+                                   ...
+                                   meta.json  {"length": 已提交的K线数, "unit": "D"}
+
+    写入只在文件末尾追加，写完所有列后再原子替换 meta.json 提交新的长度；
+    覆盖最后一根K线时先把提交的长度减一、改写完再恢复。
+    读取方只映射已提交的部分，所以写到一半（或进程崩溃）时读到的永远是完整的数据。
+    读取返回 np.memmap 视图，不复制数据，多个 worker 进程共享操作系统的页缓存。
+
+    同一只股票同一时间只应有一个写入进程（进程内的写入有锁保护）。
+
+    用法:
+        store = BarStore()
+        store.append("AAPL", data)
+        bars = store.read("AAPL")
+        turtle_strategy(bars)
+    """
+
+    def __init__(self, root=None):
+        self.root = Path(root or config.BAR_STORE_DIR)
+        self._lock = threading.Lock()
+
+    def path(self, symbol, interval="1d"):
+        """股票的存储目录"""
+        return self.root / f"{symbol.upper()}_{interval}"
+
+    def meta(self, symbol, interval="1d"):
+        """读取元数据，不存在时返回 None"""
+        meta_path = self.path(symbol, interval) / META_FILE
+        if not meta_path.exists():
+            return None
+        with open(meta_path) as f:
+            return json.load(f)
+
+    def symbols(self, interval="1d"):
+        """已存储的股票代码"""
+        suffix = f"_{interval}"
+        if not self.root.exists():
+            return []
+        return sorted(
+            entry.name[:-len(suffix)] for entry in self.root.iterdir()
+            if entry.name.endswith(suffix) and (entry / META_FILE).exists()
+        )
+
+    def length(self, symbol, interval="1d"):
+        """已提交的K线数量"""
+        meta = self.meta(symbol, interval)
+        return 0 if meta is None else meta["length"]
+
+    def read(self, symbol, interval="1d", start=None, tail=None):
+        """
+        读取一只股票（零拷贝）
+
+        参数:
+        symbol: 股票代码
+        interval: 数据间隔
+        start: 只返回该日期之后（含）的K线
+        tail: 只返回最后 tail 根K线
+
+        返回:
+        {列名: 只读 memmap 视图}，包含 Date 和 Open/High/Low/Close/Volume；
+        没有数据时返回 None
+        """
+        meta = self.meta(symbol, interval)
+        if meta is None or meta["length"] == 0:
+            return None
+
+        directory = self.path(symbol, interval)
+        length = meta["length"]
+        dtypes = {'Date': np.dtype(f"datetime64[{meta['unit']}]"), **COLUMN_DTYPES}
+        bars = {
+            column: np.memmap(directory / f"{column}.bin", dtype=dtype, mode='r', shape=(length,))
+            for column, dtype in dtypes.items()
+        }
+
+        begin = 0
+        if start is not None:
+            begin = int(np.searchsorted(bars['Date'], np.datetime64(pd.Timestamp(start), meta['unit'])))
+        if tail is not None:
+            begin = max(begin, length - tail)
+        if begin:
+            bars = {column: values[begin:] for column, values in bars.items()}
+
+        return bars
+
+    def read_frame(self, symbol, interval="1d", start=None, tail=None):
+        """读取为 fetch_data 格式的 DataFrame（会复制数据，只在需要 pandas 时使用）"""
+        bars = self.read(symbol, interval, start=start, tail=tail)
+        if bars is None:
+            return None
+
+        dates = pd.DatetimeIndex(np.asarray(bars['Date']))
+        data = pd.DataFrame({column: np.array(values) for column, values in bars.items() if column != 'Date'})
+        data.insert(0, 'Date', dates.date if date_unit(interval) == "D" else dates)
+        return data
+
+    def append(self, symbol, data, interval="1d"):
+        """
+        追加K线
+
+        早于已有最后一根的K线会被忽略；与最后一根日期相同的K线覆盖它
+        （盘中未收盘的K线会被更新），其余的追加到末尾。
+
+        参数:
+        symbol: 股票代码
+        data: fetch_data 格式的 DataFrame（或包含相同列的 dict）
+        interval: 数据间隔
+
+        返回:
+        新增的K线数量
+        """
+        unit = date_unit(interval)
+        dates = _to_datetime64(data['Date'], unit)
+        columns = {column: np.asarray(data[column], dtype=dtype) for column, dtype in COLUMN_DTYPES.items()}
+        order = np.argsort(dates, kind='stable')
+
+        directory = self.path(symbol, interval)
+        with self._lock:
+            directory.mkdir(parents=True, exist_ok=True)
+            meta = self.meta(symbol, interval) or {"length": 0, "unit": unit}
+            if meta["unit"] != unit:
+                raise ValueError(f"{symbol} 的存储单位为 {meta['unit']}，与 {interval} 不一致")
+            length = meta["length"]
+
+            # 丢掉上次写入崩溃时残留的未提交数据（所有列都是 8 字节）
+            for column in ['Date', *COLUMN_DTYPES]:
+                file_path = directory / f"{column}.bin"
+                if file_path.exists() and file_path.stat().st_size > length * 8:
+                    os.truncate(file_path, length * 8)
+
+            dates = dates[order]
+            columns = {column: values[order] for column, values in columns.items()}
+
+            if length:
+                last = np.memmap(directory / "Date.bin", dtype=f"datetime64[{unit}]", mode='r', shape=(length,))[-1]
+
+                # 同一根K线：覆盖最后一行。先提交 length - 1 把这一行藏起来，改写完再提交 length，
+                # 改写期间读取方拿到的长度不包含这一行，不会读到改了一半的K线
+                same = dates == last
+                if same.any():
+                    row = np.flatnonzero(same)[-1]
+                    _write_meta(directory, {"length": length - 1, "unit": unit})
+                    for column, values in columns.items():
+                        _write_row(directory / f"{column}.bin", length - 1, values[row])
+                    _write_meta(directory, {"length": length, "unit": unit})
+
+                newer = dates > last
+                dates = dates[newer]
+                columns = {column: values[newer] for column, values in columns.items()}
+
+            # 去掉同一批数据里重复的日期（保留最后一个）
+            if len(dates):
+                keep = np.append(dates[1:] != dates[:-1], True)
+                dates = dates[keep]
+                columns = {column: values[keep] for column, values in columns.items()}
+
+            if len(dates) == 0:
+                return 0
+
+            # 先追加所有列，再提交长度
+            _append_column(directory / "Date.bin", dates.astype(f"datetime64[{unit}]"))
+            for column, values in columns.items():
+                _append_column(directory / f"{column}.bin", values)
+
+            _write_meta(directory, {"length": length + len(dates), "unit": unit})
+            return len(dates)
+
+    def delete(self, symbol, interval="1d"):
+        """删除一只股票的存储"""
+        directory = self.path(symbol, interval)
+        if not directory.exists():
+            return
+        with self._lock:
+            for entry in directory.iterdir():
+                entry.unlink()
+            directory.rmdir()
+
+
+def _to_datetime64(values, unit):
+    """Date 列转换为 datetime64（分钟线保留交易所当地时间，去掉时区信息）"""
+    index = pd.DatetimeIndex(pd.to_datetime(values))
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    return index.to_numpy().astype(f"datetime64[{unit}]")
+
+
+def _append_column(file_path, values):
+    with open(file_path, 'ab') as f:
+        f.write(np.ascontiguousarray(values).tobytes())
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def _write_row(file_path, index, value):
+    """改写一列中的一个值（所有列都是 8 字节）"""
+    with open(file_path, 'r+b') as f:
+        f.seek(index * 8)
+        f.write(np.asarray(value).tobytes())
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def _write_meta(directory, meta):
+    temp = directory / f"{META_FILE}.tmp"
+    with open(temp, 'w') as f:
+        json.dump(meta, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp, directory / META_FILE)
+
+
+# 默认实例
+bar_store = BarStore()
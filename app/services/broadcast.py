@@ -0,0 +1,214 @@
+# broadcast.py - 信号推送（一个生产者，多个 SSE / WebSocket 订阅者）
+
+import asyncio
+import json
+import threading
+from collections import OrderedDict, defaultdict
+from datetime import datetime
+
+from app.core.config import config
+
+# 订阅全部股票
+ALL = "*"
+
+# 关闭订阅时放进队列的标记
+_CLOSED = object()
+
+
+class Subscription:
+    """
+    一个客户端连接的订阅
+
+    每个订阅有自己的有界队列，慢客户端队列满时丢弃最旧的消息，
+    不会拖慢生产者和其他客户端。
+    """
+
+    def __init__(self, symbols, loop, queue_size):
+        self.symbols = set(symbols) if symbols else {ALL}
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.dropped = 0
+        self.closed = False
+
+    def _put(self, message):
+        """只在订阅者自己的事件循环中调用"""
+        if self.closed:
+            return
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(message)
+
+    async def get(self):
+        """等待下一条消息（JSON 字符串），订阅关闭后返回 None"""
+        message = await self.queue.get()
+        return None if message is _CLOSED else message
+
+    def close(self):
+        """关闭订阅，正在等待的 get() 返回 None"""
+        if self.closed:
+            return
+        self.closed = True
+        try:
+            self.loop.call_soon_threadsafe(self._put_closed)
+        except RuntimeError:
+            pass  # 事件循环已经关闭，没有人在等待
+
+    def _put_closed(self):
+        if self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(_CLOSED)
+
+
+class SignalBroadcaster:
+    """
+    信号广播
+
+    分析流程算出新结果后调用 publish_signal()：只有信号或通道价格变化时才推送，
+    消息只序列化一次，然后把同一个字符串放进每个订阅者的队列，
+    所以连接数再多也不会重复计算。
+
+    订阅者可能在不同的事件循环（或线程）里，投递时用 call_soon_threadsafe。
+
+    用法:
+        subscription = broadcaster.subscribe(["AAPL"])
+        message = await subscription.get()
+        broadcaster.unsubscribe(subscription)
+    """
+
+    def __init__(self, queue_size=None, max_keys=None):
+        self.queue_size = queue_size or config.STREAM_QUEUE_SIZE
+        self.max_keys = max_keys or config.STREAM_MAX_KEYS
+        self._subscribers = defaultdict(set)  # symbol -> {Subscription}
+        # 以下两张表最多 max_keys 项，超出时淘汰最久没更新的
+        # （被淘汰的参数组合下次分析时当作新信号推送）
+        self._latest = OrderedDict()  # symbol -> 最近一条消息
+        self._state = OrderedDict()  # (symbol, period, interval, entry, exit) -> (signal, entry, exit)
+        self._lock = threading.Lock()
+        self.published = 0
+
+    def subscribe(self, symbols=None):
+        """
+        订阅（必须在事件循环中调用）
+
+        参数:
+        symbols: 股票代码列表，None 或空表示订阅全部
+
+        返回:
+        Subscription，队列里先放入这些股票最近的一条消息
+        """
+        symbols = [symbol.upper() for symbol in symbols or []]
+        subscription = Subscription(symbols, asyncio.get_running_loop(), self.queue_size)
+
+        with self._lock:
+            for symbol in subscription.symbols:
+                self._subscribers[symbol].add(subscription)
+            if ALL in subscription.symbols:
+                snapshot = list(self._latest.values())
+            else:
+                snapshot = [self._latest[symbol] for symbol in subscription.symbols if symbol in self._latest]
+
+        for message in snapshot:
+            subscription._put(message)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        """取消订阅"""
+        with self._lock:
+            for symbol in subscription.symbols:
+                self._subscribers[symbol].discard(subscription)
+                if not self._subscribers[symbol]:
+                    del self._subscribers[symbol]
+        subscription.close()
+
+    @property
+    def connections(self):
+        """当前的订阅数"""
+        with self._lock:
+            return len(set().union(*self._subscribers.values())) if self._subscribers else 0
+
+    def publish_signal(self, symbol, period, interval, entry_period, exit_period, result):
+        """
+        发布一次分析结果（信号和通道都没变化时不推送）
+
+        参数:
+        symbol: 股票代码
+        period, interval, entry_period, exit_period: 分析参数
+        result: analysis.signal_summary 格式的 dict
+
+        返回:
+        是否推送
+        """
+        symbol = symbol.upper()
+        key = (symbol, period, interval, entry_period, exit_period)
+        state = (result["signal"], result["high_20d"], result["low_10d"])
+
+        with self._lock:
+            previous = self._state.get(key)
+            if previous == state:
+                return False
+            self._remember(self._state, key, state)
+
+        message = json.dumps({
+            "type": "signal",
+            "symbol": symbol,
+            "signal": result["signal"],
+            "previous_signal": previous[0] if previous else None,
+            "current_price": result["current_price"],
+            "entry_channel": result["high_20d"],
+            "exit_channel": result["low_10d"],
+            "period": period,
+            "interval": interval,
+            "entry_period": entry_period,
+            "exit_period": exit_period,
+            "timestamp": datetime.now().isoformat()
+        })
+        self.publish(symbol, message)
+        return True
+
+    def publish(self, symbol, message):
+        """把一条已经序列化好的消息发给订阅了该股票（或全部）的连接"""
+        with self._lock:
+            self._remember(self._latest, symbol, message)
+            targets = self._subscribers.get(symbol, set()) | self._subscribers.get(ALL, set())
+            self.published += 1
+
+        for subscription in targets:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription._put, message)
+            except RuntimeError:
+                # 订阅者的事件循环已经关闭（连接异常断开），直接移除
+                self.unsubscribe(subscription)
+
+    def _remember(self, table, key, value):
+        """写入有上限的表（调用方持有锁）"""
+        table[key] = value
+        table.move_to_end(key)
+        while len(table) > self.max_keys:
+            table.popitem(last=False)
+
+
+async def sse_events(subscription, heartbeat=None):
+    """
+    把订阅转换成 Server-Sent Events 文本流
+
+    一段时间没有消息时发送注释行作为心跳，防止代理断开空闲连接
+
+    参数:
+    subscription: broadcaster.subscribe() 的返回值
+    heartbeat: 心跳间隔（秒，默认 Config.STREAM_HEARTBEAT）
+    """
+    heartbeat = heartbeat or config.STREAM_HEARTBEAT
+    while True:
+        try:
+            message = await asyncio.wait_for(subscription.get(), timeout=heartbeat)
+        except asyncio.TimeoutError:
+            yield ": ping\n\n"
+            continue
+        if message is None:
+            return
+        yield f"event: signal\ndata: {message}\n\n"
+
+
+# 全局实例
+broadcaster = SignalBroadcaster()
@@ -0,0 +1,142 @@
+# channel.py - 增量（流式）唐奇安通道
+
+from collections import deque
+
+from app.services.strategy import SIGNAL_LABELS, BUY, SELL, HOLD
+
+
+class DonchianChannel:
+    """
+    流式唐奇安通道 - 每来一根K线更新一次
+
+    用单调队列维护 N 日最高价和 M 日最低价，每根K线摊还 O(1)，
+    不需要保存整个窗口，也不需要重新扫描。
+    信号规则和 turtle_strategy 完全一致。
+
+    用法:
+        channel = DonchianChannel(entry_period=20, exit_period=10)
+        for bar in bars:
+            signal = channel.update(bar['High'], bar['Low'], bar['Close'])
+    """
+
+    def __init__(self, entry_period=20, exit_period=10):
+        if entry_period < 1 or exit_period < 1:
+            raise ValueError("entry_period 和 exit_period 必须大于 0")
+
+        self.entry_period = entry_period
+        self.exit_period = exit_period
+
+        # 已处理的K线数量（同时作为K线序号）
+        self.bars = 0
+
+        # 单调队列，元素为 (序号, 价格)
+        # _highs 中价格单调递减，队首就是窗口最大值
+        # _lows 中价格单调递增，队首就是窗口最小值
+        self._highs = deque()
+        self._lows = deque()
+
+        self.last_close = None
+        self.last_signal = "HOLD"
+
+    def update(self, high, low, close):
+        """
+        推入一根新K线，返回最新信号
+
+        参数:
+        high, low, close: 这根K线的最高价、最低价、收盘价
+
+        返回:
+        "BUY" / "SELL" / "HOLD"
+        """
+        index = self.bars
+        high = float(high)
+        low = float(low)
+
+        # 弹出所有不可能再成为最大值的元素
+        while self._highs and self._highs[-1][1] <= high:
+            self._highs.pop()
+        self._highs.append((index, high))
+
+        while self._lows and self._lows[-1][1] >= low:
+            self._lows.pop()
+        self._lows.append((index, low))
+
+        # 移除已经滑出窗口的元素
+        while self._highs[0][0] <= index - self.entry_period:
+            self._highs.popleft()
+        while self._lows[0][0] <= index - self.exit_period:
+            self._lows.popleft()
+
+        self.bars += 1
+        self.last_close = float(close)
+        self.last_signal = SIGNAL_LABELS[self._signal_code()]
+        return self.last_signal
+
+    def _signal_code(self):
+        if not self.ready:
+            return HOLD
+        if self.last_close >= self.entry_channel:
+            return BUY
+        if self.last_close <= self.exit_channel:
+            return SELL
+        return HOLD
+
+    @property
+    def ready(self):
+        """数据是否足够（至少 entry_period 根K线）"""
+        return self.bars >= self.entry_period
+
+    @property
+    def entry_channel(self):
+        """入场通道（N日最高价），数据不足时为 None"""
+        return self._highs[0][1] if self.ready else None
+
+    @property
+    def exit_channel(self):
+        """离场通道（M日最低价），数据不足时为 None"""
+        return self._lows[0][1] if self.ready else None
+
+    def snapshot(self):
+        """
+        导出当前状态（可以直接 json.dumps）
+
+        返回:
+        dict，可以传给 DonchianChannel.restore 恢复
+        """
+        return {
+            "entry_period": self.entry_period,
+            "exit_period": self.exit_period,
+            "bars": self.bars,
+            "highs": [list(item) for item in self._highs],
+            "lows": [list(item) for item in self._lows],
+            "last_close": self.last_close,
+            "last_signal": self.last_signal
+        }
+
+    @classmethod
+    def restore(cls, state):
+        """从 snapshot() 导出的状态恢复通道"""
+        channel = cls(state["entry_period"], state["exit_period"])
+        channel.bars = state["bars"]
+        channel._highs = deque((int(i), float(p)) for i, p in state["highs"])
+        channel._lows = deque((int(i), float(p)) for i, p in state["lows"])
+        channel.last_close = state["last_close"]
+        channel.last_signal = state["last_signal"]
+        return channel
+
+    @classmethod
+    def from_data(cls, data, entry_period=20, exit_period=10):
+        """
+        用历史数据预热通道
+
+        参数:
+        data: 股票历史数据 (DataFrame)，需要 High / Low / Close 列
+        """
+        channel = cls(entry_period, exit_period)
+        for high, low, close in zip(data['High'], data['Low'], data['Close']):
+            channel.update(high, low, close)
+        return channel
+
+    def __repr__(self):
+        return (f"<DonchianChannel(entry={self.entry_period}, exit={self.exit_period}, "
+                f"bars={self.bars}, signal='{self.last_signal}')>")
@@ -0,0 +1,107 @@
+# compact.py - 紧凑的K线容器（结构数组 + 降精度）
+
+import numpy as np
+import pandas as pd
+
+# 1970-01-01 起的天数
+EPOCH = np.datetime64('1970-01-01', 'D')
+
+PRICE_DTYPE = np.float32
+
+
+class CompactBars:
+    """
+    按列存储的K线数据（struct-of-arrays）
+
+    - 价格: float32（7 位有效数字，对股价足够）
+    - 成交量: 放得下时用 uint32，否则 int64
+    - 日期: int32 天数（1970-01-01 起），比 object 类型的 datetime.date 列小一个数量级，
+      比较和查找都是整数运算
+
+    支持 data['Close'] 取列（返回 numpy 数组），所以可以直接传给
+    turtle_strategy / turtle_signals / run_backtest 等函数。
+
+    用法:
+        bars = CompactBars.from_frame(data)
+        turtle_strategy(bars)
+        bars.to_frame()  # 需要 pandas 时再转回
+    """
+
+    __slots__ = ('day', 'open', 'high', 'low', 'close', 'volume')
+
+    _COLUMNS = {'Open': 'open', 'High': 'high', 'Low': 'low', 'Close': 'close', 'Volume': 'volume'}
+
+    def __init__(self, day, open_, high, low, close, volume):
+        self.day = np.asarray(day, dtype=np.int32)
+        self.open = np.asarray(open_, dtype=PRICE_DTYPE)
+        self.high = np.asarray(high, dtype=PRICE_DTYPE)
+        self.low = np.asarray(low, dtype=PRICE_DTYPE)
+        self.close = np.asarray(close, dtype=PRICE_DTYPE)
+        self.volume = np.asarray(volume, dtype=volume_dtype(volume))
+
+    @classmethod
+    def from_frame(cls, data):
+        """
+        从 fetch_data 格式的 DataFrame 创建
+
+        参数:
+        data: 包含 Date / Open / High / Low / Close / Volume 列的 DataFrame
+        """
+        dates = np.asarray(pd.to_datetime(data['Date']).to_numpy(), dtype='datetime64[D]')
+        return cls(
+            (dates - EPOCH).astype(np.int32),
+            data['Open'], data['High'], data['Low'], data['Close'],
+            data['Volume'].to_numpy()
+        )
+
+    def to_frame(self):
+        """转回 fetch_data 格式的 DataFrame"""
+        data = pd.DataFrame({'Date': pd.DatetimeIndex(self.dates).date})
+        for column, attr in self._COLUMNS.items():
+            data[column] = getattr(self, attr)
+        return data
+
+    @property
+    def dates(self):
+        """日期（datetime64[D] 数组）"""
+        return EPOCH + self.day.astype('timedelta64[D]')
+
+    @property
+    def nbytes(self):
+        """占用的内存（字节）"""
+        return sum(getattr(self, attr).nbytes for attr in self.__slots__)
+
+    def __getitem__(self, column):
+        if column == 'Date':
+            return self.dates
+        if column not in self._COLUMNS:
+            raise KeyError(column)
+        return getattr(self, self._COLUMNS[column])
+
+    def __contains__(self, column):
+        return column == 'Date' or column in self._COLUMNS
+
+    def __len__(self):
+        return len(self.day)
+
+    def tail(self, n):
+        """最后 n 根K线（视图，不复制）"""
+        start = max(len(self) - n, 0)
+        return CompactBars(*(getattr(self, attr)[start:] for attr in self.__slots__))
+
+    def __repr__(self):
+        if len(self) == 0:
+            return "CompactBars(0 bars)"
+        return f"CompactBars({len(self)} bars, {self.dates[0]} ~ {self.dates[-1]})"
+
+
+def volume_dtype(volume):
+    """成交量的存储类型：非负且不超过 uint32 上限时用 uint32"""
+    volume = np.asarray(volume)
+    if volume.size == 0:
+        return np.uint32
+    if volume.dtype.kind == 'f' and np.isnan(volume).any():
+        return np.float64
+    if volume.min() >= 0 and volume.max() <= np.iinfo(np.uint32).max:
+        return np.uint32
+    return np.int64
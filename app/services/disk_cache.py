@@ -0,0 +1,185 @@
+# disk_cache.py - 行情数据本地缓存（每只股票一个 NPZ 文件）
+
+import os
+import re
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from app.core.config import config
+
+PRICE_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+# “max” 周期的起始日期：早于任何上市日期
+EARLIEST = date(1900, 1, 1)
+
+_PERIOD_PATTERN = re.compile(r"^(\d+)(d|wk|mo|y)$")
+
+# 合法的股票代码（字母、数字和 . - ^ =，例如 BRK.B、^GSPC、EURUSD=X），
+# 不允许路径分隔符和 ".."，缓存文件不会写到缓存目录之外
+_SYMBOL_PATTERN = re.compile(r"^[A-Z0-9.\-^=]+$")
+_INTERVAL_PATTERN = re.compile(r"^[0-9a-z]+$")
+
+
+def period_start(period, today=None):
+    """
+    把 yfinance 的 period 字符串换算成起始日期
+
+    参数:
+    period: "1d", "5d", "1mo", "3mo", "6mo", "1y", "2y", "5y", "10y", "ytd", "max" 等
+    today: 基准日期（默认今天）
+
+    返回:
+    date
+    """
+    today = today or date.today()
+
+    if period == "max":
+        return EARLIEST
+    if period == "ytd":
+        return date(today.year, 1, 1)
+
+    match = _PERIOD_PATTERN.match(period)
+    if not match:
+        raise ValueError(f"无法识别的数据周期: {period}")
+
+    count, unit = int(match.group(1)), match.group(2)
+    if unit == "d":
+        # "5d" 指 5 个交易日，多往前取一些自然日来覆盖周末和假期
+        return today - timedelta(days=count * 2 + 4)
+    if unit == "wk":
+        return today - timedelta(weeks=count)
+    if unit == "mo":
+        return (pd.Timestamp(today) - pd.DateOffset(months=count)).date()
+    return (pd.Timestamp(today) - pd.DateOffset(years=count)).date()
+
+
+def cache_path(symbol, interval="1d", directory=None):
+    """
+    缓存文件路径（默认目录为 Config.CACHE_DIR）
+
+    股票代码或周期不合法（例如包含 "/" 或 ".."）时抛出 ValueError
+    """
+    symbol = symbol.upper()
+    if not _SYMBOL_PATTERN.match(symbol) or ".." in symbol:
+        raise ValueError(f"不合法的股票代码: {symbol!r}")
+    if not _INTERVAL_PATTERN.match(interval):
+        raise ValueError(f"不合法的数据周期: {interval!r}")
+    return Path(directory or config.CACHE_DIR) / f"{symbol}_{interval}.npz"
+
+
+def load_bars(symbol, interval="1d", directory=None):
+    """
+    读取缓存
+
+    返回:
+    (data, meta)，data 格式与 fetch_data 相同；没有缓存时返回 (None, None)
+    meta: {"fetched_at": 上次下载的时间戳, "covered_from": 缓存覆盖的起始日期}
+    """
+    path = cache_path(symbol, interval, directory)
+    if not path.exists():
+        return None, None
+
+    with np.load(path) as archive:
+        data = pd.DataFrame({
+            'Date': pd.to_datetime(archive['Date']).date,
+            **{column: archive[column] for column in PRICE_COLUMNS}
+        })
+        meta = {
+            "fetched_at": float(archive['fetched_at']),
+            "covered_from": archive['covered_from'].astype("datetime64[D]").item()
+        }
+
+    return data, meta
+
+
+def save_bars(symbol, data, covered_from, interval="1d", fetched_at=None, directory=None):
+    """
+    写入缓存（先写临时文件再替换，读取方不会看到写了一半的文件）
+
+    每次写入用独立的临时文件，多个线程同时写同一只股票也不会互相覆盖，
+    最后一个完成替换的写入生效。写入失败只打印警告（缓存写不进去不影响本次请求）。
+
+    参数:
+    symbol: 股票代码
+    data: 股票数据（fetch_data 的格式）
+    covered_from: 缓存覆盖的起始日期（请求过的最早日期，不一定有数据）
+    interval: 数据间隔
+    fetched_at: 下载时间戳（默认现在）
+    directory: 缓存目录（默认 Config.CACHE_DIR）
+
+    返回:
+    是否写入成功
+    """
+    path = cache_path(symbol, interval, directory)
+    temp = None
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, temp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.stem}.", suffix=".npz")
+        with os.fdopen(fd, "wb") as file:
+            np.savez(
+                file,
+                Date=np.asarray(data['Date'], dtype='datetime64[D]'),
+                fetched_at=np.float64(fetched_at or time.time()),
+                covered_from=np.datetime64(covered_from, 'D'),
+                **{column: data[column].to_numpy() for column in PRICE_COLUMNS}
+            )
+        os.replace(temp, path)
+        return True
+    except Exception as e:
+        print(f"⚠️  写入 {path.name} 缓存失败: {str(e)}")
+        if temp is not None:
+            try:
+                os.remove(temp)
+            except OSError:
+                pass
+        return False
+
+
+def merge_bars(old, new):
+    """合并两段数据，日期重复时以新数据为准"""
+    if old is None or old.empty:
+        return new.reset_index(drop=True)
+    if new is None or new.empty:
+        return old.reset_index(drop=True)
+
+    merged = pd.concat([old, new], ignore_index=True)
+    merged = merged.drop_duplicates('Date', keep='last')
+    return merged.sort_values('Date').reset_index(drop=True)
+
+
+def is_fresh(meta, max_age=None):
+    """缓存是否在有效期内（有效期内不再联网补数据）"""
+    max_age = config.CACHE_MAX_AGE if max_age is None else max_age
+    return meta is not None and time.time() - meta["fetched_at"] < max_age
+
+
+def trading_days(period):
+    """"Nd" 周期的交易日数量 N，其他周期返回 None"""
+    match = _PERIOD_PATTERN.match(period)
+    if match and match.group(2) == "d":
+        return int(match.group(1))
+    return None
+
+
+def slice_period(data, period, start):
+    """
+    从缓存中取出 period 对应的数据
+
+    参数:
+    data: 缓存数据
+    period: 数据周期
+    start: period_start(period) 的结果
+    """
+    data = data[data['Date'] >= start]
+
+    # 按天的周期是交易日数量，只保留最后 N 根K线
+    count = trading_days(period)
+    if count:
+        data = data.tail(count)
+
+    return data.reset_index(drop=True)
@@ -1,59 +1,280 @@
 import yfinance as yf
 import pandas as pd
 from datetime import datetime, timedelta
+from functools import partial
 
+from app.core.config import config
+from app.services.disk_cache import (
+    period_start, load_bars, save_bars, merge_bars, is_fresh, slice_period, trading_days
+)
+from app.services.compact import CompactBars
+from app.services.memory_cache import data_cache, market_ttl
+from app.services.metrics import provider_errors
+from app.services.providers import get_provider, panel_to_frames
+from app.services.resample import base_interval, is_intraday, resample_bars
 
-def fetch_data(symbol, period="1mo"):
+
+def fetch_data(symbol, period="1mo", use_cache=True, offline=None, compact=False, interval="1d"):
     """
     获取股票的历史价格数据
 
+    先查内存缓存，再读本地缓存（data/cache），缓存不够新或不够长时，
+    只下载缺少的日期并追加到缓存
+
     参数:
     symbol (str): 股票代码，例如 "AAPL", "TSLA", "MSFT"
     period (str): 数据时间范围，默认为 "1mo" (1个月)
                  可选: "1d", "5d", "1mo", "3mo", "6mo", "1y", "2y", "5y", "10y", "ytd", "max"
+    use_cache (bool): 是否使用本地缓存，默认 True
+    offline (bool): 离线模式，只读缓存、不联网（默认读取 Config.OFFLINE）
+    compact (bool): 返回 CompactBars（float32 价格、int32 日期），默认 False（只支持日线及以上）
+    interval (str): K线周期，默认 "1d"
+                 可选: "1m", "2m", "5m", "15m", "30m", "60m", "90m", "1h", "1d", "5d", "1wk", "1mo", "3mo"
+                 分钟线只下载一份基础数据（例如 1m），其他周期由它合成并缓存
 
     返回:
-    pandas.DataFrame: 包含股票历史数据的DataFrame，如果失败则返回None
+    pandas.DataFrame: 包含股票历史数据的DataFrame；compact=True 时返回 CompactBars；
+    如果失败则返回None
+    （来自内存缓存的数据是共享的，不要直接修改）
     """
+    offline = config.OFFLINE if offline is None else offline
 
-    try:
-        # 步骤1: 创建股票对象
-        # yf.Ticker() 创建一个股票对象，用于获取该股票的各种数据
-        stock = yf.Ticker(symbol)
-
-        # 步骤2: 获取历史数据
-        # history() 方法获取历史价格数据
-        # period参数指定时间范围，interval可以指定数据间隔（默认1天）
-        data = stock.history(period=period)
-
-        # 步骤3: 检查数据是否为空
-        if data.empty:
-            print(f"警告: 无法获取股票 {symbol} 的数据，请检查股票代码是否正确")
+    if interval != "1d":
+        if compact and is_intraday(interval):
+            raise ValueError("compact 模式只支持日线及以上周期")
+        data = _fetch_resampled(symbol, period, interval, use_cache, offline)
+        return CompactBars.from_frame(data) if compact and data is not None else data
+
+    if not use_cache:
+        if offline:
+            print(f"❌ 离线模式下必须使用缓存: {symbol}")
+            return None
+        data = _download(symbol, period=period)
+        return CompactBars.from_frame(data) if compact and data is not None else data
+
+    # 先查内存缓存（同一个进程内的重复请求不再读磁盘、不再清理数据）
+    # 紧凑格式单独缓存，占用的内存只有 DataFrame 的几分之一
+    key = (symbol.upper(), period, "1d", "compact" if compact else "frame")
+    data = data_cache.get(key)
+    if data is None:
+        data = _fetch_with_disk_cache(symbol, period, offline)
+        if data is not None:
+            if compact:
+                data = CompactBars.from_frame(data)
+            data_cache.set(key, data, ttl=market_ttl())
+    return data
+
+
+def fetch_many_data(symbols, period="1mo", interval="1d", offline=None):
+    """
+    批量获取多只股票的数据（/analyze/batch 使用），和 fetch_data 共用内存缓存和本地缓存，
+    周期的处理方式也和 fetch_data 相同
+
+    - 离线模式: 每只股票都按 fetch_data(offline=True) 只读缓存，不联网
+    - 日线: 本地缓存够新、够长的股票直接读缓存，其余的一次 fetch_many 批量下载并写回本地缓存
+    - 周线/月线: 由日线（同上）合成
+    - 分钟线: 一次 fetch_many 下载基础分钟线（base_interval），再合成目标周期
+
+    参数:
+    symbols: 股票代码列表（已转大写）
+    period: 数据时间范围
+    interval: K线周期
+    offline: 离线模式（默认读取 Config.OFFLINE）
+
+    返回:
+    {symbol: DataFrame}，没有数据的股票不在结果中
+    （interval / period 不合法时抛出 ValueError，和 fetch_data 一致）
+    """
+    offline = config.OFFLINE if offline is None else offline
+
+    if offline:
+        frames = {}
+        for symbol in symbols:
+            data = fetch_data(symbol, period, offline=True, interval=interval)
+            if data is not None:
+                frames[symbol] = data
+        return frames
+
+    if is_intraday(interval):
+        base = base_interval(interval, period)
+        download = partial(_download_many, period=period, interval=base)
+    else:
+        base = "1d"
+        download = partial(_load_daily, period=period)
+    sources = _many_cached(symbols, period, base, download)
+
+    if base == interval:
+        return sources
+    return {
+        symbol: _cached((symbol, period, interval, "frame"), partial(resample_bars, data, interval))
+        for symbol, data in sources.items()
+    }
+
+
+def _many_cached(symbols, period, interval, load):
+    """批量版的内存缓存：命中的直接用，其余的一次 load(missing) 取回并放进缓存"""
+    frames = {}
+    missing = []
+    for symbol in symbols:
+        data = data_cache.get((symbol, period, interval, "frame"))
+        if data is None:
+            missing.append(symbol)
+        else:
+            frames[symbol] = data
+
+    if missing:
+        ttl = market_ttl()
+        for symbol, data in load(missing).items():
+            data_cache.set((symbol, period, interval, "frame"), data, ttl=ttl)
+            frames[symbol] = data
+    return frames
+
+
+def _download_many(symbols, period, interval):
+    """一次批量下载（不经过本地缓存）"""
+    return panel_to_frames(get_provider().fetch_many(symbols, period, interval))
+
+
+def _load_daily(symbols, period):
+    """日线：本地缓存够新、够长的直接读，其余的一次批量下载并写回本地缓存"""
+    start = period_start(period)
+    frames = {}
+    missing = []
+    for symbol in symbols:
+        try:
+            cached, meta = load_bars(symbol)
+        except ValueError as e:
+            print(f"❌ {e}")
+            continue
+        if meta is not None and meta["covered_from"] <= start and is_fresh(meta):
+            data = slice_period(cached, period, start)
+            if not data.empty:
+                frames[symbol] = data
+        else:
+            missing.append(symbol)
+
+    if missing:
+        for symbol, data in _download_many(missing, period, "1d").items():
+            _save_download(symbol, data, period, start)
+            frames[symbol] = data
+    return frames
+
+
+def _save_download(symbol, data, period, start):
+    """把批量下载的日线合并进本地缓存"""
+    if data.empty:
+        return
+
+    # "Nd" 周期只下载了最后 N 个交易日，缓存只覆盖到第一根K线
+    covered_from = data['Date'].min() if trading_days(period) else start
+    cached, meta = load_bars(symbol)
+    if cached is not None and not cached.empty and cached['Date'].max() >= covered_from:
+        data = merge_bars(cached, data)
+        covered_from = min(covered_from, meta["covered_from"])
+    save_bars(symbol, data, covered_from=covered_from)
+
+
+def _fetch_resampled(symbol, period, interval, use_cache, offline):
+    """
+    获取非日线周期的数据
+
+    - 分钟线: 下载一份基础分钟线（只缓存在内存中），再合成目标周期
+    - 周线/月线: 由日线（走本地缓存）合成
+    合成结果也放进内存缓存，同一只股票的多周期视图只下载一次。
+    """
+    if is_intraday(interval):
+        if offline:
+            print(f"❌ 离线模式下没有 {symbol} 的分钟数据")
             return None
+        base = base_interval(interval, period)
+        load = partial(_download, symbol, period=period, interval=base)
+        source = _cached((symbol.upper(), period, base, "frame"), load) if use_cache else load()
+    else:
+        base = "1d"
+        source = fetch_data(symbol, period, use_cache=use_cache, offline=offline)
+
+    if source is None or base == interval:
+        return source
 
-        # 步骤4: 数据清理和格式化
-        # 重置索引，让日期从索引变成普通列
-        data = data.reset_index()
+    build = partial(resample_bars, source, interval)
+    return _cached((symbol.upper(), period, interval, "frame"), build) if use_cache else build()
 
-        # 将日期列转换为日期格式（去掉时区信息，只保留日期）
-        data['Date'] = data['Date'].dt.date
 
-        # 保留我们需要的列：日期、开盘价、最高价、最低价、收盘价、成交量
-        # 海龟法则主要使用收盘价和最高/最低价
-        columns_to_keep = ['Date', 'Open', 'High', 'Low', 'Close', 'Volume']
-        data = data[columns_to_keep]
+def _cached(key, compute):
+    """内存缓存，有效期跟随交易时间"""
+    return data_cache.get_or_compute(key, compute, ttl=market_ttl())
+
+
+def _fetch_with_disk_cache(symbol, period, offline):
+    """读本地缓存，必要时增量下载"""
+    try:
+        start = period_start(period)
+        cached, meta = load_bars(symbol)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return None
+
+    covered = meta is not None and meta["covered_from"] <= start
+
+    # 步骤1: 缓存足够新、也足够长，直接返回
+    if covered and (offline or is_fresh(meta)):
+        return _finish(symbol, slice_period(cached, period, start))
+
+    if offline:
+        if cached is None:
+            print(f"❌ 离线模式: 没有 {symbol} 的缓存数据")
+            return None
+        print(f"⚠️  离线模式: {symbol} 的缓存只覆盖到 {meta['covered_from']} 之后")
+        return _finish(symbol, slice_period(cached, period, start))
 
-        # 步骤5: 按日期排序（确保数据按时间顺序排列）
-        data = data.sort_values('Date').reset_index(drop=True)
+    # 步骤2: 没有缓存，按起始日期下载（保证缓存覆盖范围准确）
+    if cached is None:
+        if period == "max":
+            data = _download(symbol, period="max", quiet=True)
+        else:
+            data = _download(symbol, start=start, quiet=True)
+        if data is None or data.empty:
+            return _finish(symbol, None)
+        save_bars(symbol, data, covered_from=start)
+        return _finish(symbol, slice_period(data, period, start))
+
+    # 步骤3: 只补缺少的部分
+    # 向后补：从缓存最后一天开始（最后一天可能是盘中数据，一起刷新）
+    newer = _download(symbol, start=cached['Date'].max(), quiet=True)
+    # 向前补：缓存覆盖的起始日期之前
+    older = None
+    if not covered:
+        older = _download(symbol, start=start, end=meta["covered_from"], quiet=True)
+
+    if newer is None or (not covered and older is None):
+        # 下载出错（网络问题等），先用缓存，不更新缓存时间，下次再补
+        print(f"⚠️  {symbol} 增量更新失败，使用缓存数据")
+        return _finish(symbol, slice_period(cached, period, start))
+
+    data = merge_bars(merge_bars(older, cached), newer)
+    save_bars(symbol, data, covered_from=min(start, meta["covered_from"]))
+    return _finish(symbol, slice_period(data, period, start))
+
+
+def _download(symbol, quiet=False, **history_kwargs):
+    """
+    从数据源（默认 Yahoo Finance）下载数据
 
-        print(f"✅ 成功获取股票 {symbol} 的数据")
-        print(f"📊 数据范围: {data['Date'].min()} 到 {data['Date'].max()}")
-        print(f"📈 总共 {len(data)} 个交易日的数据")
+    参数:
+    symbol: 股票代码
+    quiet: 为 True 时不打印成功信息
+    **history_kwargs: 传给 provider.history 的参数（period 或 start/end）
 
-        return data
+    返回:
+    DataFrame（这段时间没有数据时为空 DataFrame），出错时返回 None
+    """
+    try:
+        data = get_provider().history(symbol, **history_kwargs)
+        return data if quiet else _finish(symbol, data)
 
     except Exception as e:
-        # 步骤6: 错误处理
+        # 错误处理
+        provider_errors.inc(config.MARKET_DATA_PROVIDER)
         print(f"❌ 获取股票 {symbol} 数据时发生错误: {str(e)}")
         print("可能的原因:")
         print("1. 网络连接问题")
@@ -62,6 +283,18 @@ def fetch_data(symbol, period="1mo"):
         return None
 
 
+def _finish(symbol, data):
+    """打印数据概况并返回数据"""
+    if data is None or data.empty:
+        print(f"警告: 无法获取股票 {symbol} 的数据，请检查股票代码是否正确")
+        return None
+
+    print(f"✅ 成功获取股票 {symbol} 的数据")
+    print(f"📊 数据范围: {data['Date'].min()} 到 {data['Date'].max()}")
+    print(f"📈 总共 {len(data)} 个交易日的数据")
+    return data
+
+
 def display_recent_data(data, days=20):
     """
     显示最近几天的收盘价数据
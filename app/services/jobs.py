@@ -0,0 +1,294 @@
+# jobs.py - 后台任务队列（进程内，带优先级和积压上限）
+
+import itertools
+import json
+import math
+import queue
+import threading
+import uuid
+from datetime import date, datetime
+
+import numpy as np
+
+from app.core.config import config
+from app.database.connection import SessionLocal
+from app.database.models import Job
+from app.schemas.stock import BacktestRequest, StockRequest
+from app.services.analysis import signal_summary
+from app.services.backtest import run_backtest
+from app.services.fetch_data import fetch_data
+
+# 任务类型 -> (参数模型, 处理函数)
+JOB_HANDLERS = {}
+
+# 任务状态
+QUEUED, RUNNING, SUCCEEDED, FAILED = "queued", "running", "succeeded", "failed"
+FINISHED = (SUCCEEDED, FAILED)
+
+# 放进队列的停止标记（优先级最低，排在所有任务之后）
+_STOP = float("inf")
+
+
+class JobQueueFull(Exception):
+    """排队的任务已达上限（调用方应返回 503，让客户端稍后重试）"""
+
+
+def register_job(kind, params_model):
+    """
+    注册任务类型（装饰器）
+
+    处理函数接收参数模型的实例，返回可 JSON 序列化的结果
+
+    用法:
+        @register_job("backtest", BacktestRequest)
+        def backtest_job(params):
+            ...
+    """
+    def decorator(func):
+        JOB_HANDLERS[kind] = (params_model, func)
+        return func
+    return decorator
+
+
+@register_job("analyze", StockRequest)
+def analyze_job(params):
+    """分析一只股票（结果同 /analyze，但不写入提醒历史）"""
+    symbol = params.symbol.upper()
+    data = fetch_data(symbol, params.period, interval=params.interval)
+    if data is None or len(data) == 0:
+        raise ValueError(f"无法获取 {symbol} 的数据，请检查股票代码是否正确")
+
+    result = signal_summary(data, params.entry_period, params.exit_period)
+    return {"symbol": symbol, **result}
+
+
+@register_job("backtest", BacktestRequest)
+def backtest_job(params):
+    """对一只股票运行海龟系统回测，返回统计指标和交易记录"""
+    symbol = params.symbol.upper()
+    data = fetch_data(symbol, params.period)
+    if data is None or len(data) == 0:
+        raise ValueError(f"无法获取 {symbol} 的数据，请检查股票代码是否正确")
+
+    backtest = run_backtest(
+        data,
+        system=params.system,
+        entry_period=params.entry_period,
+        exit_period=params.exit_period,
+        initial_capital=params.initial_capital
+    )
+    return {
+        "symbol": symbol,
+        "stats": backtest["stats"],
+        "trades": backtest["trades"].to_dict(orient="records")
+    }
+
+
+class JobQueue:
+    """
+    进程内的后台任务队列
+
+    - 提交时先写入 jobs 表（状态 queued），再放进优先级队列，立即返回任务 ID
+    - 固定数量的工作线程按优先级（相同优先级按提交顺序）取任务执行，
+      状态、结果和错误都写回 jobs 表，重启后仍然可以查询
+    - 启动时调用 recover()：上次没执行完的任务重新排队，执行到一半的标记为失败
+    - 排队 + 运行中的任务超过 max_pending 时拒绝新任务（JobQueueFull），
+      慢任务不会占用 API 的工作线程，也不会无限积压
+
+    工作线程在第一次提交时才启动。
+
+    用法:
+        job_id = job_queue.submit("backtest", {"symbol": "AAPL"}, priority=7)
+        job_queue.wait(job_id, timeout=10)
+    """
+
+    def __init__(self, workers=None, max_pending=None, session_factory=None):
+        self.workers = workers or config.JOB_WORKERS
+        self.max_pending = max_pending or config.JOB_MAX_PENDING
+        self.session_factory = session_factory or SessionLocal
+
+        self._queue = queue.PriorityQueue()
+        self._sequence = itertools.count()
+        self._threads = []
+        self._done = {}  # job_id -> threading.Event（任务结束后删除）
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    @property
+    def pending(self):
+        """排队和运行中的任务数"""
+        with self._lock:
+            return self._pending
+
+    def submit(self, kind, params=None, priority=5):
+        """
+        提交任务
+
+        参数:
+        kind: 任务类型（analyze / backtest）
+        params: 任务参数 dict
+        priority: 优先级（越大越先执行）
+
+        返回:
+        任务 ID
+
+        异常:
+        ValueError: 未知的任务类型
+        pydantic.ValidationError: 参数不合法
+        JobQueueFull: 积压的任务已达上限
+        """
+        if kind not in JOB_HANDLERS:
+            raise ValueError(f"未知的任务类型: {kind}，可选: {list(JOB_HANDLERS)}")
+        params_model, _ = JOB_HANDLERS[kind]
+        params = params_model(**(params or {}))
+
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise JobQueueFull(f"排队的任务已达上限 ({self.max_pending})，请稍后重试")
+            self._pending += 1
+
+        job_id = uuid.uuid4().hex
+        try:
+            with self.session_factory() as db:
+                db.add(Job(id=job_id, kind=kind, status=QUEUED, priority=priority,
+                           params=params.model_dump_json()))
+                db.commit()
+        except Exception:
+            with self._lock:
+                self._pending -= 1
+            raise
+
+        self._enqueue(job_id, kind, priority, params)
+        return job_id
+
+    def recover(self):
+        """
+        恢复上次进程留下的任务（服务启动时调用一次）
+
+        - running: 进程退出时还在执行，结果未知，标记为 failed
+        - queued: 按保存的参数重新排队；任务类型或参数已经无效的标记为 failed
+
+        返回:
+        (重新排队的任务数, 标记为失败的任务数)
+        """
+        now = datetime.now()
+        requeue = []
+        with self.session_factory() as db:
+            failed = db.query(Job).filter(Job.status == RUNNING).update({
+                "status": FAILED,
+                "error": "服务重启时任务还在执行，结果未知，请重新提交",
+                "finished_at": now
+            })
+
+            for job in db.query(Job).filter(Job.status == QUEUED).order_by(Job.created_at):
+                if job.id in self._done:
+                    continue  # 本进程已经在排队
+                try:
+                    if job.kind not in JOB_HANDLERS:
+                        raise ValueError(f"未知的任务类型: {job.kind}")
+                    params_model, _ = JOB_HANDLERS[job.kind]
+                    params = params_model.model_validate_json(job.params or "{}")
+                except Exception as e:
+                    job.status, job.error, job.finished_at = FAILED, f"无法恢复任务: {str(e)}", now
+                    failed += 1
+                    continue
+                requeue.append((job.id, job.kind, job.priority, params))
+            db.commit()
+
+        with self._lock:
+            self._pending += len(requeue)
+        for job_id, kind, priority, params in requeue:
+            self._enqueue(job_id, kind, priority, params)
+
+        if requeue or failed:
+            print(f"♻️  恢复后台任务: {len(requeue)} 个重新排队，{failed} 个标记为失败")
+        return len(requeue), failed
+
+    def wait(self, job_id, timeout=None):
+        """等待任务结束，返回是否已结束（本进程没有在执行的任务直接返回 True）"""
+        event = self._done.get(job_id)
+        return True if event is None else event.wait(timeout)
+
+    def shutdown(self, wait=True):
+        """停止工作线程（已在队列中的任务先执行完）"""
+        with self._lock:
+            threads, self._threads = self._threads, []
+        for _ in threads:
+            self._queue.put((_STOP, next(self._sequence), None, None, None))
+        if wait:
+            for thread in threads:
+                thread.join()
+
+    def _enqueue(self, job_id, kind, priority, params):
+        self._done[job_id] = threading.Event()
+        self._queue.put((-priority, next(self._sequence), job_id, kind, params))
+        self._start_workers()
+
+    def _start_workers(self):
+        with self._lock:
+            while len(self._threads) < self.workers:
+                thread = threading.Thread(target=self._work, name=f"job-{len(self._threads)}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def _work(self):
+        while True:
+            priority, _, job_id, kind, params = self._queue.get()
+            if priority == _STOP:
+                return
+            try:
+                self._run(job_id, kind, params)
+            finally:
+                with self._lock:
+                    self._pending -= 1
+                event = self._done.pop(job_id, None)
+                if event is not None:
+                    event.set()
+
+    def _run(self, job_id, kind, params):
+        """执行一个任务并把结果写回数据库"""
+        self._update(job_id, status=RUNNING, started_at=datetime.now())
+        _, handler = JOB_HANDLERS[kind]
+        try:
+            result = handler(params)
+        except Exception as e:
+            print(f"❌ 任务 {job_id} ({kind}) 失败: {str(e)}")
+            self._update(job_id, status=FAILED, error=str(e), finished_at=datetime.now())
+            return
+
+        self._update(job_id, status=SUCCEEDED, finished_at=datetime.now(),
+                     result=json.dumps(json_safe(result), ensure_ascii=False))
+
+    def _update(self, job_id, **values):
+        try:
+            with self.session_factory() as db:
+                db.query(Job).filter(Job.id == job_id).update(values)
+                db.commit()
+        except Exception as e:
+            print(f"❌ 更新任务 {job_id} 状态失败: {str(e)}")
+
+
+def json_safe(value):
+    """
+    把结果转换成标准 JSON 能表示的值
+
+    numpy 标量转成 Python 数值，日期转成 ISO 字符串，
+    NaN / inf（例如没有亏损交易时的盈亏比）转成 None
+    """
+    if isinstance(value, dict):
+        return {str(key): json_safe(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [json_safe(item) for item in value]
+    if isinstance(value, np.datetime64):
+        return str(value)
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float):
+        return value if math.isfinite(value) else None
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+# 全局实例
+job_queue = JobQueue()
@@ -0,0 +1,188 @@
+# memory_cache.py - 进程内 LRU + TTL 缓存
+
+import sys
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+import numpy as np
+import pandas as pd
+
+from app.core.config import config
+
+MARKET_TZ = ZoneInfo("America/New_York")
+MARKET_OPEN = (9, 30)
+# 收盘后再多等一会儿，等最后一根K线稳定
+MARKET_SETTLE = (16, 15)
+
+
+class LRUCache:
+    """
+    按字节数限制大小的 LRU 缓存，每个条目可以有自己的过期时间
+
+    线程安全（FastAPI 的同步路由在线程池中运行）。
+    缓存的对象是共享的，取出后不要修改。
+
+    用法:
+        cache = LRUCache(max_bytes=64 * 1024 * 1024)
+        value = cache.get_or_compute(key, lambda: expensive(), ttl=60)
+    """
+
+    def __init__(self, max_bytes, default_ttl=None, name="cache"):
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self.name = name
+
+        # key -> (value, size, expires_at)
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key, default=None):
+        """读取缓存，不存在或已过期时返回 default"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+
+            value, size, expires_at = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return default
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, ttl=None, size=None):
+        """
+        写入缓存
+
+        参数:
+        key: 缓存键（需要可哈希）
+        value: 缓存的值
+        ttl: 有效期（秒），None 时使用 default_ttl，两者都为 None 表示不过期
+        size: 占用字节数（默认自动估算）
+        """
+        size = estimate_size(value) if size is None else size
+        if size > self.max_bytes:
+            return
+
+        ttl = self.default_ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+            self._entries[key] = (value, size, expires_at)
+            self._bytes += size
+
+            # 超出容量时淘汰最久没用的条目
+            while self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def get_or_compute(self, key, compute, ttl=None):
+        """缓存未命中时调用 compute() 并缓存结果（结果为 None 时不缓存）"""
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            if value is not None:
+                self.set(key, value, ttl=ttl)
+        return value
+
+    def invalidate(self, key):
+        """删除一个条目"""
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def clear(self):
+        """清空缓存（统计数据保留）"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def _remove(self, key):
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def stats(self):
+        """命中 / 未命中 / 淘汰统计"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "name": self.name,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_rate": self.hits / lookups if lookups else 0.0
+            }
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def estimate_size(value):
+    """估算一个对象占用的内存（字节）"""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(index=True, deep=True))
+    if isinstance(value, np.ndarray):
+        return int(value.nbytes)
+    if hasattr(value, 'nbytes'):
+        return int(value.nbytes)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(estimate_size(k) + estimate_size(v) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(estimate_size(item) for item in value)
+    return sys.getsizeof(value)
+
+
+def market_ttl(now=None):
+    """
+    根据美股交易时间决定缓存有效期
+
+    - 交易时段（含收盘后的稳定时间）内：Config.CACHE_TTL_OPEN 秒
+    - 休市时：一直有效到下一个交易日开盘（数据不会再变化）
+
+    参数:
+    now: 当前时间（带时区的 datetime，默认现在）
+
+    返回:
+    有效期（秒）
+    """
+    now = (now or datetime.now(MARKET_TZ)).astimezone(MARKET_TZ)
+    today_open = now.replace(hour=MARKET_OPEN[0], minute=MARKET_OPEN[1], second=0, microsecond=0)
+    today_settle = now.replace(hour=MARKET_SETTLE[0], minute=MARKET_SETTLE[1], second=0, microsecond=0)
+
+    if now.weekday() < 5 and today_open <= now < today_settle:
+        return config.CACHE_TTL_OPEN
+
+    # 找到下一个开盘时间（节假日按交易日处理，最多多刷新一次）
+    next_open = today_open if now < today_open else today_open + timedelta(days=1)
+    while next_open.weekday() >= 5:
+        next_open += timedelta(days=1)
+    return max((next_open - now).total_seconds(), config.CACHE_TTL_OPEN)
+
+
+# 全局缓存实例
+data_cache = LRUCache(config.DATA_CACHE_BYTES, name="data")
+signal_cache = LRUCache(config.SIGNAL_CACHE_BYTES, name="signals")
@@ -0,0 +1,174 @@
+# metrics.py - 分阶段耗时统计与 Prometheus 指标
+
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from functools import wraps
+
+# 默认的耗时分桶（秒）
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    """
+    按标签分组的直方图（Prometheus histogram）
+
+    observe() 只做一次二分查找和几次加法，热路径上开销很小；
+    累加成 Prometheus 要求的累计分桶在 render() 时才做。
+    """
+
+    def __init__(self, name, help_text, label, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label = label
+        self.buckets = tuple(buckets)
+        self._series = {}  # 标签值 -> [各分桶计数..., 超出最大分桶的计数]
+        self._sums = {}
+        self._lock = threading.Lock()
+
+    def observe(self, label_value, value):
+        """记录一次观测值"""
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._series.get(label_value)
+            if counts is None:
+                counts = self._series[label_value] = [0] * (len(self.buckets) + 1)
+                self._sums[label_value] = 0.0
+            counts[index] += 1
+            self._sums[label_value] += value
+
+    def snapshot(self, label_value):
+        """(次数, 总和)，没有记录时为 (0, 0.0)"""
+        with self._lock:
+            counts = self._series.get(label_value)
+            return (sum(counts), self._sums[label_value]) if counts else (0, 0.0)
+
+    def render(self):
+        with self._lock:
+            series = {key: list(counts) for key, counts in self._series.items()}
+            sums = dict(self._sums)
+
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for label_value in sorted(series):
+            counts = series[label_value]
+            labels = f'{self.label}="{_escape(label_value)}"'
+            total = 0
+            for bound, count in zip(self.buckets, counts):
+                total += count
+                lines.append(f'{self.name}_bucket{{{labels},le="{bound}"}} {total}')
+            total += counts[-1]
+            lines.append(f'{self.name}_bucket{{{labels},le="+Inf"}} {total}')
+            lines.append(f"{self.name}_sum{{{labels}}} {sums[label_value]}")
+            lines.append(f"{self.name}_count{{{labels}}} {total}")
+        return lines
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+            self._sums.clear()
+
+
+class Counter:
+    """按标签分组的计数器（Prometheus counter）"""
+
+    def __init__(self, name, help_text, label):
+        self.name = name
+        self.help_text = help_text
+        self.label = label
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, label_value, amount=1):
+        with self._lock:
+            self._values[label_value] = self._values.get(label_value, 0) + amount
+
+    def value(self, label_value):
+        with self._lock:
+            return self._values.get(label_value, 0)
+
+    def render(self):
+        with self._lock:
+            values = dict(self._values)
+
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        for label_value in sorted(values):
+            lines.append(f'{self.name}{{{self.label}="{_escape(label_value)}"}} {values[label_value]}')
+        return lines
+
+    def reset(self):
+        with self._lock:
+            self._values.clear()
+
+
+# 各阶段耗时: fetch（下载/读缓存）、clean（整理 yfinance 数据，包含在 fetch 内）、
+# strategy（策略计算）、db_write（数据库读写和提交）、serialize（响应序列化）
+stage_seconds = Histogram("turtle_stage_seconds", "Time spent in each analysis stage", "stage")
+provider_errors = Counter("turtle_provider_errors_total", "Market data provider errors", "provider")
+
+
+@contextmanager
+def stage(name):
+    """
+    记录一段代码的耗时
+
+    用法:
+        with stage("fetch"):
+            data = fetch_data(symbol)
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        stage_seconds.observe(name, time.perf_counter() - started)
+
+
+def timed(name):
+    """装饰器版本的 stage()"""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with stage(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def render(caches=()):
+    """
+    生成 Prometheus 文本格式的指标
+
+    参数:
+    caches: LRUCache.stats() 格式的 dict 列表，输出为缓存命中率等指标
+
+    返回:
+    str
+    """
+    lines = stage_seconds.render() + provider_errors.render()
+    lines += _cache_lines(list(caches))
+    return "\n".join(lines) + "\n"
+
+
+def _cache_lines(caches):
+    if not caches:
+        return []
+
+    metrics = [
+        ("turtle_cache_hits_total", "counter", "Cache hits", "hits"),
+        ("turtle_cache_misses_total", "counter", "Cache misses", "misses"),
+        ("turtle_cache_evictions_total", "counter", "Entries evicted to stay within the byte budget", "evictions"),
+        ("turtle_cache_entries", "gauge", "Entries currently cached", "entries"),
+        ("turtle_cache_bytes", "gauge", "Estimated bytes currently cached", "bytes"),
+        ("turtle_cache_hit_ratio", "gauge", "Hits / lookups since start", "hit_rate"),
+    ]
+    lines = []
+    for name, kind, help_text, field in metrics:
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for stats in caches:
+            lines.append(f'{name}{{cache="{_escape(stats["name"])}"}} {stats[field]}')
+    return lines
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
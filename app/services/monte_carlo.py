@@ -0,0 +1,125 @@
+# monte_carlo.py - 交易序列蒙特卡洛重抽样
+
+import numpy as np
+import pandas as pd
+
+from app.services.backtest import TRADING_DAYS
+
+METHODS = ('bootstrap', 'permute')
+PERCENTILES = [1, 5, 25, 50, 75, 95, 99]
+
+# 每批同时存在的 (路径数 × 交易数) 矩阵个数（路径 + 重抽样下标 / 峰值）
+_LIVE_MATRICES = 2
+
+
+def trade_fractions(trades, initial_capital):
+    """
+    把交易记录换算成“每笔交易占当时账户权益的收益率”
+
+    回测是单一持仓、交易首尾相接，所以第 i 笔交易前的权益
+    就是初始资金加上之前所有交易的盈亏。
+
+    参数:
+    trades: 回测的交易记录 (DataFrame)，需要 pnl 列
+    initial_capital: 初始资金
+
+    返回:
+    numpy 数组
+    """
+    pnl = trades['pnl'].to_numpy(dtype=float)
+    equity_before = initial_capital + np.concatenate(([0.0], np.cumsum(pnl)[:-1]))
+    return pnl / equity_before
+
+
+def monte_carlo(returns, n_paths=10000, years=1.0, method='bootstrap',
+                seed=None, max_chunk_bytes=64 * 1024 * 1024):
+    """
+    对交易收益率序列做蒙特卡洛模拟
+
+    每一批路径一次性生成为 (路径数 × 交易数) 的矩阵，用 numpy 计算
+    权益、最大回撤和年化收益；按 max_chunk_bytes 分批，内存占用有上限：
+    同一时刻最多有两个这样的矩阵（路径 + 重抽样下标或回撤用的峰值），
+    两个矩阵加起来不超过 max_chunk_bytes。
+
+    参数:
+    returns: 每笔交易的收益率（占账户权益比例）
+    n_paths: 模拟路径数
+    years: 原始交易序列覆盖的年数（用于计算年化收益）
+    method: "bootstrap"（有放回重抽样）或 "permute"（只打乱顺序）
+    seed: 随机种子
+    max_chunk_bytes: 每批计算同时占用的矩阵内存上限（字节）
+
+    返回:
+    dict: {
+        "max_drawdown": 每条路径的最大回撤,
+        "cagr": 每条路径的年化收益,
+        "final_return": 每条路径的总收益,
+        "summary": 各指标分位数 DataFrame
+    }
+    """
+    if method not in METHODS:
+        raise ValueError(f"method 必须是 {METHODS} 之一")
+
+    # 单笔亏损最多亏光账户
+    returns = np.maximum(np.asarray(returns, dtype=float), -1.0)
+    count = len(returns)
+    if count == 0:
+        raise ValueError("没有交易记录，无法模拟")
+
+    rng = np.random.default_rng(seed)
+    max_drawdown = np.empty(n_paths)
+    final = np.empty(n_paths)
+
+    # 每批的路径数：同时存在的两个 (路径数 × 交易数) 矩阵加起来不超过内存上限
+    chunk = max(1, min(n_paths, max_chunk_bytes // (_LIVE_MATRICES * count * 8)))
+
+    for start in range(0, n_paths, chunk):
+        rows = min(chunk, n_paths - start)
+
+        if method == 'bootstrap':
+            paths = returns[rng.integers(0, count, size=(rows, count))]
+        else:
+            paths = rng.permuted(np.broadcast_to(returns, (rows, count)), axis=1)
+
+        # 原地计算权益曲线，避免额外分配（亏光的交易 log1p 为 -inf，权益变为 0）
+        with np.errstate(divide='ignore'):
+            np.log1p(paths, out=paths)
+        np.cumsum(paths, axis=1, out=paths)
+        np.exp(paths, out=paths)
+
+        # 回撤也在第二个矩阵里原地计算：峰值 -> 权益 / 峰值
+        peak = np.maximum(paths, 1.0)
+        np.maximum.accumulate(peak, axis=1, out=peak)
+        np.divide(paths, peak, out=peak)
+        max_drawdown[start:start + rows] = peak.min(axis=1) - 1
+        final[start:start + rows] = paths[:, -1]
+        # 先释放这一批的矩阵，下一批分配时不会和它们同时存在
+        del paths, peak
+
+    with np.errstate(invalid='ignore'):
+        cagr = np.where(final > 0, final ** (1 / years) - 1, -1.0)
+
+    result = {
+        "max_drawdown": max_drawdown,
+        "cagr": cagr,
+        "final_return": final - 1
+    }
+    result["summary"] = pd.DataFrame(
+        {name: np.percentile(values, PERCENTILES) for name, values in result.items()},
+        index=pd.Index(PERCENTILES, name='percentile')
+    )
+    return result
+
+
+def monte_carlo_backtest(backtest, n_paths=10000, method='bootstrap', seed=None, **kwargs):
+    """
+    直接对 backtest.run_backtest 的结果做蒙特卡洛模拟
+
+    参数:
+    backtest: run_backtest / backtest_arrays 的返回值
+    其他参数同 monte_carlo
+    """
+    initial_capital = backtest["stats"]["initial_capital"]
+    returns = trade_fractions(backtest["trades"], initial_capital)
+    years = max(len(backtest["equity"]) / TRADING_DAYS, 1 / TRADING_DAYS)
+    return monte_carlo(returns, n_paths=n_paths, years=years, method=method, seed=seed, **kwargs)
@@ -0,0 +1,92 @@
+# panel.py - 多股票批量信号计算
+
+import numpy as np
+import pandas as pd
+
+from app.services.strategy import signal_codes
+
+PRICE_FIELDS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+
+def align_frames(frames, fields=PRICE_FIELDS):
+    """
+    把多只股票的 DataFrame 按日期对齐成二维数组
+
+    参数:
+    frames: {symbol: DataFrame}，DataFrame 格式与 fetch_data 返回值相同
+    fields: 需要对齐的列
+
+    返回:
+    (symbols, dates, arrays)
+    arrays: {列名: 二维数组 (股票数 × 日期数)}，缺失的日期填 NaN
+    """
+    symbols = list(frames)
+    dates = sorted(set().union(*(frame['Date'] for frame in frames.values()))) if frames else []
+    position = {date: i for i, date in enumerate(dates)}
+
+    arrays = {field: np.full((len(symbols), len(dates)), np.nan) for field in fields}
+    for row, symbol in enumerate(symbols):
+        frame = frames[symbol]
+        columns = [position[date] for date in frame['Date']]
+        for field in fields:
+            arrays[field][row, columns] = frame[field].to_numpy(dtype=float)
+
+    return symbols, dates, arrays
+
+
+def evaluate_panel(high, low, close, entry_period=20, exit_period=10, symbols=None):
+    """
+    一次计算整个股票池最新一根K线的海龟信号
+
+    每一行是一只股票，每一列是一个交易日。NaN 表示这一天没有数据
+    （还没上市、停牌等），计算时直接跳过，结果和把这只股票的有效数据
+    单独传给 turtle_strategy 一致。
+
+    参数:
+    high, low, close: 二维数组 (股票数 × K线数)
+    entry_period: 入场周期（默认20天）
+    exit_period: 出场周期（默认10天）
+    symbols: 股票代码列表（可选，作为结果的索引）
+
+    返回:
+    DataFrame，每行一只股票，包含列：
+    Signal, Close, EntryChannel, ExitChannel, Bars（有效K线数量）
+    """
+    high = np.asarray(high, dtype=float)
+    low = np.asarray(low, dtype=float)
+    close = np.asarray(close, dtype=float)
+    if high.ndim != 2 or high.shape != low.shape or high.shape != close.shape:
+        raise ValueError("high / low / close 必须是形状相同的二维数组")
+
+    valid = np.isfinite(high) & np.isfinite(low) & np.isfinite(close)
+    counts = valid.sum(axis=1)
+
+    # 把每行的有效数据稳定地挪到最右边（无效的排在前面），
+    # 之后只需要看最后 max(entry, exit) 列
+    order = np.argsort(valid, axis=1, kind='stable')
+    width = min(max(entry_period, exit_period), high.shape[1])
+    order = order[:, high.shape[1] - width:]
+
+    tail_valid = np.take_along_axis(valid, order, axis=1)
+    tail_high = np.where(tail_valid, np.take_along_axis(high, order, axis=1), -np.inf)
+    tail_low = np.where(tail_valid, np.take_along_axis(low, order, axis=1), np.inf)
+    tail_close = np.take_along_axis(close, order, axis=1)
+
+    entry_channel = tail_high[:, -entry_period:].max(axis=1) if width else np.full(len(high), np.nan)
+    exit_channel = tail_low[:, -exit_period:].min(axis=1) if width else np.full(len(high), np.nan)
+    current = tail_close[:, -1] if width else np.full(len(high), np.nan)
+
+    enough = counts >= entry_period
+    entry_channel = np.where(enough, entry_channel, np.nan)
+    exit_channel = np.where(enough, exit_channel, np.nan)
+    current = np.where(counts > 0, current, np.nan)
+
+    codes = signal_codes(current, entry_channel, exit_channel, valid=enough)
+
+    return pd.DataFrame({
+        'Signal': np.array(["SELL", "HOLD", "BUY"], dtype=object)[codes + 1],
+        'Close': current,
+        'EntryChannel': entry_channel,
+        'ExitChannel': exit_channel,
+        'Bars': counts
+    }, index=symbols)
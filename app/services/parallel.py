@@ -0,0 +1,162 @@
+# parallel.py - 多进程并行回测 / 参数扫描
+
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from app.services.backtest import backtest_arrays
+from app.services.sweep import sweep_parameters
+
+# 工作进程里挂载的共享数据（由 _init_worker 设置）
+_worker_state = {}
+
+
+class SharedPanel:
+    """
+    放在共享内存里的只读价格面板
+
+    所有列（Open/High/Low/Close...）打包进同一块 SharedMemory，
+    工作进程只需要挂载一次就能得到零拷贝的 numpy 视图，
+    任务之间不再传递价格数据。
+    """
+
+    def __init__(self, arrays):
+        fields = list(arrays)
+        stacked = np.stack([np.asarray(arrays[field], dtype=np.float64) for field in fields])
+
+        self.fields = fields
+        self.shape = stacked.shape
+        self._shm = shared_memory.SharedMemory(create=True, size=max(stacked.nbytes, 1))
+        np.ndarray(self.shape, dtype=np.float64, buffer=self._shm.buf)[:] = stacked
+
+    @property
+    def descriptor(self):
+        """传给工作进程的描述信息（只有名字和形状，不包含数据）"""
+        return {"name": self._shm.name, "shape": self.shape, "fields": self.fields}
+
+    @staticmethod
+    def attach(descriptor):
+        """
+        在工作进程中挂载共享内存
+
+        返回:
+        (shm, {列名: 二维数组视图})
+        """
+        shm = shared_memory.SharedMemory(name=descriptor["name"])
+        block = np.ndarray(descriptor["shape"], dtype=np.float64, buffer=shm.buf)
+        return shm, {field: block[i] for i, field in enumerate(descriptor["fields"])}
+
+    def close(self):
+        """释放共享内存"""
+        self._shm.close()
+        self._shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _init_worker(descriptor, symbols, dates):
+    shm, arrays = SharedPanel.attach(descriptor)
+    _worker_state.update(shm=shm, arrays=arrays, symbols=symbols, dates=dates)
+
+
+def _symbol_bars(row, dropna):
+    """取出一只股票的数据（去掉 NaN 的日期）"""
+    arrays = _worker_state["arrays"]
+    dates = _worker_state["dates"]
+    bars = {field: values[row] for field, values in arrays.items()}
+
+    if dropna:
+        valid = np.logical_and.reduce([np.isfinite(values) for values in bars.values()])
+        if not valid.all():
+            bars = {field: values[valid] for field, values in bars.items()}
+            dates = dates[valid] if dates is not None else None
+
+    bars['Date'] = dates
+    return bars
+
+
+def _run_chunk(task, rows, dropna, task_kwargs):
+    """在工作进程中处理一批股票"""
+    results, errors = {}, {}
+    for row in rows:
+        symbol = _worker_state["symbols"][row]
+        try:
+            results[symbol] = task(symbol, _symbol_bars(row, dropna), **task_kwargs)
+        except Exception as e:
+            errors[symbol] = str(e)
+    return results, errors, len(rows)
+
+
+def run_parallel(task, symbols, arrays, dates=None, max_workers=None, chunksize=None,
+                 dropna=True, progress=None, **task_kwargs):
+    """
+    把按股票划分的任务分发到多个进程
+
+    价格数据放在共享内存中，每个进程只挂载一次；任务只传股票的行号。
+
+    参数:
+    task: 顶层函数 task(symbol, bars, **task_kwargs)，
+          bars 为 {列名: 一维数组, 'Date': 日期数组}
+    symbols: 股票代码列表，与 arrays 的行对应
+    arrays: {列名: 二维数组 (股票数 × K线数)}，例如 panel.align_frames 的结果
+    dates: 日期数组（可选），所有股票共用
+    max_workers: 进程数（默认为 CPU 核数）
+    chunksize: 每个任务处理的股票数（默认让每个进程分到约 4 批）
+    dropna: 是否去掉含 NaN 的日期
+    progress: 进度回调 progress(已完成数量, 总数量)
+
+    返回:
+    dict: {"results": {symbol: 结果}, "errors": {symbol: 错误信息}, "elapsed": 秒}
+    """
+    started = time.perf_counter()
+    symbols = list(symbols)
+    max_workers = max_workers or os.cpu_count() or 1
+    chunksize = chunksize or max(1, math.ceil(len(symbols) / (max_workers * 4)))
+    dates = np.asarray(dates) if dates is not None else None
+
+    results, errors = {}, {}
+    done = 0
+
+    with SharedPanel(arrays) as panel:
+        with ProcessPoolExecutor(
+                max_workers=max_workers,
+                initializer=_init_worker,
+                initargs=(panel.descriptor, symbols, dates)
+        ) as executor:
+            futures = [
+                executor.submit(_run_chunk, task, range(start, min(start + chunksize, len(symbols))),
+                                dropna, task_kwargs)
+                for start in range(0, len(symbols), chunksize)
+            ]
+
+            for future in as_completed(futures):
+                chunk_results, chunk_errors, count = future.result()
+                results.update(chunk_results)
+                errors.update(chunk_errors)
+                done += count
+                if progress:
+                    progress(done, len(symbols))
+
+    return {"results": results, "errors": errors, "elapsed": time.perf_counter() - started}
+
+
+def backtest_task(symbol, bars, **kwargs):
+    """并行回测任务：返回一只股票的回测统计指标"""
+    result = backtest_arrays(bars['Open'], bars['High'], bars['Low'], bars['Close'],
+                             dates=bars['Date'], **kwargs)
+    return result["stats"]
+
+
+def sweep_task(symbol, bars, entry_periods, exit_periods):
+    """并行参数扫描任务：返回一只股票的扫描结果 DataFrame"""
+    data = pd.DataFrame({field: bars[field] for field in ('High', 'Low', 'Close')})
+    return sweep_parameters(data, entry_periods, exit_periods)
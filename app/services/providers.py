@@ -0,0 +1,306 @@
+# providers.py - 行情数据源（可插拔）
+
+import importlib
+from abc import ABC, abstractmethod
+from pathlib import Path
+
+import pandas as pd
+import yfinance as yf
+
+from app.core.config import config
+from app.services.disk_cache import load_bars, period_start, slice_period
+from app.services.metrics import provider_errors, timed
+
+PRICE_FIELDS = ['Open', 'High', 'Low', 'Close', 'Volume']
+COLUMNS = ['Date'] + PRICE_FIELDS
+
+
+class MarketDataProvider(ABC):
+    """
+    行情数据源基类
+
+    子类至少实现 history()；fetch_many() 默认逐只获取，
+    支持批量下载的数据源应该覆盖它。
+
+    单只股票返回 fetch_data 格式的 DataFrame（Date/Open/High/Low/Close/Volume），
+    多只股票返回对齐后的面板：索引为 Date，列为 (字段, 股票代码) 两级索引。
+    """
+
+    name = "base"
+
+    @abstractmethod
+    def history(self, symbol, period=None, start=None, end=None, interval="1d"):
+        """
+        获取一只股票的历史数据
+
+        参数:
+        symbol: 股票代码
+        period: 数据周期（与 start/end 二选一）
+        start, end: 起止日期（end 不包含）
+        interval: 数据间隔
+
+        返回:
+        DataFrame（没有数据时为空 DataFrame）；出错时抛出异常
+        """
+
+    def fetch(self, symbol, period="1mo", interval="1d"):
+        """获取一只股票的数据，没有数据时返回 None"""
+        data = self.history(symbol, period=period, interval=interval)
+        return None if data.empty else data
+
+    def fetch_many(self, symbols, period="1mo", interval="1d"):
+        """
+        获取多只股票的数据，返回对齐后的面板
+
+        参数:
+        symbols: 股票代码列表
+        period: 数据周期
+        interval: 数据间隔
+
+        返回:
+        DataFrame 面板，获取失败的股票不在结果中
+        """
+        frames = {}
+        for symbol in symbols:
+            try:
+                data = self.fetch(symbol, period, interval)
+            except Exception as e:
+                provider_errors.inc(self.name)
+                print(f"❌ 获取股票 {symbol} 数据时发生错误: {str(e)}")
+                continue
+            if data is not None:
+                frames[symbol] = data
+        return frames_to_panel(frames)
+
+
+class YFinanceProvider(MarketDataProvider):
+    """Yahoo Finance 数据源，批量获取时只发一次 yf.download 请求"""
+
+    name = "yfinance"
+
+    def history(self, symbol, period=None, start=None, end=None, interval="1d"):
+        kwargs = {"interval": interval}
+        if period is not None:
+            kwargs["period"] = period
+        if start is not None:
+            kwargs["start"] = start
+        if end is not None:
+            kwargs["end"] = end
+
+        data = yf.Ticker(symbol).history(**kwargs)
+        if data.empty:
+            return pd.DataFrame(columns=COLUMNS)
+        return clean_history(data, interval)
+
+    def fetch_many(self, symbols, period="1mo", interval="1d"):
+        symbols = [symbol.upper() for symbol in symbols]
+        if not symbols:
+            return frames_to_panel({})
+
+        raw = yf.download(
+            symbols,
+            period=period,
+            interval=interval,
+            group_by='column',
+            auto_adjust=True,
+            actions=False,
+            threads=True,
+            progress=False,
+            multi_level_index=True
+        )
+        if raw is None or raw.empty:
+            return frames_to_panel({})
+
+        return _clean_panel(raw, symbols, interval)
+
+
+class LocalFileProvider(MarketDataProvider):
+    """
+    本地文件数据源（离线替身）
+
+    读取目录中的 {SYMBOL}_{interval}.npz（disk_cache 的格式）或 {SYMBOL}.csv，
+    不访问网络，适合测试、回放和基准测试。
+    """
+
+    name = "local"
+
+    def __init__(self, directory=None):
+        self.directory = Path(directory or config.LOCAL_DATA_DIR)
+
+    def history(self, symbol, period=None, start=None, end=None, interval="1d"):
+        symbol = symbol.upper()
+        data, _ = load_bars(symbol, interval, directory=self.directory)
+
+        if data is None:
+            csv_path = self.directory / f"{symbol}.csv"
+            if not csv_path.exists():
+                return pd.DataFrame(columns=COLUMNS)
+            data = pd.read_csv(csv_path, parse_dates=['Date'])
+            if is_daily(interval):
+                data['Date'] = data['Date'].dt.date
+            data = data[COLUMNS].sort_values('Date').reset_index(drop=True)
+
+        if not is_daily(interval):
+            return _slice_intraday(data, period, start, end)
+        if period is not None:
+            return slice_period(data, period, period_start(period))
+        if start is not None:
+            data = data[data['Date'] >= pd.Timestamp(start).date()]
+        if end is not None:
+            data = data[data['Date'] < pd.Timestamp(end).date()]
+        return data.reset_index(drop=True)
+
+
+def _slice_intraday(data, period=None, start=None, end=None):
+    """分钟数据按时间截取（"Nd" 周期取最后 N 个交易日）"""
+    dates = pd.to_datetime(data['Date'])
+    keep = pd.Series(True, index=data.index)
+    if period is not None:
+        keep &= dates >= pd.Timestamp(period_start(period))
+        if period.endswith("d") and period[:-1].isdigit():
+            days = dates[keep].dt.normalize().unique()
+            if len(days) > int(period[:-1]):
+                keep &= dates >= days[-int(period[:-1])]
+    if start is not None:
+        keep &= dates >= pd.Timestamp(start)
+    if end is not None:
+        keep &= dates < pd.Timestamp(end)
+    return data[keep].reset_index(drop=True)
+
+
+def is_daily(interval):
+    """日线及以上的周期（日期列只保留日期）"""
+    return interval.endswith(("d", "wk", "mo"))
+
+
+@timed("clean")
+def clean_history(data, interval="1d"):
+    """把 yfinance Ticker.history() 返回的数据整理成 fetch_data 的格式"""
+    # 重置索引，让日期从索引变成普通列（分钟数据的索引名是 Datetime）
+    data = data.reset_index().rename(columns={'Datetime': 'Date'})
+
+    if is_daily(interval):
+        # 将日期列转换为日期格式（去掉时区信息，只保留日期）
+        data['Date'] = data['Date'].dt.date
+    elif data['Date'].dt.tz is not None:
+        # 分钟数据保留时间，使用交易所当地时间并去掉时区信息
+        data['Date'] = data['Date'].dt.tz_localize(None)
+
+    # 保留我们需要的列：日期、开盘价、最高价、最低价、收盘价、成交量
+    # 海龟法则主要使用收盘价和最高/最低价
+    data = data[COLUMNS]
+
+    # 按日期排序（确保数据按时间顺序排列）
+    return data.sort_values('Date').reset_index(drop=True)
+
+
+def _normalize_index(index, interval):
+    """批量下载的时间索引：日线只保留日期"""
+    index = pd.DatetimeIndex(index)
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    return pd.Index(index.date) if is_daily(interval) else index
+
+
+@timed("clean")
+def _clean_panel(raw, symbols, interval):
+    """把 yf.download 返回的数据整理成面板，去掉没有数据的股票"""
+    panel = raw[PRICE_FIELDS]
+    panel.index = _normalize_index(panel.index, interval)
+    panel.index.name = 'Date'
+
+    # 去掉完全没有数据的股票（代码错误、退市等）
+    has_data = panel['Close'].notna().any()
+    missing = [symbol for symbol in symbols if not has_data.get(symbol, False)]
+    if missing:
+        print(f"警告: 无法获取以下股票的数据: {', '.join(missing)}")
+        panel = panel.loc[:, panel.columns.get_level_values(1).isin(has_data[has_data].index)]
+
+    return panel.dropna(how='all').sort_index()
+
+
+def frames_to_panel(frames):
+    """
+    把 {symbol: DataFrame} 合并成对齐的面板
+
+    返回:
+    索引为 Date，列为 (字段, 股票代码) 的 DataFrame，缺失的日期为 NaN
+    """
+    if not frames:
+        columns = pd.MultiIndex.from_product([PRICE_FIELDS, []], names=['Price', 'Ticker'])
+        return pd.DataFrame(columns=columns, index=pd.Index([], name='Date'))
+
+    panel = pd.concat(
+        {symbol: frame.set_index('Date')[PRICE_FIELDS] for symbol, frame in frames.items()},
+        axis=1, names=['Ticker', 'Price']
+    )
+    panel = panel.swaplevel(axis=1).sort_index(axis=1, level=0, sort_remaining=False)
+    return panel.sort_index()
+
+
+def panel_symbols(panel):
+    """面板中的股票代码（保持顺序）"""
+    return list(dict.fromkeys(panel.columns.get_level_values(1)))
+
+
+def panel_to_frames(panel):
+    """把面板拆回 {symbol: DataFrame}（去掉没有数据的日期）"""
+    frames = {}
+    for symbol in panel_symbols(panel):
+        frame = panel.xs(symbol, axis=1, level=1)[PRICE_FIELDS].dropna(subset=['Close'])
+        frames[symbol] = frame.rename_axis('Date').reset_index()
+    return frames
+
+
+def panel_arrays(panel, fields=PRICE_FIELDS):
+    """
+    面板转成二维数组，可以直接传给 panel.evaluate_panel / parallel.run_parallel
+
+    返回:
+    (symbols, dates, {字段: 二维数组 (股票数 × 日期数)})
+    """
+    symbols = panel_symbols(panel)
+    arrays = {
+        field: panel[field].reindex(columns=symbols).to_numpy(dtype=float).T
+        for field in fields
+    }
+    return symbols, panel.index.to_numpy(), arrays
+
+
+# 数据源注册表
+PROVIDERS = {
+    YFinanceProvider.name: YFinanceProvider,
+    LocalFileProvider.name: LocalFileProvider,
+}
+
+# 需要时才导入的数据源（避免循环导入）
+LAZY_PROVIDERS = {
+    "synthetic": "app.services.synthetic",
+    "replay": "app.services.synthetic",
+    "database": "app.database.price_bars",
+}
+
+_instances = {}
+
+
+def register_provider(name, provider_class):
+    """注册新的数据源"""
+    PROVIDERS[name] = provider_class
+    _instances.pop(name, None)
+
+
+def get_provider(name=None):
+    """
+    获取数据源实例（默认使用 Config.MARKET_DATA_PROVIDER）
+
+    参数:
+    name: 数据源名称，例如 "yfinance"、"local"、"synthetic"、"replay"
+    """
+    name = name or config.MARKET_DATA_PROVIDER
+    if name not in PROVIDERS and name in LAZY_PROVIDERS:
+        importlib.import_module(LAZY_PROVIDERS[name])
+    if name not in PROVIDERS:
+        raise ValueError(f"未知的数据源: {name}，可选: {list(PROVIDERS)}")
+    if name not in _instances:
+        _instances[name] = PROVIDERS[name]()
+    return _instances[name]
@@ -0,0 +1,149 @@
+# resample.py - K线周期转换（分钟线 → 5m/15m/1h/日线，日线 → 周线/月线）
+
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from app.services.disk_cache import period_start
+
+# 分钟级周期及对应的分钟数
+INTRADAY_MINUTES = {
+    "1m": 1, "2m": 2, "5m": 5, "15m": 15, "30m": 30,
+    "60m": 60, "90m": 90, "1h": 60,
+}
+
+# 日线及以上
+DAILY_INTERVALS = ("1d", "5d", "1wk", "1mo", "3mo")
+
+# 数据源能提供的分钟线及最长回看天数（Yahoo Finance 的限制）
+BASE_INTERVALS = [("1m", 7), ("5m", 60), ("15m", 60), ("30m", 60), ("60m", 730)]
+
+# 美股开盘时间：分钟K线从开盘时刻起对齐（9:30-10:30 是第一根小时线）
+SESSION_OPEN = (9, 30)
+
+
+def is_intraday(interval):
+    """是否为分钟级周期"""
+    if interval in INTRADAY_MINUTES:
+        return True
+    if interval in DAILY_INTERVALS:
+        return False
+    raise ValueError(f"不支持的数据间隔: {interval}，可选: {list(INTRADAY_MINUTES) + list(DAILY_INTERVALS)}")
+
+
+def base_interval(interval, period, today=None):
+    """
+    选择用来合成目标周期的基础分钟线
+
+    在能整除目标周期、并且回看范围足够的分钟线中选最细的一种，
+    这样同一个 period 的 5m/15m/1h 通常共用同一份 1m 或 5m 数据。
+
+    参数:
+    interval: 目标周期（分钟级）
+    period: 数据周期
+    today: 基准日期（默认今天）
+
+    返回:
+    基础周期字符串，例如 "1m"
+    """
+    minutes = INTRADAY_MINUTES[interval]
+    if period.endswith("d") and period[:-1].isdigit():
+        # "5d" 是交易日数量，本身就是数据源的回看单位
+        days = int(period[:-1])
+    else:
+        today = today or date.today()
+        days = (today - period_start(period, today)).days
+
+    for base, max_days in BASE_INTERVALS:
+        if minutes % INTRADAY_MINUTES[base] == 0 and days <= max_days:
+            return base
+    raise ValueError(f"{interval} 数据最多只能获取 {_max_days(minutes)} 天，period={period} 太长")
+
+
+def _max_days(minutes):
+    return max((max_days for base, max_days in BASE_INTERVALS
+                if minutes % INTRADAY_MINUTES[base] == 0), default=0)
+
+
+def bucket_keys(dates, interval, session_open=SESSION_OPEN):
+    """
+    计算每根K线所属的目标K线编号（同一编号的K线合并为一根）
+
+    参数:
+    dates: datetime64 数组（分钟线为交易所当地时间）
+    interval: 目标周期
+    session_open: (时, 分) 开盘时间，分钟K线从这里对齐
+
+    返回:
+    int64 数组
+    """
+    if interval in INTRADAY_MINUTES:
+        # 所有周期都能整除一天的 1440 分钟，所以直接按“距开盘的绝对分钟数”分桶，
+        # 每天的第一根都从开盘时刻开始
+        minutes = np.asarray(dates, dtype='datetime64[m]').astype(np.int64)
+        return (minutes - _open_minute(session_open)) // INTRADAY_MINUTES[interval]
+
+    days = np.asarray(dates, dtype='datetime64[D]')
+    day_number = days.astype(np.int64)
+
+    if interval == "1d":
+        return day_number
+    if interval == "5d" or interval == "1wk":
+        # 1970-01-01 是周四，+3 后按周一分组
+        return (day_number + 3) // 7
+    if interval == "1mo":
+        return days.astype('datetime64[M]').astype(np.int64)
+    if interval == "3mo":
+        return days.astype('datetime64[M]').astype(np.int64) // 3
+    raise ValueError(f"不支持的数据间隔: {interval}")
+
+
+def _open_minute(session_open):
+    return session_open[0] * 60 + session_open[1]
+
+
+def resample_bars(data, interval, session_open=SESSION_OPEN):
+    """
+    把K线合成为更长的周期（向量化，一次 reduceat）
+
+    开盘价取第一根，收盘价取最后一根，最高/最低取极值，成交量求和；
+    分钟线按开盘时间对齐，日期列为每根新K线的起始时间
+    （日线及以上为第一个交易日的日期）。
+
+    参数:
+    data: fetch_data 格式的 DataFrame（按时间排序），Date 为时间戳或日期
+    interval: 目标周期，例如 "5m", "15m", "1h", "1d", "1wk", "1mo"
+    session_open: (时, 分) 开盘时间
+
+    返回:
+    DataFrame（格式与 data 相同）
+    """
+    if data is None or data.empty:
+        return data
+
+    dates = pd.DatetimeIndex(pd.to_datetime(data['Date'])).to_numpy()
+    keys = bucket_keys(dates, interval, session_open)
+
+    starts = np.concatenate(([0], np.flatnonzero(keys[1:] != keys[:-1]) + 1))
+    ends = np.append(starts[1:], len(keys)) - 1
+
+    high = data['High'].to_numpy(dtype=float)
+    low = data['Low'].to_numpy(dtype=float)
+
+    result = pd.DataFrame({
+        'Open': data['Open'].to_numpy()[starts],
+        'High': np.fmax.reduceat(high, starts),
+        'Low': np.fmin.reduceat(low, starts),
+        'Close': data['Close'].to_numpy()[ends],
+        'Volume': np.add.reduceat(data['Volume'].to_numpy(), starts),
+    })
+
+    if interval in INTRADAY_MINUTES:
+        # 新K线的起始时间 = 桶号 × 周期 + 开盘时刻
+        minutes = keys[starts] * INTRADAY_MINUTES[interval] + _open_minute(session_open)
+        result.insert(0, 'Date', pd.DatetimeIndex(minutes.astype('datetime64[m]').astype('datetime64[ns]')))
+    else:
+        result.insert(0, 'Date', pd.DatetimeIndex(dates[starts]).date)
+
+    return result
@@ -0,0 +1,120 @@
+# response_cache.py - 读接口的响应缓存（ETag / 条件请求）
+
+import json
+import threading
+import uuid
+from collections import defaultdict
+
+from fastapi.encoders import jsonable_encoder
+from starlette.responses import Response
+
+from app.core.config import config
+from app.services.memory_cache import LRUCache
+from app.services.metrics import stage
+
+
+class ResponseCache:
+    """
+    按版本号失效的 JSON 响应缓存
+
+    每只股票有一个版本号，写入路径（/analyze、/analyze/batch、删除股票）
+    提交后调用 bump(symbol)；另有一个全局版本号，任何股票变化都会加一。
+    ETag 由版本号生成，数据没变时：
+    - 请求带 If-None-Match 且匹配 -> 直接 304，不查数据库
+    - 没带或不匹配 -> 返回缓存的序列化结果，不查数据库
+
+    版本号只在本进程内有效，多进程部署时每个进程各自计数
+    （ETag 里带有进程启动时生成的随机前缀，不会和其他进程或重启前的 ETag 冲突），
+    这时其他进程写入的数据要等本进程自己的写入或 clear() 后才能看到。
+
+    用法:
+        return response_cache.respond(request, ("stocks",), build)
+        response_cache.bump("AAPL")  # 写入后
+    """
+
+    def __init__(self, max_bytes=None):
+        self._bodies = LRUCache(max_bytes or config.RESPONSE_CACHE_BYTES, name="responses")
+        self._versions = defaultdict(int)  # symbol -> 版本号
+        self._global = 0
+        self._token = uuid.uuid4().hex[:8]
+        self._lock = threading.Lock()
+
+    def bump(self, *symbols):
+        """数据写入后调用：这些股票和全局的版本号加一"""
+        with self._lock:
+            for symbol in symbols:
+                self._versions[symbol.upper()] += 1
+            self._global += 1
+
+    def version(self, symbol=None):
+        """股票的版本号（symbol 为 None 时返回全局版本号）"""
+        with self._lock:
+            return self._global if symbol is None else self._versions.get(symbol.upper(), 0)
+
+    def etag(self, symbol=None):
+        """当前版本对应的 ETag"""
+        return f'"{self._token}-{self.version(symbol)}"'
+
+    def clear(self):
+        """丢弃所有缓存的响应，之前发出的 ETag 全部失效"""
+        with self._lock:
+            self._token = uuid.uuid4().hex[:8]
+        self._bodies.clear()
+
+    def stats(self):
+        """缓存统计"""
+        return self._bodies.stats()
+
+    def respond(self, request, key, build, symbol=None):
+        """
+        返回缓存的响应，或者调用 build() 生成并缓存
+
+        ETag 在查询数据库之前取得：查询期间有写入时，缓存的内容只会比 ETag 新，
+        下一次请求的 ETag 不同，会重新生成，不会把旧数据当作新版本返回。
+
+        参数:
+        request: 当前请求（读取 If-None-Match）
+        key: 响应的缓存键（接口名 + 查询参数）
+        build: 生成响应的函数，返回 (可 JSON 序列化的内容, 额外响应头 dict)
+        symbol: 响应依赖的股票（None 表示依赖所有股票）
+
+        返回:
+        Response（200 或 304）
+        """
+        etag = self.etag(symbol)
+        if _matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers={"ETag": etag})
+
+        cached = self._bodies.get(key)
+        if cached is not None and cached[0] == etag:
+            _, body, headers = cached
+        else:
+            content, headers = build()
+            with stage("serialize"):
+                body = json.dumps(
+                    jsonable_encoder(content),
+                    ensure_ascii=False,
+                    separators=(",", ":")
+                ).encode("utf-8")
+            self._bodies.set(key, (etag, body, headers), size=len(body))
+
+        return Response(
+            content=body,
+            media_type="application/json",
+            headers={**headers, "ETag": etag, "Cache-Control": "no-cache"}
+        )
+
+
+def _matches(if_none_match, etag):
+    """If-None-Match 是否包含 etag（支持 *、多个值和弱 ETag 前缀 W/）"""
+    if not if_none_match:
+        return False
+    for value in if_none_match.split(","):
+        value = value.strip()
+        if value == "*" or value.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+# 全局实例
+response_cache = ResponseCache()
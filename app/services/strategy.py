@@ -1,31 +1,44 @@
+import numpy as np
+import pandas as pd
+
+
+# 信号编码（向量化计算时使用整数，最后再映射成字符串）
+HOLD, BUY, SELL = 0, 1, -1
+SIGNAL_LABELS = {BUY: "BUY", SELL: "SELL", HOLD: "HOLD"}
+
+
 def turtle_strategy(data, entry_period=20, exit_period=10):
     """
     海龟法则策略判断
 
     参数:
-    data: 股票历史数据 (DataFrame)
+    data: 股票历史数据 (DataFrame、CompactBars，或 bar_store 返回的 {列名: 数组})
     entry_period: 入场周期（默认20天）
     exit_period: 出场周期（默认10天）
 
     返回:
     "BUY" / "SELL" / "HOLD"
     """
+    # 统一转成 numpy 数组（memmap 视图不会被复制）
+    close = np.asarray(data['Close'])
+    high = np.asarray(data['High'])
+    low = np.asarray(data['Low'])
 
     # 检查数据是否足够
-    if len(data) < entry_period:
-        print(f"⚠️  数据不足：只有 {len(data)} 天数据")
+    if len(close) < entry_period:
+        print(f"⚠️  数据不足：只有 {len(close)} 天数据")
         return "HOLD"
 
     # 获取当前价格
-    current_price = float(data['Close'].iloc[-1])
+    current_price = float(close[-1])
     print(f"💰 当前价格: ${current_price:.2f}")
 
     # 计算20日最高价（突破这个价格就买入）
-    high_20 = float(data['High'].iloc[-entry_period:].max())
+    high_20 = float(np.nanmax(high[-entry_period:]))
     print(f"📈 {entry_period}日最高价: ${high_20:.2f}")
 
     # 计算10日最低价（跌破这个价格就卖出）
-    low_10 = float(data['Low'].iloc[-exit_period:].min())
+    low_10 = float(np.nanmin(low[-exit_period:]))
     print(f"📉 {exit_period}日最低价: ${low_10:.2f}")
 
     # 判断交易信号
@@ -40,6 +53,129 @@ def turtle_strategy(data, entry_period=20, exit_period=10):
         return "HOLD"
 
 
+def rolling_max(values, window):
+    """
+    滚动窗口最大值（沿最后一个维度）
+
+    开头不足 window 的位置使用已有数据（和 iloc[-n:] 的行为一致）
+
+    参数:
+    values: 一维或二维 numpy 数组
+    window: 窗口长度
+
+    返回:
+    与 values 形状相同的数组
+    """
+    return _rolling_extreme(values, window, np.max, -np.inf)
+
+
+def rolling_min(values, window):
+    """滚动窗口最小值，规则同 rolling_max"""
+    return _rolling_extreme(values, window, np.min, np.inf)
+
+
+def _rolling_extreme(values, window, reducer, fill):
+    values = np.asarray(values, dtype=float)
+    window = max(int(window), 1)
+
+    # 在前面补上 window-1 个“不影响结果”的值，这样每个位置都有完整窗口
+    pad = [(0, 0)] * (values.ndim - 1) + [(window - 1, 0)]
+    padded = np.pad(values, pad, constant_values=fill)
+    windows = np.lib.stride_tricks.sliding_window_view(padded, window, axis=-1)
+    return reducer(windows, axis=-1)
+
+
+def signal_codes(close, entry_channel, exit_channel, valid=None):
+    """
+    根据收盘价和通道计算信号编码（BUY=1, SELL=-1, HOLD=0）
+
+    判断顺序和 turtle_strategy 相同：先看突破入场通道，再看跌破离场通道
+
+    参数:
+    close: 收盘价数组
+    entry_channel: 入场通道（N日最高价）
+    exit_channel: 离场通道（M日最低价）
+    valid: 可选的布尔数组，False 的位置一律为 HOLD
+
+    返回:
+    int8 数组
+    """
+    close = np.asarray(close, dtype=float)
+    codes = np.where(
+        close >= entry_channel, BUY,
+        np.where(close <= exit_channel, SELL, HOLD)
+    ).astype(np.int8)
+
+    if valid is not None:
+        codes[~valid] = HOLD
+
+    return codes
+
+
+def turtle_signal_arrays(high, low, close, entry_period=20, exit_period=10):
+    """
+    向量化计算每根K线的海龟信号（纯 numpy 版本）
+
+    第 i 根K线的结果和 turtle_strategy(data.iloc[:i + 1]) 完全一致
+
+    参数:
+    high, low, close: 一维价格数组
+    entry_period: 入场周期（默认20天）
+    exit_period: 出场周期（默认10天）
+
+    返回:
+    (signal_codes, entry_channel, exit_channel)
+    数据不足 entry_period 的位置：信号为 HOLD，通道为 NaN
+    """
+    high = np.asarray(high, dtype=float)
+    low = np.asarray(low, dtype=float)
+
+    entry_channel = rolling_max(high, entry_period)
+    exit_channel = rolling_min(low, exit_period)
+
+    # 数据不足时 turtle_strategy 直接返回 HOLD，不计算通道
+    enough = np.arange(len(high)) >= entry_period - 1
+    entry_channel[~enough] = np.nan
+    exit_channel[~enough] = np.nan
+
+    codes = signal_codes(close, entry_channel, exit_channel, valid=enough)
+    return codes, entry_channel, exit_channel
+
+
+def turtle_signals(data, entry_period=20, exit_period=10):
+    """
+    海龟法则全历史信号（向量化，一次计算所有K线）
+
+    适用于回测和图表叠加，避免逐根K线调用 turtle_strategy
+
+    参数:
+    data: 股票历史数据 (DataFrame 或 CompactBars)，需要 High / Low / Close 列
+    entry_period: 入场周期（默认20天）
+    exit_period: 出场周期（默认10天）
+
+    返回:
+    DataFrame（索引与 data 相同），包含列：
+    Signal: "BUY" / "SELL" / "HOLD"
+    EntryChannel: 入场通道（entry_period 日最高价）
+    ExitChannel: 离场通道（exit_period 日最低价）
+    """
+    codes, entry_channel, exit_channel = turtle_signal_arrays(
+        np.asarray(data['High']),
+        np.asarray(data['Low']),
+        np.asarray(data['Close']),
+        entry_period,
+        exit_period
+    )
+
+    labels = np.array(["SELL", "HOLD", "BUY"], dtype=object)[codes + 1]
+
+    return pd.DataFrame({
+        'Signal': labels,
+        'EntryChannel': entry_channel,
+        'ExitChannel': exit_channel
+    }, index=getattr(data, 'index', None))
+
+
 # 测试代码
 if __name__ == "__main__":
     print("🐢 海龟法则策略测试")
@@ -0,0 +1,207 @@
+# sweep.py - 入场/离场周期参数扫描
+#
+# 突破规则和回测（backtest.breakout_levels）一致，不是实时信号的规则：
+# - 这里（回测）: 通道是前 N 日最高价 / 前 M 日最低价，不含当天；
+#   收盘价 > 前 N 日最高价时入场，收盘价 < 前 M 日最低价时离场
+# - turtle_strategy / turtle_signal_arrays（实时提醒）: 通道包含当天的K线，
+#   当天的最高价也在通道里，收盘价最多和通道持平，所以用 >= / <=
+# 参数扫描是为了给回测选参数，按回测的规则计算；两者在收盘价创出新高时都会触发，
+# 区别只在收盘价恰好等于前 N 日最高价的那天（这里不入场）。
+
+import math
+
+import numpy as np
+import pandas as pd
+
+from app.services.backtest import TRADING_DAYS
+
+METRIC_COLUMNS = ['total_return', 'sharpe', 'max_drawdown', 'trades', 'exposure']
+
+
+class RangeQueryTable:
+    """
+    区间最大/最小值查询表（Sparse Table）
+
+    每只股票只需要 O(n log n) 预处理一次，之后任意窗口长度的
+    滚动最高价/最低价都是一次向量化的 O(n) 查询，
+    参数扫描时所有 (entry, exit) 组合共享同一张表。
+
+    用法:
+        table = RangeQueryTable(data['High'], data['Low'])
+        high_20 = table.rolling_max(20)
+        low_10 = table.rolling_min(10)
+    """
+
+    def __init__(self, high, low):
+        high = np.asarray(high, dtype=float)
+        low = np.asarray(low, dtype=float)
+        self.size = len(high)
+
+        # _max[k][i] = max(high[i : i + 2^k])
+        self._max = self._build(high, np.maximum)
+        self._min = self._build(low, np.minimum)
+
+        # 每个长度对应的 floor(log2(长度))
+        self._log2 = np.zeros(self.size + 1, dtype=np.intp)
+        if self.size > 1:
+            self._log2[2:] = np.floor(np.log2(np.arange(2, self.size + 1))).astype(np.intp)
+
+    @classmethod
+    def from_data(cls, data):
+        """从股票数据 (DataFrame) 创建"""
+        return cls(data['High'].to_numpy(dtype=float), data['Low'].to_numpy(dtype=float))
+
+    @staticmethod
+    def _build(values, combine):
+        levels = [values]
+        span = 1
+        while span * 2 <= len(values):
+            previous = levels[-1]
+            levels.append(combine(previous[:len(previous) - span], previous[span:]))
+            span *= 2
+        return levels
+
+    def _query(self, levels, combine, window):
+        """每个位置 i 查询区间 [i - window + 1, i]（开头不足时从 0 开始）"""
+        end = np.arange(self.size)
+        start = np.maximum(end - int(window) + 1, 0)
+        k = self._log2[end - start + 1]
+
+        result = np.empty(self.size)
+        # 按层分组查询，每层内部完全向量化
+        for level in np.unique(k):
+            mask = k == level
+            table = levels[level]
+            result[mask] = combine(table[start[mask]], table[end[mask] - (1 << level) + 1])
+        return result
+
+    def rolling_max(self, window):
+        """滚动最高价，结果与 strategy.rolling_max 相同"""
+        return self._query(self._max, np.maximum, window)
+
+    def rolling_min(self, window):
+        """滚动最低价，结果与 strategy.rolling_min 相同"""
+        return self._query(self._min, np.minimum, window)
+
+    def entry_levels(self, period):
+        """前 period 日最高价（不含当天），数据不足时为 +inf"""
+        levels = np.full(self.size, np.inf)
+        if self.size > period:
+            levels[period:] = self.rolling_max(period)[period - 1:-1]
+        return levels
+
+    def exit_levels(self, period):
+        """前 period 日最低价（不含当天），数据不足时为 -inf"""
+        levels = np.full(self.size, -np.inf)
+        if self.size > period:
+            levels[period:] = self.rolling_min(period)[period - 1:-1]
+        return levels
+
+    def breakout_levels(self, entry_period, exit_period):
+        """
+        入场和离场挂单价格
+
+        返回:
+        (entry_levels, exit_levels)，与 backtest.breakout_levels 相同
+        """
+        return self.entry_levels(entry_period), self.exit_levels(exit_period)
+
+
+def breakout_positions(close, entry_levels, exit_levels):
+    """
+    根据突破通道计算每日持仓（1 = 持有，0 = 空仓）
+
+    收盘价高于前 N 日最高价（不含当天）时买入，低于前 M 日最低价时卖出，
+    其余时间保持上一天的状态（规则见模块说明）。
+    """
+    close = np.asarray(close, dtype=float)
+    events = np.full(len(close), np.nan)
+    events[close > entry_levels] = 1.0
+    events[close < exit_levels] = 0.0
+
+    # 向前填充：没有事件的日子沿用最近一次事件
+    has_event = ~np.isnan(events)
+    last_event = np.maximum.accumulate(np.where(has_event, np.arange(len(close)), 0))
+    positions = events[last_event]
+    positions[~has_event[last_event]] = 0.0
+    return positions
+
+
+def strategy_returns(close, positions):
+    """
+    持仓对应的每日收益率（当天收盘的持仓赚取下一天的涨跌）
+
+    返回:
+    与 close 等长的数组，第一天为 0
+    """
+    close = np.asarray(close, dtype=float)
+    returns = np.zeros(len(close))
+    if len(close) > 1:
+        returns[1:] = positions[:-1] * (close[1:] / close[:-1] - 1)
+    return returns
+
+
+def performance(returns, positions):
+    """根据每日收益率计算扫描用的指标"""
+    equity = np.cumprod(1 + returns)
+    drawdown = equity / np.maximum.accumulate(equity) - 1
+    std = returns.std()
+
+    return {
+        'total_return': float(equity[-1] - 1) if len(equity) else 0.0,
+        'sharpe': float(returns.mean() / std * math.sqrt(TRADING_DAYS)) if std > 0 else 0.0,
+        'max_drawdown': float(drawdown.min()) if len(drawdown) else 0.0,
+        'trades': int(np.count_nonzero(np.diff(positions, prepend=0.0) > 0)),
+        'exposure': float(positions.mean()) if len(positions) else 0.0
+    }
+
+
+def sweep_parameters(data, entry_periods, exit_periods, table=None):
+    """
+    对一只股票扫描所有 (entry_period, exit_period) 组合
+
+    区间最大/最小值只预处理一次（RangeQueryTable），每个入场周期和
+    离场周期的通道各只计算一次，组合之间不再重复做滚动计算。
+
+    参数:
+    data: 股票历史数据 (DataFrame)，需要 High / Low / Close 列
+    entry_periods: 入场周期列表，例如 range(10, 60)
+    exit_periods: 离场周期列表
+    table: 已经建好的 RangeQueryTable（可选）
+
+    返回:
+    DataFrame，索引为 (entry_period, exit_period)，列为各项指标
+    """
+    close = data['Close'].to_numpy(dtype=float)
+    if table is None:
+        table = RangeQueryTable.from_data(data)
+
+    entry_levels = {n: table.entry_levels(n) for n in entry_periods}
+    exit_levels = {m: table.exit_levels(m) for m in exit_periods}
+
+    rows = {}
+    for entry_period in entry_periods:
+        for exit_period in exit_periods:
+            positions = breakout_positions(close, entry_levels[entry_period], exit_levels[exit_period])
+            rows[(entry_period, exit_period)] = performance(strategy_returns(close, positions), positions)
+
+    result = pd.DataFrame.from_dict(rows, orient='index', columns=METRIC_COLUMNS)
+    result.index = pd.MultiIndex.from_tuples(result.index, names=['entry_period', 'exit_period'])
+    return result
+
+
+def sweep_universe(frames, entry_periods, exit_periods):
+    """
+    对多只股票扫描参数
+
+    参数:
+    frames: {symbol: DataFrame}
+
+    返回:
+    DataFrame，索引为 (symbol, entry_period, exit_period)
+    """
+    results = {
+        symbol: sweep_parameters(frame, entry_periods, exit_periods)
+        for symbol, frame in frames.items()
+    }
+    return pd.concat(results, names=['symbol'])
@@ -0,0 +1,213 @@
+# synthetic.py - 合成行情数据与回放数据源（离线压测用）
+
+import time
+import zlib
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from app.core.config import config
+from app.services.disk_cache import period_start, slice_period
+from app.services.memory_cache import LRUCache
+from app.services.providers import MarketDataProvider, register_provider
+
+TRADING_DAYS = 252
+
+
+def generate_bars(n_symbols, n_bars, drift=0.08, volatility=0.25, dispersion=0.3,
+                  gap_probability=0.02, gap_size=0.04,
+                  trend_probability=0.02, trend_strength=0.5,
+                  price_range=(20.0, 200.0), seed=None):
+    """
+    批量生成日线 OHLCV（全部用 numpy 一次生成，没有 Python 循环）
+
+    模型:
+    - 对数收益 = 漂移 + 趋势 + 波动 × 正态噪声 + 跳空
+    - 趋势: 每根K线以 trend_probability 的概率切换到新的趋势段，
+      每段有自己的额外漂移（趋势段让海龟突破信号有机会出现）
+    - 跳空: 以 gap_probability 的概率在开盘时跳空，幅度为 N(0, gap_size)
+    - 最高/最低价在开盘和收盘之外再延伸一段随机距离，成交量随波动放大
+
+    参数:
+    n_symbols: 股票数
+    n_bars: 每只股票的K线数
+    drift: 年化漂移
+    volatility: 年化波动率
+    dispersion: 各股票波动率的离散程度（对数正态的标准差）
+    gap_probability: 每根K线跳空的概率
+    gap_size: 跳空幅度（对数收益的标准差）
+    trend_probability: 每根K线切换趋势段的概率
+    trend_strength: 趋势段额外漂移的大小（日波动率的倍数）
+    price_range: 起始价格范围
+    seed: 随机种子
+
+    返回:
+    {字段: 二维数组 (股票数 × K线数)}，字段为 Open/High/Low/Close/Volume
+    """
+    rng = np.random.default_rng(seed)
+    shape = (n_symbols, n_bars)
+
+    sigma = volatility / np.sqrt(TRADING_DAYS) * rng.lognormal(0.0, dispersion, (n_symbols, 1))
+    mu = drift / TRADING_DAYS - 0.5 * sigma ** 2
+
+    # 趋势段：切换点累加得到段编号，再按段编号取该段的漂移
+    switches = rng.random(shape) < trend_probability
+    switches[:, 0] = True
+    segment = np.cumsum(switches, axis=1) - 1
+    trend = np.take_along_axis(rng.standard_normal(shape), segment, axis=1) * trend_strength * sigma
+
+    # 隔夜部分（含跳空）和日内部分分开，开盘价 = 前收盘 × 隔夜涨跌
+    gaps = np.where(rng.random(shape) < gap_probability, rng.normal(0.0, gap_size, shape), 0.0)
+    overnight = gaps + sigma * np.sqrt(0.2) * rng.standard_normal(shape)
+    intraday = mu + trend + sigma * np.sqrt(0.8) * rng.standard_normal(shape)
+
+    start = np.log(rng.uniform(*price_range, (n_symbols, 1)))
+    log_close = start + np.cumsum(overnight + intraday, axis=1)
+    log_open = log_close - intraday
+
+    wick = 0.5 * sigma
+    log_high = np.maximum(log_open, log_close) + np.abs(rng.standard_normal(shape)) * wick
+    log_low = np.minimum(log_open, log_close) - np.abs(rng.standard_normal(shape)) * wick
+
+    base_volume = rng.lognormal(np.log(1e6), 1.0, (n_symbols, 1))
+    activity = 1 + np.abs(overnight + intraday) / sigma
+    volume = base_volume * activity * rng.lognormal(0.0, 0.3, shape)
+
+    return {
+        'Open': np.exp(log_open),
+        'High': np.exp(log_high),
+        'Low': np.exp(log_low),
+        'Close': np.exp(log_close),
+        'Volume': np.round(volume)
+    }
+
+
+def synthetic_panel(n_symbols, n_bars, end=None, prefix="SYN", **kwargs):
+    """
+    生成整个合成股票池（格式同 providers.panel_arrays）
+
+    可以直接传给 panel.evaluate_panel / parallel.run_parallel。
+
+    参数:
+    n_symbols: 股票数
+    n_bars: 每只股票的K线数
+    end: 最后一个交易日（默认今天）
+    prefix: 股票代码前缀
+    **kwargs: 传给 generate_bars
+
+    返回:
+    (symbols, dates, {字段: 二维数组})
+    """
+    width = len(str(max(n_symbols - 1, 0)))
+    symbols = [f"{prefix}{i:0{width}d}" for i in range(n_symbols)]
+    dates = pd.bdate_range(end=end or date.today(), periods=n_bars).date
+    return symbols, dates, generate_bars(n_symbols, n_bars, **kwargs)
+
+
+def symbol_seed(symbol, seed=0):
+    """每只股票固定的随机种子（同一代码每次生成的数据相同）"""
+    return zlib.crc32(symbol.upper().encode()) ^ seed
+
+
+class SyntheticProvider(MarketDataProvider):
+    """
+    合成数据源：任何股票代码都能拿到数据，同一代码的数据固定
+
+    设置 MARKET_DATA_PROVIDER=synthetic 后，fetch_data / /analyze 完全离线运行，
+    可以在生产规模下压测策略计算和数据库写入。每只股票的历史到今天为止，
+    长度为 Config.SYNTHETIC_BARS；生成的数据放在 LRU 缓存里，压测上千只股票时内存有上限。
+    """
+
+    name = "synthetic"
+
+    def __init__(self, n_bars=None, seed=None, **generator_kwargs):
+        self.n_bars = n_bars or config.SYNTHETIC_BARS
+        self.seed = config.SYNTHETIC_SEED if seed is None else seed
+        self.generator_kwargs = generator_kwargs
+        self._series = LRUCache(config.DATA_CACHE_BYTES, name="synthetic")
+
+    def dates(self):
+        """合成数据的交易日"""
+        return pd.bdate_range(end=date.today(), periods=self.n_bars).date
+
+    def series(self, symbol):
+        """一只股票的完整合成历史 (DataFrame)"""
+        symbol = symbol.upper()
+        return self._series.get_or_compute(symbol, lambda: self._generate(symbol))
+
+    def _generate(self, symbol):
+        arrays = generate_bars(1, self.n_bars, seed=symbol_seed(symbol, self.seed), **self.generator_kwargs)
+        data = pd.DataFrame({field: values[0] for field, values in arrays.items()})
+        data.insert(0, 'Date', self.dates())
+        return data
+
+    def visible(self, symbol):
+        """当前能看到的数据（回放数据源会覆盖）"""
+        return self.series(symbol)
+
+    def history(self, symbol, period=None, start=None, end=None, interval="1d"):
+        if interval != "1d":
+            raise ValueError(f"合成数据源只提供日线，不支持 {interval}")
+
+        data = self.visible(symbol)
+        if period is not None:
+            return slice_period(data, period, period_start(period))
+        if start is not None:
+            data = data[data['Date'] >= pd.Timestamp(start).date()]
+        if end is not None:
+            data = data[data['Date'] < pd.Timestamp(end).date()]
+        return data.reset_index(drop=True)
+
+
+class ReplayFeed(SyntheticProvider):
+    """
+    回放数据源：按固定速率逐根放出合成K线
+
+    开始时只能看到 warmup 根K线（最后一根是最近的交易日），之后每秒放出 rate 根新K线，
+    新K线的日期排在今天之后的交易日。对 fetch_data 来说就像行情在不断更新，
+    本地缓存的增量更新、内存缓存失效和信号变化都会被真实地触发。
+
+    用法:
+        feed = ReplayFeed(rate=10)
+        register_provider("replay", lambda: feed)
+        feed.advance(5)      # 手动推进（测试用）
+    """
+
+    name = "replay"
+
+    def __init__(self, rate=None, warmup=None, n_bars=None, seed=None, clock=time.monotonic,
+                 **generator_kwargs):
+        super().__init__(n_bars=n_bars, seed=seed, **generator_kwargs)
+        self.rate = config.REPLAY_RATE if rate is None else rate
+        self.warmup = min(warmup or config.REPLAY_WARMUP, self.n_bars)
+        self._clock = clock
+        self._started = clock()
+        self._offset = 0
+
+    def dates(self):
+        # 预热部分的最后一根是最近的交易日，回放的K线排在之后
+        first = pd.Timestamp(date.today()) - pd.offsets.BDay(self.warmup - 1)
+        return pd.bdate_range(start=first, periods=self.n_bars).date
+
+    @property
+    def position(self):
+        """当前可见的K线数量"""
+        elapsed = self._clock() - self._started
+        return min(self.warmup + self._offset + int(elapsed * self.rate), self.n_bars)
+
+    def advance(self, bars=1):
+        """手动放出更多K线"""
+        self._offset += bars
+
+    def reset(self):
+        """回到起点"""
+        self._started = self._clock()
+        self._offset = 0
+
+    def visible(self, symbol):
+        return self.series(symbol).iloc[:self.position]
+
+
+register_provider(SyntheticProvider.name, SyntheticProvider)
+register_provider(ReplayFeed.name, ReplayFeed)
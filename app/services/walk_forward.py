@@ -0,0 +1,117 @@
+# walk_forward.py - 入场/离场周期的滚动（Walk-Forward）优化
+
+import math
+
+import numpy as np
+import pandas as pd
+
+from app.services.backtest import TRADING_DAYS
+from app.services.sweep import RangeQueryTable, breakout_positions, strategy_returns
+
+METRICS = ('sharpe', 'return')
+
+
+def walk_forward(data, entry_periods, exit_periods, train_size=504, test_size=126,
+                 step=None, metric='sharpe'):
+    """
+    滚动优化：在每个样本内窗口选出最优参数，在紧接着的样本外窗口检验
+
+    所有计算只在全历史上做一次：
+    - 区间最大/最小值用同一张 RangeQueryTable
+    - 每个 (entry, exit) 组合的每日收益只算一次，转成前缀和后，
+      任意窗口的得分都是 O(1) 查询
+    所以总耗时与 组合数 × 历史长度 成正比，和折数无关。
+    持仓按全历史连续运行计算（窗口开始时沿用之前的持仓状态）。
+
+    参数:
+    data: 股票历史数据 (DataFrame)，需要 High / Low / Close 列
+    entry_periods: 候选入场周期
+    exit_periods: 候选离场周期
+    train_size: 样本内窗口长度（K线数，默认约2年）
+    test_size: 样本外窗口长度（K线数，默认约半年）
+    step: 每折向前移动的K线数（默认等于 test_size，样本外窗口首尾相接）
+    metric: 样本内评分方式，"sharpe" 或 "return"
+
+    返回:
+    dict: {"folds": 每折选中的参数 DataFrame, "equity": 拼接后的样本外权益曲线 Series}
+    """
+    if metric not in METRICS:
+        raise ValueError(f"metric 必须是 {METRICS} 之一")
+
+    step = step or test_size
+    close = data['Close'].to_numpy(dtype=float)
+    dates = data['Date'].to_numpy() if 'Date' in data else data.index.to_numpy()
+    size = len(close)
+
+    train_starts = np.arange(0, size - train_size - test_size + 1, step)
+    if len(train_starts) == 0:
+        raise ValueError(f"数据不足：至少需要 {train_size + test_size} 根K线")
+    train_ends = train_starts + train_size
+
+    table = RangeQueryTable.from_data(data)
+    entry_levels = {n: table.entry_levels(n) for n in entry_periods}
+    exit_levels = {m: table.exit_levels(m) for m in exit_periods}
+
+    combos = [(n, m) for n in entry_periods for m in exit_periods]
+    scores = np.empty((len(combos), len(train_starts)))
+
+    for i, (n, m) in enumerate(combos):
+        positions = breakout_positions(close, entry_levels[n], exit_levels[m])
+        returns = strategy_returns(close, positions)
+        scores[i] = _window_scores(returns, train_starts + 1, train_ends, metric)
+
+    best = np.argmax(np.where(np.isnan(scores), -np.inf, scores), axis=0)
+
+    folds = []
+    oos_returns = []
+    chosen_returns = {}
+    for fold, (start, end) in enumerate(zip(train_starts, train_ends)):
+        n, m = combos[best[fold]]
+        test_end = end + test_size
+
+        # 样本外收益只需要为被选中的组合重新计算
+        if (n, m) not in chosen_returns:
+            positions = breakout_positions(close, entry_levels[n], exit_levels[m])
+            chosen_returns[(n, m)] = strategy_returns(close, positions)
+        returns = chosen_returns[(n, m)][end:test_end]
+        oos_returns.append(pd.Series(returns, index=dates[end:test_end]))
+
+        folds.append({
+            'fold': fold,
+            'train_start': dates[start],
+            'train_end': dates[end - 1],
+            'test_start': dates[end],
+            'test_end': dates[test_end - 1],
+            'entry_period': n,
+            'exit_period': m,
+            'in_sample_score': float(scores[best[fold], fold]),
+            'out_of_sample_return': float(np.prod(1 + returns) - 1)
+        })
+
+    # 步长小于 test_size 时样本外窗口会重叠，重叠部分以后面的折为准
+    stitched = pd.concat(oos_returns)
+    stitched = stitched[~stitched.index.duplicated(keep='last')]
+    equity = (1 + stitched).cumprod().rename('equity')
+
+    return {"folds": pd.DataFrame(folds), "equity": equity}
+
+
+def _window_scores(returns, starts, ends, metric):
+    """
+    用前缀和一次算出所有窗口 [start, end) 的得分
+
+    start 从窗口第二根K线算起，因为第一根K线的收益属于上一个窗口的持仓
+    """
+    if metric == 'return':
+        log_growth = np.concatenate(([0.0], np.cumsum(np.log1p(returns))))
+        return np.expm1(log_growth[ends] - log_growth[starts])
+
+    total = np.concatenate(([0.0], np.cumsum(returns)))
+    squares = np.concatenate(([0.0], np.cumsum(returns * returns)))
+    count = ends - starts
+    mean = (total[ends] - total[starts]) / count
+    variance = (squares[ends] - squares[starts]) / count - mean * mean
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sharpe = mean / np.sqrt(np.maximum(variance, 0)) * math.sqrt(TRADING_DAYS)
+    return np.where(variance > 1e-18, sharpe, np.nan)
@@ -0,0 +1,237 @@
+import asyncio
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.core.config import config
+from app.database.connection import Base, get_async_db, get_async_sessionmaker
+from app.database.models import AlertHistory, Stock
+from app.api import routes
+from app.main import app
+from app.services import analysis, providers
+from app.services.broadcast import SignalBroadcaster
+from app.services.disk_cache import load_bars
+from app.services.memory_cache import data_cache, signal_cache
+from app.services.response_cache import response_cache
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    """使用 SQLite 数据库和合成数据源的测试客户端"""
+    monkeypatch.setattr(config, "CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setattr(config, "OFFLINE", False)
+    monkeypatch.setattr(config, "MARKET_DATA_PROVIDER", "synthetic")
+    monkeypatch.setattr(providers, "_instances", {})
+    broadcaster = SignalBroadcaster()
+    monkeypatch.setattr(analysis, "broadcaster", broadcaster)
+    monkeypatch.setattr(routes, "broadcaster", broadcaster)
+    data_cache.clear()
+    signal_cache.clear()
+    response_cache.clear()
+
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'test.db'}")
+    sessions = async_sessionmaker(engine, expire_on_commit=False, autoflush=False)
+
+    async def create_tables():
+        async with engine.begin() as connection:
+            await connection.run_sync(Base.metadata.create_all)
+
+    asyncio.run(create_tables())
+
+    async def override():
+        async with sessions() as db:
+            yield db
+
+    app.dependency_overrides[get_async_db] = override
+    app.dependency_overrides[get_async_sessionmaker] = lambda: sessions
+    with TestClient(app) as test_client:
+        test_client.sessions = sessions
+        yield test_client
+    app.dependency_overrides.clear()
+    asyncio.run(engine.dispose())
+    data_cache.clear()
+    signal_cache.clear()
+
+
+def _count(client, model):
+    async def count():
+        async with client.sessions() as db:
+            return (await db.execute(select(func.count()).select_from(model))).scalar_one()
+    return asyncio.run(count())
+
+
+def test_analyze_saves_alert(client):
+    """分析结果写入数据库并返回提醒 ID"""
+    response = client.post("/analyze", json={"symbol": "aapl"})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["symbol"] == "AAPL"
+    assert body["signal"] in ("BUY", "SELL", "HOLD")
+    assert body["alert_id"] == 1
+
+    second = client.post("/analyze", json={"symbol": "AAPL"})
+    assert second.json()["alert_id"] == 2
+    assert _count(client, Stock) == 1
+    assert _count(client, AlertHistory) == 2
+
+
+def test_analyze_rejects_bad_interval(client):
+    """不支持的数据间隔返回 400"""
+    response = client.post("/analyze", json={"symbol": "AAPL", "interval": "7m"})
+    assert response.status_code == 400
+
+
+def test_batch_streams_results_in_one_pass(client, monkeypatch):
+    """批量分析：每组只批量下载一次，结果逐行返回并全部写入数据库"""
+    provider = providers.get_provider()
+    calls = []
+    original = provider.fetch_many
+
+    def spy(symbols, period="1mo", interval="1d"):
+        calls.append((list(symbols), period, interval))
+        return original(symbols, period, interval)
+
+    monkeypatch.setattr(provider, "fetch_many", spy)
+
+    requests = [{"symbol": symbol} for symbol in ["aapl", "msft", "tsla"]]
+    requests.append({"symbol": "nvda", "period": "6mo"})
+    requests.append({"symbol": "amd", "interval": "7m"})
+    requests.append({"symbol": "meta", "period": "5d"})  # 不足 20 根K线
+
+    response = client.post("/analyze/batch", json={"requests": requests})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    results = {line["symbol"]: line for line in lines[:-1]}
+
+    assert lines[-1] == {"done": True, "saved": 5}
+    assert results["AMD"]["status"] == 400
+    assert {results[symbol]["signal"] for symbol in ["AAPL", "MSFT", "TSLA", "NVDA"]} <= {"BUY", "SELL", "HOLD"}
+    assert sorted(calls) == [
+        (["AAPL", "MSFT", "TSLA"], "2mo", "1d"), (["META"], "5d", "1d"), (["NVDA"], "6mo", "1d")
+    ]
+    assert _count(client, AlertHistory) == 5
+    assert _count(client, Stock) == 5
+
+    # 与单只股票的分析结果一致
+    signal_cache.clear()
+    single = client.post("/analyze", json={"symbol": "MSFT"}).json()
+    assert single["signal"] == results["MSFT"]["signal"]
+    assert single["current_price"] == results["MSFT"]["current_price"]
+    assert single["high_20d"] == results["MSFT"]["high_20d"]
+
+    # 数据不足时通道按已有的K线计算，和单只股票的分析一致
+    short = client.post("/analyze", json={"symbol": "META", "period": "5d"}).json()
+    assert results["META"]["signal"] == short["signal"] == "HOLD"
+    assert results["META"]["high_20d"] == short["high_20d"] is not None
+    assert results["META"]["low_10d"] == short["low_10d"]
+
+
+def test_batch_offline_reads_disk_cache(client, monkeypatch):
+    """批量下载的日线写回本地缓存；离线模式下只读缓存，不调用 fetch_many"""
+    online = client.post("/analyze/batch", json={"requests": [{"symbol": "aapl"}]})
+    online = json.loads(online.text.splitlines()[0])
+    assert load_bars("AAPL")[0] is not None
+
+    data_cache.clear()
+    signal_cache.clear()
+    monkeypatch.setattr(config, "OFFLINE", True)
+    provider = providers.get_provider()
+    calls = []
+
+    def forbidden(*args, **kwargs):
+        calls.append(args)
+        raise AssertionError("离线模式不应访问数据源")
+
+    monkeypatch.setattr(provider, "fetch_many", forbidden)
+    monkeypatch.setattr(provider, "history", forbidden)
+
+    response = client.post("/analyze/batch", json={"requests": [{"symbol": "AAPL"}, {"symbol": "MSFT"}]})
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    results = {line["symbol"]: line for line in lines[:-1]}
+
+    assert calls == []
+    assert results["AAPL"]["signal"] == online["signal"]
+    assert results["AAPL"]["current_price"] == online["current_price"]
+    assert results["MSFT"]["status"] == 404
+
+
+def test_batch_matches_single_for_resampled_intervals(client):
+    """周线由日线合成，批量和单只分析结果相同；分钟线回看范围太长时两边都返回 400"""
+    request = {"symbol": "AAPL", "period": "2y", "interval": "1wk"}
+    response = client.post("/analyze/batch", json={"requests": [request, {**request, "symbol": "MSFT"}]})
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    batch = {line["symbol"]: line for line in lines[:-1]}
+
+    data_cache.clear()
+    signal_cache.clear()
+    for symbol in ["AAPL", "MSFT"]:
+        single = client.post("/analyze", json={**request, "symbol": symbol}).json()
+        for field in ("signal", "current_price", "high_20d", "low_10d"):
+            assert batch[symbol][field] == single[field]
+
+    intraday = {"symbol": "AAPL", "period": "2mo", "interval": "5m"}
+    assert client.post("/analyze", json=intraday).status_code == 400
+    line = json.loads(client.post("/analyze/batch", json={"requests": [intraday]}).text.splitlines()[0])
+    assert line["status"] == 400
+
+
+def test_batch_commit_failure_returns_no_alert_ids(client, monkeypatch):
+    """提交失败时这一组回滚，返回 500 而不是已经不存在的 alert_id"""
+    async def fail(self):
+        raise RuntimeError("disk full")
+
+    requests = [{"symbol": "AAPL"}, {"symbol": "MSFT"}, {"symbol": "AMD", "interval": "7m"}]
+    with monkeypatch.context() as patch:
+        patch.setattr(AsyncSession, "commit", fail)
+        response = client.post("/analyze/batch", json={"requests": requests})
+
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    results = {line["symbol"]: line for line in lines[:-1]}
+
+    assert all("alert_id" not in line for line in lines)
+    assert results["AAPL"]["status"] == results["MSFT"]["status"] == 500
+    assert "disk full" in results["AAPL"]["error"]
+    assert results["AMD"]["status"] == 400
+    assert lines[-1] == {"done": False, "saved": 0}
+    assert _count(client, AlertHistory) == 0
+
+
+def test_websocket_pushes_new_signals(client):
+    """WebSocket 订阅后，分析产生的新信号会被推送"""
+    with client.websocket_connect("/ws/signals?symbols=aapl") as websocket:
+        client.post("/analyze", json={"symbol": "MSFT"})
+        client.post("/analyze", json={"symbol": "AAPL"})
+
+        message = json.loads(websocket.receive_text())
+        assert message["symbol"] == "AAPL"
+        assert message["signal"] in ("BUY", "SELL", "HOLD")
+        assert message["previous_signal"] is None
+
+        # 格式不对的订阅返回错误，连接和原来的订阅保持不变
+        for invalid in ("AAPL", 3, None, ["AAPL", 1]):
+            websocket.send_text(json.dumps({"subscribe": invalid}))
+            assert json.loads(websocket.receive_text())["type"] == "error"
+
+        websocket.send_text(json.dumps({"subscribe": ["msft"]}))
+        client.post("/analyze", json={"symbol": "MSFT", "entry_period": 30})
+        assert json.loads(websocket.receive_text())["symbol"] == "MSFT"
+
+
+def test_metrics_endpoint_reports_stages(client):
+    """/metrics 输出各阶段耗时和缓存命中率"""
+    client.post("/analyze", json={"symbol": "AAPL"})
+    client.post("/analyze", json={"symbol": "AAPL"})
+
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    for name in ("fetch", "strategy", "db_write", "serialize"):
+        assert f'turtle_stage_seconds_count{{stage="{name}"}}' in response.text
+    assert 'turtle_cache_hits_total{cache="signals"}' in response.text
@@ -0,0 +1,74 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.services.async_fetch import AsyncFetcher
+
+
+class SlowFetch:
+    """模拟一个慢速下载，记录调用次数和最大并发数"""
+
+    def __init__(self, delay=0.05, fail=False):
+        self.delay = delay
+        self.fail = fail
+        self.calls = []
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, symbol, period, **kwargs):
+        with self._lock:
+            self.calls.append((symbol, period))
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        time.sleep(self.delay)
+        with self._lock:
+            self.active -= 1
+        if self.fail:
+            raise RuntimeError("provider down")
+        return f"{symbol}:{period}"
+
+
+def test_single_flight():
+    """同一只股票的并发请求只下载一次"""
+    fetch = SlowFetch()
+    fetcher = AsyncFetcher(fetch, max_workers=4, max_concurrency=4)
+
+    async def main():
+        return await asyncio.gather(*(fetcher.fetch("aapl", "2mo") for _ in range(20)))
+
+    results = asyncio.run(main())
+
+    assert results == ["aapl:2mo"] * 20
+    assert len(fetch.calls) == 1
+    assert fetcher.coalesced == 19
+
+
+def test_concurrency_limit():
+    """不同股票的请求受信号量限制"""
+    fetch = SlowFetch()
+    fetcher = AsyncFetcher(fetch, max_workers=8, max_concurrency=2)
+    symbols = [f"S{i}" for i in range(6)]
+
+    results = asyncio.run(fetcher.fetch_many(symbols, "1mo"))
+
+    assert results == {symbol: f"{symbol}:1mo" for symbol in symbols}
+    assert fetch.max_active == 2
+
+
+def test_errors_shared_and_not_cached():
+    """下载出错时所有等待方都收到异常，之后的请求重新下载"""
+    fetch = SlowFetch(fail=True)
+    fetcher = AsyncFetcher(fetch, max_workers=2, max_concurrency=2)
+
+    async def main():
+        return await asyncio.gather(*(fetcher.fetch("X") for _ in range(3)), return_exceptions=True)
+
+    results = asyncio.run(main())
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(fetcher.fetch("X"))
+    assert len(fetch.calls) == 2
@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.services.backtest import average_true_range, run_backtest
+
+
+def _make_data(*segments):
+    """把几段收盘价拼成 OHLC 数据（High/Low 为收盘价 ±1）"""
+    close = np.concatenate([np.asarray(segment, dtype=float) for segment in segments])
+    return pd.DataFrame({
+        'Date': pd.bdate_range("2024-01-01", periods=len(close)),
+        'Open': close,
+        'High': close + 1,
+        'Low': close - 1,
+        'Close': close
+    })
+
+
+def _trend_data():
+    """30 天横盘 → 20 天上涨 → 跳空暴跌"""
+    return _make_data(100 + np.tile([0.5, -0.5], 15), np.linspace(101, 130, 20), np.full(5, 90.0))
+
+
+def test_average_true_range_wilder():
+    """N 值按 Wilder 方法平滑"""
+    data = _trend_data()
+    atr = average_true_range(data['High'], data['Low'], data['Close'], 20)
+
+    high, low, close = data['High'].to_numpy(), data['Low'].to_numpy(), data['Close'].to_numpy()
+    tr = [high[0] - low[0]] + [
+        max(high[i] - low[i], abs(high[i] - close[i - 1]), abs(low[i] - close[i - 1]))
+        for i in range(1, len(close))
+    ]
+    expected = np.mean(tr[:20])
+    assert np.isnan(atr[:19]).all()
+    assert atr[19] == pytest.approx(expected)
+    for i in range(20, len(close)):
+        expected = (19 * expected + tr[i]) / 20
+        assert atr[i] == pytest.approx(expected)
+
+
+def test_pyramiding_and_exit():
+    """突破入场，逐步加仓到 4 个单位，跌破离场通道时按开盘价离场"""
+    result = run_backtest(_trend_data(), system=1)
+    trades = result['trades']
+
+    assert len(trades) == 1
+    trade = trades.iloc[0]
+    assert trade['units'] == 4
+    assert trade['exit_reason'] == 'exit'
+    assert trade['exit_price'] == 90.0
+
+    stats = result['stats']
+    assert stats['trades'] == 1
+    assert stats['final_equity'] == pytest.approx(100000 + trades['pnl'].sum())
+    assert result['equity'].iloc[-1] == pytest.approx(stats['final_equity'])
+
+
+def test_stop_before_exit_channel():
+    """刚入场就暴跌时，2N 止损先于离场通道触发"""
+    data = _make_data(100 + np.tile([0.5, -0.5], 15), [101, 102, 103], np.full(5, 90.0))
+    trades = run_backtest(data, system=1)['trades']
+
+    assert len(trades) == 1
+    assert trades['exit_reason'].iloc[0] == 'stop'
+    assert trades['exit_price'].iloc[0] == 90.0
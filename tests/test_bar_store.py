@@ -0,0 +1,111 @@
+import numpy as np
+import pandas as pd
+
+from app.services import bar_store
+from app.services.bar_store import BarStore
+from app.services.strategy import turtle_strategy
+
+
+def _bars(start, n, seed=0):
+    """生成 n 根日线"""
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 1, n))
+    return pd.DataFrame({
+        'Date': pd.bdate_range(start, periods=n).date,
+        'Open': close,
+        'High': close + 1,
+        'Low': close - 1,
+        'Close': close,
+        'Volume': rng.integers(1000, 2000, n)
+    })
+
+
+def test_append_and_read_roundtrip(tmp_path):
+    """写入后读出的数据不变，读取结果是 memmap 视图"""
+    store = BarStore(tmp_path)
+    data = _bars("2024-01-01", 50)
+
+    assert store.append("aapl", data) == 50
+
+    bars = store.read("AAPL")
+    assert isinstance(bars['Close'], np.memmap)
+    np.testing.assert_array_equal(bars['Close'], data['Close'])
+    assert store.symbols() == ["AAPL"]
+
+    frame = store.read_frame("AAPL")
+    pd.testing.assert_frame_equal(frame, data.astype({'Volume': float}))
+
+
+def test_incremental_append_overwrites_last_bar(tmp_path):
+    """增量追加：旧数据忽略，最后一根覆盖，新数据追加"""
+    store = BarStore(tmp_path)
+    data = _bars("2024-01-01", 30)
+    store.append("AAPL", data.iloc[:20])
+
+    update = data.iloc[15:].copy()
+    update.loc[19, 'Close'] = 999.0
+    update.loc[15, 'Close'] = -1.0
+
+    assert store.append("AAPL", update) == 10
+
+    bars = store.read("AAPL")
+    assert len(bars['Close']) == 30
+    assert bars['Close'][19] == 999.0
+    assert bars['Close'][15] == data['Close'][15]
+
+
+def test_overwrite_hides_last_bar_while_rewriting(tmp_path, monkeypatch):
+    """覆盖最后一根K线的过程中，读取方看不到这一行（不会读到改了一半的K线）"""
+    store = BarStore(tmp_path)
+    data = _bars("2024-01-01", 20)
+    store.append("AAPL", data)
+
+    seen = []
+    write_row = bar_store._write_row
+
+    def spy(file_path, index, value):
+        bars = store.read("AAPL")
+        seen.append((store.length("AAPL"), float(bars['Close'][-1])))
+        write_row(file_path, index, value)
+
+    monkeypatch.setattr(bar_store, "_write_row", spy)
+
+    update = data.iloc[19:].copy()
+    update['Close'] = 999.0
+    update['High'] = 1000.0
+    assert store.append("AAPL", update) == 0
+
+    assert seen and all(entry == (19, data['Close'][18]) for entry in seen)
+    bars = store.read("AAPL")
+    assert len(bars['Close']) == 20
+    assert (bars['Close'][-1], bars['High'][-1]) == (999.0, 1000.0)
+
+
+def test_uncommitted_tail_is_invisible(tmp_path):
+    """写到一半的数据不会被读到，下次写入时被清理"""
+    store = BarStore(tmp_path)
+    data = _bars("2024-01-01", 30)
+    store.append("AAPL", data.iloc[:20])
+
+    # 模拟崩溃：只写了一列
+    with open(store.path("AAPL") / "Close.bin", "ab") as f:
+        f.write(np.ones(5).tobytes())
+
+    assert len(store.read("AAPL")['Close']) == 20
+
+    store.append("AAPL", data.iloc[20:])
+    np.testing.assert_array_equal(store.read("AAPL")['Close'], data['Close'])
+
+
+def test_views_feed_strategy(tmp_path):
+    """memmap 视图可以直接传给 turtle_strategy，结果与 DataFrame 相同"""
+    store = BarStore(tmp_path)
+    data = _bars("2024-01-01", 80, seed=3)
+    store.append("AAPL", data)
+
+    bars = store.read("AAPL", tail=40)
+    assert len(bars['Close']) == 40
+    assert turtle_strategy(bars) == turtle_strategy(data.tail(40))
+
+    since = store.read("AAPL", start=data['Date'][70])
+    assert len(since['Close']) == 10
@@ -0,0 +1,94 @@
+import asyncio
+import json
+
+from app.services.broadcast import SignalBroadcaster, sse_events
+
+
+def _result(signal="HOLD", high=110.0, low=90.0, price=100.0):
+    return {"signal": signal, "current_price": price, "high_20d": high, "low_10d": low}
+
+
+def test_fan_out_only_on_change():
+    """信号或通道变化时推送，同一条消息发给所有订阅者"""
+    broadcaster = SignalBroadcaster(queue_size=10)
+
+    async def main():
+        aapl = broadcaster.subscribe(["aapl"])
+        everything = broadcaster.subscribe()
+        msft = broadcaster.subscribe(["MSFT"])
+
+        params = ("AAPL", "2mo", "1d", 20, 10)
+        assert broadcaster.publish_signal(*params, _result())
+        assert not broadcaster.publish_signal(*params, _result(price=101.0))
+        assert broadcaster.publish_signal(*params, _result("BUY", high=120.0))
+        await asyncio.sleep(0)
+
+        first, second = await aapl.get(), await aapl.get()
+        assert json.loads(first)["signal"] == "HOLD"
+        assert json.loads(second)["previous_signal"] == "HOLD"
+        assert json.loads(second)["entry_channel"] == 120.0
+        assert await everything.get() is first
+        assert msft.queue.empty()
+        assert broadcaster.connections == 3
+
+        # 新订阅者先收到最近一条消息
+        late = broadcaster.subscribe(["AAPL"])
+        assert await late.get() == second
+
+        for subscription in (aapl, everything, msft, late):
+            broadcaster.unsubscribe(subscription)
+        assert broadcaster.connections == 0
+        assert await aapl.get() is None
+
+    asyncio.run(main())
+
+
+def test_slow_consumer_drops_oldest():
+    """慢客户端的队列满了以后丢弃最旧的消息"""
+    broadcaster = SignalBroadcaster(queue_size=2)
+
+    async def main():
+        subscription = broadcaster.subscribe(["AAPL"])
+        for i in range(5):
+            broadcaster.publish_signal("AAPL", "2mo", "1d", 20, 10, _result(high=100.0 + i))
+        await asyncio.sleep(0)
+
+        assert subscription.dropped == 3
+        assert json.loads(await subscription.get())["entry_channel"] == 103.0
+
+    asyncio.run(main())
+
+
+def test_state_is_bounded():
+    """记住的参数组合和最新消息有上限，淘汰最久没更新的"""
+    broadcaster = SignalBroadcaster(queue_size=2, max_keys=3)
+
+    for i in range(10):
+        broadcaster.publish_signal(f"S{i}", "2mo", "1d", 20, 10, _result())
+    broadcaster.publish_signal("S7", "2mo", "1d", 20, 10, _result("BUY"))
+    broadcaster.publish_signal("S10", "2mo", "1d", 20, 10, _result())
+
+    assert len(broadcaster._state) == len(broadcaster._latest) == 3
+    assert list(broadcaster._latest) == ["S9", "S7", "S10"]
+    # 被淘汰的组合重新当作新信号推送
+    assert broadcaster.publish_signal("S0", "2mo", "1d", 20, 10, _result())
+
+
+def test_sse_format_and_heartbeat():
+    """SSE 输出 event/data 格式，空闲时发送心跳"""
+    broadcaster = SignalBroadcaster()
+
+    async def main():
+        subscription = broadcaster.subscribe(["AAPL"])
+        events = sse_events(subscription, heartbeat=0.01)
+
+        assert await events.__anext__() == ": ping\n\n"
+        broadcaster.publish_signal("AAPL", "2mo", "1d", 20, 10, _result())
+        chunk = await events.__anext__()
+        assert chunk.startswith("event: signal\ndata: {")
+        assert chunk.endswith("\n\n")
+
+        broadcaster.unsubscribe(subscription)
+        assert [chunk async for chunk in events] == []
+
+    asyncio.run(main())
@@ -0,0 +1,46 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+from app.services.channel import DonchianChannel
+from app.services.strategy import turtle_signals
+
+
+def _random_data(n=120, seed=1):
+    """生成随机价格数据"""
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 2, n))
+    return pd.DataFrame({
+        'Close': close,
+        'High': close + rng.uniform(0, 2, n),
+        'Low': close - rng.uniform(0, 2, n)
+    })
+
+
+def test_streaming_matches_vectorized():
+    """逐根推入的结果和向量化计算一致"""
+    data = _random_data()
+    expected = turtle_signals(data, 20, 10)
+    channel = DonchianChannel(20, 10)
+
+    for i, (high, low, close) in enumerate(zip(data['High'], data['Low'], data['Close'])):
+        assert channel.update(high, low, close) == expected['Signal'].iloc[i]
+        if channel.ready:
+            assert channel.entry_channel == expected['EntryChannel'].iloc[i]
+            assert channel.exit_channel == expected['ExitChannel'].iloc[i]
+
+
+def test_snapshot_restore():
+    """快照恢复后继续推入，结果不变"""
+    data = _random_data()
+    head, tail = data.iloc[:60], data.iloc[60:]
+
+    full = DonchianChannel.from_data(data, 20, 10)
+    channel = DonchianChannel.from_data(head, 20, 10)
+    restored = DonchianChannel.restore(json.loads(json.dumps(channel.snapshot())))
+
+    for high, low, close in zip(tail['High'], tail['Low'], tail['Close']):
+        restored.update(high, low, close)
+
+    assert restored.snapshot() == full.snapshot()
@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+
+from app.services.backtest import run_backtest
+from app.services.compact import CompactBars
+from app.services.strategy import turtle_strategy, turtle_signals
+
+
+def _frame(n=120, seed=1):
+    """生成 fetch_data 格式的数据（Date 为 datetime.date）"""
+    rng = np.random.default_rng(seed)
+    close = 50 + np.cumsum(rng.normal(0, 1, n))
+    return pd.DataFrame({
+        'Date': pd.bdate_range("2023-01-02", periods=n).date,
+        'Open': close + rng.normal(0, 0.3, n),
+        'High': close + rng.uniform(0.5, 1.5, n),
+        'Low': close - rng.uniform(0.5, 1.5, n),
+        'Close': close,
+        'Volume': rng.integers(1_000_000, 5_000_000, n)
+    })
+
+
+def test_dtypes_and_size():
+    """价格 float32、成交量 uint32、日期 int32，内存明显更小"""
+    data = _frame()
+    bars = CompactBars.from_frame(data)
+
+    assert bars.close.dtype == np.float32
+    assert bars.volume.dtype == np.uint32
+    assert bars.day.dtype == np.int32
+    assert bars.nbytes * 3 < data.memory_usage(deep=True).sum()
+
+
+def test_large_volume_uses_int64():
+    """超过 uint32 上限的成交量用 int64"""
+    data = _frame(5)
+    data['Volume'] = 5_000_000_000
+    assert CompactBars.from_frame(data).volume.dtype == np.int64
+
+
+def test_roundtrip():
+    """转回 DataFrame 后日期和成交量不变，价格误差在 float32 精度内"""
+    data = _frame()
+    frame = CompactBars.from_frame(data).to_frame()
+
+    assert list(frame['Date']) == list(data['Date'])
+    np.testing.assert_array_equal(frame['Volume'], data['Volume'])
+    np.testing.assert_allclose(frame['Close'], data['Close'], rtol=1e-6)
+
+
+def test_strategy_functions_accept_compact():
+    """策略和回测函数可以直接使用 CompactBars"""
+    data = _frame().astype({column: np.float32 for column in ['Open', 'High', 'Low', 'Close']})
+    bars = CompactBars.from_frame(data)
+
+    assert turtle_strategy(bars) == turtle_strategy(data)
+    assert turtle_strategy(bars.tail(30)) == turtle_strategy(data.tail(30))
+    assert list(turtle_signals(bars)['Signal']) == list(turtle_signals(data)['Signal'])
+
+    result = run_backtest(bars)
+    assert result['stats'] == run_backtest(data)['stats']
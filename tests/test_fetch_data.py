@@ -0,0 +1,180 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.core.config import config
+from app.services import fetch_data as fetch_module
+from app.services import disk_cache
+from app.services.disk_cache import cache_path, load_bars, save_bars
+from app.services.fetch_data import fetch_data
+from app.services.memory_cache import data_cache
+
+
+class FakeTicker:
+    """模拟 yf.Ticker，记录每次 history() 的参数"""
+
+    calls = []
+    dates = pd.bdate_range(end=pd.Timestamp.today().normalize(), periods=300, tz="America/New_York")
+
+    def __init__(self, symbol):
+        self.symbol = symbol
+
+    def history(self, period=None, start=None, end=None, interval="1d"):
+        FakeTicker.calls.append({"period": period, "start": start, "end": end})
+        index = self.dates
+        if start is not None:
+            index = index[index.date >= pd.Timestamp(start).date()]
+        if end is not None:
+            index = index[index.date < pd.Timestamp(end).date()]
+        close = np.arange(len(index), dtype=float) + 100
+        frame = pd.DataFrame({
+            'Open': close, 'High': close + 1, 'Low': close - 1, 'Close': close,
+            'Volume': np.full(len(index), 1000), 'Dividends': 0.0
+        }, index=pd.DatetimeIndex(index, name='Date'))
+        return frame
+
+
+@pytest.fixture
+def fake_yahoo(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(config, "OFFLINE", False)
+    monkeypatch.setattr(fetch_module.yf, "Ticker", FakeTicker)
+    FakeTicker.calls = []
+    data_cache.clear()
+    return FakeTicker
+
+
+def test_cache_hit_skips_network(fake_yahoo):
+    """缓存有效期内不再下载"""
+    first = fetch_data("AAPL", "3mo")
+    second = fetch_data("AAPL", "1mo")
+
+    assert len(fake_yahoo.calls) == 1
+    assert second['Date'].min() >= first['Date'].min()
+    assert list(second.columns) == ['Date', 'Open', 'High', 'Low', 'Close', 'Volume']
+
+
+def test_stale_cache_only_fetches_gap(fake_yahoo, monkeypatch):
+    """缓存过期后只下载最后一天之后的数据，周期变长时只向前补缺口"""
+    fetch_data("AAPL", "1mo")
+    monkeypatch.setattr(config, "CACHE_MAX_AGE", 0)
+    data_cache.clear()
+
+    fake_yahoo.calls = []
+    data = fetch_data("AAPL", "6mo")
+    cached, meta = load_bars("AAPL")
+
+    assert len(fake_yahoo.calls) == 2
+    assert fake_yahoo.calls[0]["start"] == cached['Date'].max()
+    assert fake_yahoo.calls[1]["end"] is not None
+    assert data['Date'].is_monotonic_increasing and data['Date'].is_unique
+    assert len(cached) == len(data)
+
+
+def test_offline_mode(fake_yahoo):
+    """离线模式只读缓存"""
+    assert fetch_data("MSFT", "1mo", offline=True) is None
+
+    fetch_data("MSFT", "1mo")
+    fake_yahoo.calls = []
+    data = fetch_data("MSFT", "5d", offline=True)
+
+    assert fake_yahoo.calls == []
+    assert len(data) == 5
+
+
+def test_memory_cache_hit(fake_yahoo):
+    """同一进程内的重复请求直接返回内存中的 DataFrame"""
+    first = fetch_data("TSLA", "1mo")
+    hits = data_cache.hits
+    second = fetch_data("tsla", "1mo")
+
+    assert second is first
+    assert data_cache.hits == hits + 1
+    assert len(fake_yahoo.calls) == 1
+
+
+def test_compact_mode(fake_yahoo):
+    """compact=True 返回 CompactBars，与 DataFrame 共用磁盘缓存"""
+    from app.services.compact import CompactBars
+
+    frame = fetch_data("AAPL", "1mo")
+    bars = fetch_data("AAPL", "1mo", compact=True)
+
+    assert isinstance(bars, CompactBars)
+    assert len(bars) == len(frame)
+    assert len(fake_yahoo.calls) == 1
+    assert fetch_data("AAPL", "1mo", compact=True) is bars
+
+
+def test_intraday_views_share_one_download(fake_yahoo, monkeypatch):
+    """同一只股票的 5m/15m/1h 只下载一次基础分钟线"""
+    minutes = pd.date_range("2024-03-04 09:30", "2024-03-04 15:59", freq="1min", tz="America/New_York")
+
+    class FakeMinuteTicker(FakeTicker):
+        def history(self, period=None, start=None, end=None, interval="1d"):
+            FakeTicker.calls.append({"period": period, "interval": interval})
+            close = np.linspace(100, 110, len(minutes))
+            return pd.DataFrame({
+                'Open': close, 'High': close + 1, 'Low': close - 1, 'Close': close,
+                'Volume': np.full(len(minutes), 10)
+            }, index=pd.DatetimeIndex(minutes, name='Datetime'))
+
+    monkeypatch.setattr(fetch_module.yf, "Ticker", FakeMinuteTicker)
+
+    views = {interval: fetch_data("AAPL", "5d", interval=interval) for interval in ["5m", "15m", "1h"]}
+
+    assert fake_yahoo.calls == [{"period": "5d", "interval": "1m"}]
+    assert [len(views[interval]) for interval in ["5m", "15m", "1h"]] == [78, 26, 7]
+    assert views["1h"]['Date'].iloc[0] == pd.Timestamp("2024-03-04 09:30")
+
+
+@pytest.mark.parametrize("symbol", ["../etc/passwd", "AAPL/../../x", "..", "A B", "a\\b"])
+def test_rejects_unsafe_symbols(fake_yahoo, tmp_path, symbol):
+    """包含路径分隔符或 ".." 的股票代码不会生成缓存路径，也不会下载"""
+    with pytest.raises(ValueError):
+        cache_path(symbol)
+
+    FakeTicker.calls = []
+    assert fetch_data(symbol, "1mo") is None
+    assert FakeTicker.calls == []
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_accepts_index_and_class_symbols(tmp_path):
+    """指数、外汇和 B 股等代码可以正常缓存"""
+    for symbol in ["BRK.B", "^GSPC", "EURUSD=X", "brk-b"]:
+        assert cache_path(symbol, directory=tmp_path).parent == tmp_path
+
+
+def test_concurrent_cache_writes(tmp_path):
+    """多个线程同时写同一只股票：不报错、不留临时文件，缓存是其中一次完整的写入"""
+    dates = pd.bdate_range("2024-01-01", periods=50).date
+    frames = [
+        pd.DataFrame({'Date': dates, **{column: np.full(50, float(i)) for column in disk_cache.PRICE_COLUMNS}})
+        for i in range(16)
+    ]
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(
+            lambda frame: save_bars("AAPL", frame, covered_from=dates[0], directory=tmp_path), frames
+        ))
+
+    assert all(results)
+    assert [path.name for path in tmp_path.iterdir()] == ["AAPL_1d.npz"]
+    data, _ = load_bars("AAPL", directory=tmp_path)
+    assert data['Close'].nunique() == 1 and len(data) == 50
+
+
+def test_cache_write_failure_does_not_fail_fetch(fake_yahoo, tmp_path, monkeypatch):
+    """缓存写入失败只打印警告，下载到的数据照常返回，不留临时文件"""
+    def broken(*args, **kwargs):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(disk_cache.np, "savez", broken)
+
+    data = fetch_data("AAPL", "1mo")
+    assert data is not None and len(data) > 0
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,127 @@
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.database.connection import Base, get_db
+from app.database.models import AlertHistory
+from app.main import app
+from app.services.response_cache import response_cache
+
+START = datetime(2024, 1, 1, 9, 30)
+
+
+@pytest.fixture
+def client(tmp_path):
+    """使用 SQLite 数据库的测试客户端，预先写入 25 条提醒记录"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'history.db'}")
+    Base.metadata.create_all(bind=engine)
+    sessions = sessionmaker(bind=engine)
+
+    with sessions() as db:
+        for i in range(25):
+            db.add(AlertHistory(
+                symbol="AAPL" if i % 2 == 0 else "MSFT",
+                signal="BUY" if i % 3 == 0 else "HOLD",
+                price=100.0 + i,
+                message=f"alert {i}",
+                # 每两条共用一个时间，检验相同时间按 id 继续翻页
+                created_at=START + timedelta(minutes=i // 2)
+            ))
+        db.commit()
+
+    def override():
+        with sessions() as db:
+            yield db
+
+    app.dependency_overrides[get_db] = override
+    response_cache.clear()
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+    response_cache.clear()
+    engine.dispose()
+
+
+def _pages(client, **params):
+    """沿着 X-Next-Cursor 翻完所有页"""
+    pages = []
+    seen = set()
+    cursor = None
+    while True:
+        query = dict(params, **({"cursor": cursor} if cursor else {}))
+        response = client.get("/history", params=query)
+        assert response.status_code == 200
+        pages.append(response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            return pages
+        assert cursor not in seen, "游标没有前进"
+        seen.add(cursor)
+
+
+def test_history_pages_cover_all_rows_once(client):
+    """游标翻页不重复、不遗漏，并按时间和 id 倒序"""
+    pages = _pages(client, limit=4)
+
+    assert [len(page) for page in pages] == [4, 4, 4, 4, 4, 4, 1]
+    ids = [row["id"] for page in pages for row in page]
+    assert ids == list(range(25, 0, -1))
+
+
+def test_history_filters(client):
+    """按股票、信号和时间范围过滤"""
+    rows = [row for page in _pages(client, symbol="aapl", signal="buy", limit=2) for row in page]
+    assert rows and all(row["symbol"] == "AAPL" and row["signal"] == "BUY" for row in rows)
+    assert len(rows) == 5  # i = 0, 6, 12, 18, 24
+
+    window = client.get("/history", params={
+        "start": (START + timedelta(minutes=2)).isoformat(),
+        "end": (START + timedelta(minutes=4)).isoformat(),
+        "limit": 100
+    }).json()
+    assert sorted(row["id"] for row in window) == [5, 6, 7, 8]
+
+
+def test_history_rejects_bad_cursor(client):
+    """无效的游标和超出范围的 limit 被拒绝"""
+    assert client.get("/history", params={"cursor": "not-a-cursor"}).status_code == 400
+    assert client.get("/history", params={"limit": 0}).status_code == 422
+    assert client.get("/history", params={"limit": 10000}).status_code == 422
+
+
+def test_cors_exposes_pagination_headers(client):
+    """跨域请求时浏览器可以读取 X-Next-Cursor 和 ETag"""
+    response = client.get("/history", params={"limit": 4}, headers={"Origin": "http://localhost:3000"})
+
+    exposed = {name.strip().lower() for name in response.headers["access-control-expose-headers"].split(",")}
+    assert {"x-next-cursor", "etag"} <= exposed
+    assert response.headers["X-Next-Cursor"]
+
+
+def test_default_timestamps_page_forward(tmp_path):
+    """不指定 created_at 写入的记录（/analyze 的写法）同一秒内也能翻完所有页"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'defaults.db'}")
+    Base.metadata.create_all(bind=engine)
+    sessions = sessionmaker(bind=engine)
+
+    with sessions() as db:
+        db.add_all([AlertHistory(symbol="AAPL", signal="BUY", price=1.0) for _ in range(3)])
+        db.execute(insert(AlertHistory), [{"symbol": "MSFT", "signal": "HOLD", "price": 2.0}] * 4)
+        db.commit()
+
+    def override():
+        with sessions() as db:
+            yield db
+
+    app.dependency_overrides[get_db] = override
+    response_cache.clear()
+    try:
+        pages = _pages(TestClient(app), limit=3)
+    finally:
+        app.dependency_overrides.clear()
+        response_cache.clear()
+        engine.dispose()
+
+    assert [row["id"] for page in pages for row in page] == [7, 6, 5, 4, 3, 2, 1]
@@ -0,0 +1,166 @@
+import threading
+from datetime import date
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.api import routes
+from app.core.config import config
+from app.database.connection import Base, get_db
+from app.database.models import Job
+from app.main import app
+from app.schemas.stock import StockRequest
+from app.services import jobs, providers
+from app.services.jobs import JobQueue, JobQueueFull, json_safe, register_job
+from app.services.memory_cache import data_cache
+
+
+@pytest.fixture
+def sessions(tmp_path, monkeypatch):
+    """SQLite 数据库 + 合成数据源"""
+    monkeypatch.setattr(config, "CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setattr(config, "OFFLINE", False)
+    monkeypatch.setattr(config, "MARKET_DATA_PROVIDER", "synthetic")
+    monkeypatch.setattr(providers, "_instances", {})
+    data_cache.clear()
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'jobs.db'}")
+    Base.metadata.create_all(bind=engine)
+    yield sessionmaker(bind=engine)
+    engine.dispose()
+    data_cache.clear()
+
+
+@pytest.fixture
+def client(sessions, monkeypatch):
+    """使用测试数据库和独立任务队列的测试客户端"""
+    job_queue = JobQueue(workers=2, max_pending=10, session_factory=sessions)
+    monkeypatch.setattr(routes, "job_queue", job_queue)
+
+    def override():
+        with sessions() as db:
+            yield db
+
+    app.dependency_overrides[get_db] = override
+    test_client = TestClient(app)
+    test_client.job_queue = job_queue
+    yield test_client
+    app.dependency_overrides.clear()
+    job_queue.shutdown()
+
+
+@pytest.fixture
+def blocking_job(monkeypatch):
+    """一个等待信号才结束的任务类型，记录执行顺序"""
+    started = threading.Event()
+    release = threading.Event()
+    order = []
+
+    monkeypatch.setitem(jobs.JOB_HANDLERS, "test", None)
+
+    @register_job("test", StockRequest)
+    def handler(params):
+        started.set()
+        release.wait(5)
+        order.append(params.symbol)
+        return {"symbol": params.symbol}
+
+    return started, release, order
+
+
+def test_backtest_job_result_persisted(client):
+    """提交回测任务，结果写入数据库并可以查询"""
+    response = client.post("/jobs", json={"kind": "backtest", "params": {"symbol": "aapl"}})
+    assert response.status_code == 202
+    job_id = response.json()["job_id"]
+
+    assert client.job_queue.wait(job_id, timeout=30)
+
+    status = client.get(f"/jobs/{job_id}").json()
+    assert status["status"] == "succeeded"
+    assert status["started_at"] and status["finished_at"]
+
+    result = client.get(f"/jobs/{job_id}/result").json()
+    assert result["result"]["symbol"] == "AAPL"
+    assert result["result"]["stats"]["trades"] == len(result["result"]["trades"])
+
+
+def test_invalid_jobs_rejected(client):
+    """未知的任务类型、不合法的参数和不存在的任务"""
+    assert client.post("/jobs", json={"kind": "nope"}).status_code == 400
+    assert client.post("/jobs", json={"kind": "backtest", "params": {"system": 3}}).status_code == 422
+    assert client.get("/jobs/missing").status_code == 404
+
+
+def test_failed_job_reports_error(client, monkeypatch):
+    """任务抛出异常时状态为 failed，并记录原因"""
+    monkeypatch.setattr(jobs, "fetch_data", lambda *args, **kwargs: None)
+
+    job_id = client.post("/jobs", json={"kind": "analyze", "params": {"symbol": "AAPL"}}).json()["job_id"]
+    client.job_queue.wait(job_id, timeout=10)
+
+    result = client.get(f"/jobs/{job_id}/result").json()
+    assert result["status"] == "failed"
+    assert result["result"] is None
+    assert "AAPL" in result["error"]
+
+
+def test_priority_order_and_load_shedding(sessions, blocking_job):
+    """高优先级的任务先执行，积压超过上限时拒绝新任务"""
+    started, release, order = blocking_job
+    job_queue = JobQueue(workers=1, max_pending=4, session_factory=sessions)
+
+    first = job_queue.submit("test", {"symbol": "FIRST"})  # 占住唯一的工作线程
+    assert started.wait(5)
+    job_queue.submit("test", {"symbol": "LOW"}, priority=1)
+    job_queue.submit("test", {"symbol": "HIGH"}, priority=9)
+    last = job_queue.submit("test", {"symbol": "MID"}, priority=5)
+
+    with pytest.raises(JobQueueFull):
+        job_queue.submit("test", {"symbol": "OVERFLOW"})
+
+    with sessions() as db:
+        assert db.get(Job, first).status in ("queued", "running")
+
+    release.set()
+    assert job_queue.wait(last, timeout=10)
+    job_queue.shutdown()
+
+    assert order == ["FIRST", "HIGH", "MID", "LOW"]
+    assert job_queue.pending == 0
+
+
+def test_startup_recovers_orphaned_jobs(sessions, monkeypatch):
+    """重启后：执行到一半的任务标记为失败，排队中的任务按保存的参数重新执行"""
+    with sessions() as db:
+        db.add_all([
+            Job(id="running", kind="analyze", status="running", priority=5, params='{"symbol": "AAPL"}'),
+            Job(id="queued", kind="backtest", status="queued", priority=5, params='{"symbol": "MSFT"}'),
+            Job(id="unknown", kind="removed", status="queued", priority=5, params="{}"),
+        ])
+        db.commit()
+
+    job_queue = JobQueue(workers=1, max_pending=10, session_factory=sessions)
+    monkeypatch.setattr(jobs, "job_queue", job_queue)
+    with TestClient(app):  # 启动时执行 lifespan
+        assert job_queue.wait("queued", timeout=30)
+    job_queue.shutdown()
+
+    with sessions() as db:
+        running, queued, unknown = (db.get(Job, job_id) for job_id in ("running", "queued", "unknown"))
+        assert running.status == "failed" and "重启" in running.error
+        assert queued.status == "succeeded"
+        assert '"MSFT"' in queued.result
+        assert unknown.status == "failed" and "removed" in unknown.error
+
+    assert job_queue.recover() == (0, 0)
+
+
+def test_json_safe():
+    """numpy 数值、日期和 inf 转换成标准 JSON 值"""
+    value = {"a": np.float64(1.5), "b": np.int64(2), "c": float("inf"), "d": [date(2024, 1, 2)]}
+
+    assert json_safe(value) == {"a": 1.5, "b": 2, "c": None, "d": ["2024-01-02"]}
@@ -0,0 +1,63 @@
+from datetime import datetime
+
+import pytest
+
+from app.core.config import config
+from app.services.memory_cache import LRUCache, market_ttl, MARKET_TZ
+
+
+def test_lru_eviction_by_bytes():
+    """超出字节上限时淘汰最久没用的条目"""
+    cache = LRUCache(max_bytes=300)
+    cache.set("a", 1, size=100)
+    cache.set("b", 2, size=100)
+    cache.set("c", 3, size=100)
+
+    assert cache.get("a") == 1  # a 变成最近使用
+    cache.set("d", 4, size=100)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3 and cache.get("d") == 4
+
+    stats = cache.stats()
+    assert stats["evictions"] == 1
+    assert stats["bytes"] == 300
+    assert stats["hits"] == 4 and stats["misses"] == 1
+
+
+def test_ttl_expiration(monkeypatch):
+    """过期条目按未命中处理"""
+    now = [1000.0]
+    monkeypatch.setattr("app.services.memory_cache.time.monotonic", lambda: now[0])
+
+    cache = LRUCache(max_bytes=1000)
+    cache.set("key", "value", ttl=10)
+    assert cache.get("key") == "value"
+
+    now[0] += 10
+    assert cache.get("key") is None
+    assert cache.stats()["expirations"] == 1
+    assert len(cache) == 0
+
+
+def test_get_or_compute():
+    """未命中时计算，命中时不再计算"""
+    cache = LRUCache(max_bytes=10000)
+    calls = []
+    compute = lambda: calls.append(1) or "result"
+
+    assert cache.get_or_compute("k", compute) == "result"
+    assert cache.get_or_compute("k", compute) == "result"
+    assert len(calls) == 1
+
+
+@pytest.mark.parametrize("moment, expected", [
+    (datetime(2024, 10, 16, 11, 0), None),                   # 周三盘中
+    (datetime(2024, 10, 16, 20, 0), 13.5 * 3600),            # 周三收盘后 → 周四开盘
+    (datetime(2024, 10, 18, 17, 0), (2 * 24 + 16.5) * 3600), # 周五收盘后 → 周一开盘
+    (datetime(2024, 10, 19, 9, 30), (2 * 24) * 3600),        # 周六 → 周一开盘
+])
+def test_market_ttl(moment, expected):
+    """交易时段内短缓存，休市时缓存到下次开盘"""
+    ttl = market_ttl(moment.replace(tzinfo=MARKET_TZ))
+    assert ttl == (config.CACHE_TTL_OPEN if expected is None else expected)
@@ -0,0 +1,60 @@
+from app.services.metrics import Counter, Histogram, render, stage, stage_seconds, timed
+
+
+def test_histogram_buckets_are_cumulative():
+    """分桶计数在输出时累加，+Inf 等于总次数"""
+    histogram = Histogram("test_seconds", "test", "stage", buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 5.0):
+        histogram.observe("fetch", value)
+
+    lines = histogram.render()
+
+    assert 'test_seconds_bucket{stage="fetch",le="0.1"} 1' in lines
+    assert 'test_seconds_bucket{stage="fetch",le="1.0"} 3' in lines
+    assert 'test_seconds_bucket{stage="fetch",le="+Inf"} 4' in lines
+    assert 'test_seconds_count{stage="fetch"} 4' in lines
+    assert histogram.snapshot("fetch") == (4, 6.05)
+
+
+def test_counter_render_escapes_labels():
+    """计数器按标签累加，标签值中的引号被转义"""
+    counter = Counter("test_total", "test", "provider")
+    counter.inc("yfinance")
+    counter.inc("yfinance", 2)
+    counter.inc('bad"name')
+
+    lines = counter.render()
+
+    assert counter.value("yfinance") == 3
+    assert 'test_total{provider="yfinance"} 3' in lines
+    assert 'test_total{provider="bad\\"name"} 1' in lines
+
+
+def test_stage_and_timed_record_durations():
+    """stage() 和 @timed 都记录到阶段直方图"""
+    before, _ = stage_seconds.snapshot("test_stage")
+
+    with stage("test_stage"):
+        pass
+
+    @timed("test_stage")
+    def work():
+        return 42
+
+    assert work() == 42
+    count, total = stage_seconds.snapshot("test_stage")
+    assert count == before + 2
+    assert total >= 0
+
+
+def test_render_includes_cache_stats():
+    """缓存统计输出为带 cache 标签的指标"""
+    stats = {"name": "data", "hits": 3, "misses": 1, "evictions": 0,
+             "entries": 2, "bytes": 100, "hit_rate": 0.75}
+
+    text = render([stats])
+
+    assert '# TYPE turtle_stage_seconds histogram' in text
+    assert 'turtle_cache_hits_total{cache="data"} 3' in text
+    assert 'turtle_cache_hit_ratio{cache="data"} 0.75' in text
+    assert text.endswith("\n")
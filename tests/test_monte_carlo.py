@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.services.monte_carlo import monte_carlo, trade_fractions
+
+
+def test_trade_fractions():
+    """按交易前的账户权益换算收益率"""
+    trades = pd.DataFrame({'pnl': [1000.0, -550.0, 2000.0]})
+    fractions = trade_fractions(trades, 10000)
+    np.testing.assert_allclose(fractions, [0.1, -0.05, 2000 / 10450])
+
+
+def test_permute_keeps_final_return():
+    """只打乱顺序时，所有路径的最终收益相同，回撤不同"""
+    returns = np.array([0.1, -0.2, 0.05, 0.3, -0.1])
+    result = monte_carlo(returns, n_paths=500, years=2, method='permute', seed=0)
+
+    np.testing.assert_allclose(result["final_return"], np.prod(1 + returns) - 1)
+    assert result["max_drawdown"].min() < result["max_drawdown"].max() <= 0
+    assert result["cagr"][0] == pytest.approx(np.prod(1 + returns) ** 0.5 - 1)
+
+
+def test_chunking_does_not_change_results():
+    """分批大小不影响结果（同一个随机种子）"""
+    returns = np.random.default_rng(1).normal(0.01, 0.05, 40)
+
+    for method in ('bootstrap', 'permute'):
+        whole = monte_carlo(returns, n_paths=1000, method=method, seed=7)
+        # 每批 64 条路径（两个 64 × 40 的矩阵），1000 不能整除，最后一批只有 40 条
+        chunked = monte_carlo(returns, n_paths=1000, method=method, seed=7, max_chunk_bytes=2 * 40 * 8 * 64)
+
+        for name in ("max_drawdown", "cagr", "final_return"):
+            np.testing.assert_allclose(chunked[name], whole[name])
+        assert list(whole["summary"].columns) == ["max_drawdown", "cagr", "final_return"]
+
+
+def test_peak_memory_within_budget():
+    """同时分配的矩阵内存不超过 max_chunk_bytes"""
+    tracemalloc = pytest.importorskip("tracemalloc")
+    returns = np.random.default_rng(3).normal(0.01, 0.05, 200)
+    budget = 4 * 1024 * 1024
+
+    for method in ('bootstrap', 'permute'):
+        monte_carlo(returns, n_paths=20000, method=method, seed=1, max_chunk_bytes=budget)  # 预热
+        tracemalloc.start()
+        monte_carlo(returns, n_paths=20000, method=method, seed=1, max_chunk_bytes=budget)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        # 结果数组（每条路径几个 float）和 DataFrame 的开销另算
+        assert peak < budget + 20000 * 8 * 6 + 256 * 1024
@@ -0,0 +1,41 @@
+import numpy as np
+import pandas as pd
+
+from app.services.panel import align_frames, evaluate_panel
+from app.services.strategy import turtle_strategy
+
+
+def _frame(dates, seed):
+    """生成一只股票的随机数据"""
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 2, len(dates)))
+    return pd.DataFrame({
+        'Date': dates,
+        'Open': close,
+        'High': close + rng.uniform(0, 2, len(dates)),
+        'Low': close - rng.uniform(0, 2, len(dates)),
+        'Close': close,
+        'Volume': rng.integers(1000, 5000, len(dates))
+    })
+
+
+def test_panel_matches_per_symbol():
+    """NaN 填充（上市日期不同、缺失交易日）不影响结果"""
+    dates = list(pd.date_range("2024-01-01", periods=60).date)
+    frames = {
+        "AAA": _frame(dates, 1),
+        "BBB": _frame(dates[35:], 2),          # 上市较晚
+        "CCC": _frame(dates[::2], 3),          # 隔天才有数据
+        "DDD": _frame(dates[50:], 4),          # 数据不足
+    }
+
+    symbols, _, arrays = align_frames(frames)
+    result = evaluate_panel(arrays['High'], arrays['Low'], arrays['Close'], 20, 10, symbols)
+
+    for symbol, frame in frames.items():
+        assert result.loc[symbol, 'Signal'] == turtle_strategy(frame, 20, 10)
+        assert result.loc[symbol, 'Bars'] == len(frame)
+        assert result.loc[symbol, 'Close'] == frame['Close'].iloc[-1]
+
+    assert result.loc["AAA", 'EntryChannel'] == frames["AAA"]['High'].iloc[-20:].max()
+    assert np.isnan(result.loc["DDD", 'EntryChannel'])
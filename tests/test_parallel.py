@@ -0,0 +1,39 @@
+import numpy as np
+import pandas as pd
+
+from app.services.backtest import backtest_arrays
+from app.services.parallel import run_parallel, backtest_task
+
+
+def test_parallel_matches_serial():
+    """多进程结果和逐个回测一致，NaN 日期被去掉"""
+    rng = np.random.default_rng(3)
+    close = 100 * np.exp(np.cumsum(rng.normal(0.0005, 0.02, (6, 400)), axis=1))
+    arrays = {'Open': close, 'High': close * 1.01, 'Low': close * 0.99, 'Close': close.copy()}
+    arrays['Close'][2, :100] = np.nan  # 上市较晚
+    dates = pd.bdate_range("2020-01-01", periods=400).to_numpy()
+    symbols = [f"S{i}" for i in range(6)]
+
+    calls = []
+    result = run_parallel(backtest_task, symbols, arrays, dates=dates, max_workers=2,
+                          chunksize=2, progress=lambda done, total: calls.append((done, total)))
+
+    assert result["errors"] == {}
+    assert calls[-1] == (6, 6)
+
+    for row, symbol in enumerate(symbols):
+        valid = np.isfinite(arrays['Close'][row])
+        expected = backtest_arrays(*(arrays[field][row][valid] for field in ('Open', 'High', 'Low', 'Close')),
+                                   dates=dates[valid])["stats"]
+        assert result["results"][symbol] == expected
+
+
+def test_parallel_collects_errors():
+    """单只股票出错不影响其他股票"""
+    close = np.full((2, 50), 100.0)
+    arrays = {'Open': close, 'High': close, 'Low': close, 'Close': close}
+
+    result = run_parallel(backtest_task, ["A", "B"], arrays, max_workers=1, system=3)
+
+    assert result["results"] == {}
+    assert set(result["errors"]) == {"A", "B"}
@@ -0,0 +1,123 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine, func, select
+
+from app.core.config import config
+from app.database import price_bars
+from app.database.connection import Base
+from app.database.models import PriceBar
+from app.database.price_bars import (
+    DatabaseProvider, bar_rows, ingest_bars, read_bars, read_many, update_bars
+)
+from app.services import providers
+from app.services.fetch_data import fetch_data
+from app.services.memory_cache import data_cache
+from app.services.synthetic import SyntheticProvider
+
+
+@pytest.fixture
+def engine(tmp_path):
+    """SQLite 数据库"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'bars.db'}")
+    Base.metadata.create_all(bind=engine)
+    yield engine
+    engine.dispose()
+
+
+def _frame(start, closes):
+    dates = pd.bdate_range(start, periods=len(closes)).date
+    closes = np.asarray(closes, dtype=float)
+    return pd.DataFrame({
+        'Date': dates, 'Open': closes - 0.5, 'High': closes + 1, 'Low': closes - 1,
+        'Close': closes, 'Volume': np.full(len(closes), 1000.0)
+    })
+
+
+def _count(engine):
+    with engine.connect() as conn:
+        return conn.execute(select(func.count()).select_from(PriceBar)).scalar_one()
+
+
+def test_ingest_and_read_arrays(engine):
+    """批量写入后按列读回 numpy 数组，结果按日期排序"""
+    aapl = _frame("2024-01-01", [10, 11, 12, 13])
+    msft = _frame("2024-01-01", [20, 21])
+
+    assert ingest_bars({"aapl": aapl, "MSFT": msft}, engine=engine) == 6
+
+    arrays = read_many(["AAPL", "MSFT", "NONE"], engine=engine)
+    assert set(arrays) == {"AAPL", "MSFT"}
+    assert arrays["AAPL"]["Date"].dtype == np.dtype('datetime64[s]')
+    np.testing.assert_array_equal(arrays["AAPL"]["Close"], [10, 11, 12, 13])
+    np.testing.assert_array_equal(arrays["MSFT"]["High"], [21, 22])
+
+    window = read_bars("AAPL", start="2024-01-02", end="2024-01-04", engine=engine)
+    np.testing.assert_array_equal(window["Close"], [11, 12])
+
+
+def test_ingest_overwrites_existing_bars(engine):
+    """重复写入同一 (symbol, interval, date) 时覆盖旧值"""
+    ingest_bars({"AAPL": _frame("2024-01-01", [10, 11, 12])}, engine=engine)
+    ingest_bars({"AAPL": _frame("2024-01-02", [50, 60])}, engine=engine)
+
+    assert _count(engine) == 3
+    np.testing.assert_array_equal(read_bars("AAPL", engine=engine)["Close"], [10, 50, 60])
+
+
+def test_fallback_without_on_conflict(engine, monkeypatch):
+    """不支持 ON CONFLICT 的数据库先删除再插入"""
+    monkeypatch.setattr(price_bars, "UPSERT_DIALECTS", {})
+
+    ingest_bars({"AAPL": _frame("2024-01-01", [10, 11, 12])}, engine=engine)
+    ingest_bars({"AAPL": _frame("2024-01-02", [50, 60])}, engine=engine)
+
+    assert _count(engine) == 3
+    np.testing.assert_array_equal(read_bars("AAPL", engine=engine)["Close"], [10, 50, 60])
+
+
+def test_intraday_bars_keep_time(engine):
+    """分钟K线保留时间，和日线分开存储"""
+    data = pd.DataFrame({
+        'Date': pd.date_range("2024-01-02 09:30", periods=3, freq="5min"),
+        'Open': [1.0, 2.0, 3.0], 'High': [1.0, 2.0, 3.0], 'Low': [1.0, 2.0, 3.0],
+        'Close': [1.0, 2.0, 3.0], 'Volume': [1.0, 2.0, 3.0]
+    })
+    ingest_bars({"AAPL": data}, interval="5m", engine=engine)
+
+    assert read_bars("AAPL", engine=engine) is None
+    history = DatabaseProvider(engine).history("AAPL", start="2024-01-02", interval="5m")
+    assert list(history['Date']) == list(data['Date'])
+
+
+def test_update_bars_and_database_provider(engine, tmp_path, monkeypatch):
+    """从合成数据源同步K线，再通过 fetch_data 从数据库读取，结果与原数据相同"""
+    monkeypatch.setattr(config, "CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setattr(config, "OFFLINE", False)
+    monkeypatch.setattr(providers, "_instances", {})
+    monkeypatch.setitem(providers.PROVIDERS, "database", lambda: DatabaseProvider(engine))
+    data_cache.clear()
+
+    symbols = ["AAPL", "MSFT", "NVDA"]
+    count = update_bars(symbols, period="1y", provider="synthetic", engine=engine)
+    assert count == _count(engine) > 0
+
+    monkeypatch.setattr(config, "MARKET_DATA_PROVIDER", "database")
+    data = fetch_data("MSFT", "6mo")
+    expected = SyntheticProvider().history("MSFT", period="6mo")
+
+    assert list(data['Date']) == list(expected['Date'])
+    np.testing.assert_allclose(data['Close'], expected['Close'])
+
+    panel = DatabaseProvider(engine).fetch_many(symbols, "5d")
+    assert len(panel) == 5
+    assert set(panel.columns.get_level_values(1)) == set(symbols)
+    data_cache.clear()
+
+
+def test_bar_rows():
+    """DataFrame 转换成写入用的元组"""
+    rows = bar_rows("aapl", _frame("2024-01-01", [10]))
+
+    assert rows == [("AAPL", "1d", pd.Timestamp("2024-01-01").to_pydatetime(), 9.5, 11.0, 9.0, 10.0, 1000.0)]
+    assert bar_rows("AAPL", None) == []
@@ -0,0 +1,77 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.services import providers
+from app.services.disk_cache import save_bars
+from app.services.panel import evaluate_panel
+from app.services.providers import (
+    LocalFileProvider, MarketDataProvider, YFinanceProvider, panel_arrays, panel_to_frames
+)
+from app.services.strategy import turtle_strategy
+
+
+def _frame(dates, seed):
+    """生成一只股票的随机数据"""
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 2, len(dates)))
+    return pd.DataFrame({
+        'Date': dates,
+        'Open': close,
+        'High': close + 1,
+        'Low': close - 1,
+        'Close': close,
+        'Volume': rng.integers(1000, 5000, len(dates))
+    })
+
+
+def test_local_provider_panel(tmp_path):
+    """本地数据源：NPZ 和 CSV 都能读，批量结果按日期对齐"""
+    dates = list(pd.bdate_range(end=pd.Timestamp.today(), periods=60).date)
+    aaa, bbb = _frame(dates, 1), _frame(dates[20:], 2)
+    save_bars("AAA", aaa, covered_from=dates[0], directory=tmp_path)
+    bbb.to_csv(tmp_path / "BBB.csv", index=False)
+
+    provider = LocalFileProvider(tmp_path)
+    panel = provider.fetch_many(["AAA", "BBB", "MISSING"], period="1y")
+
+    symbols, panel_dates, arrays = panel_arrays(panel)
+    assert symbols == ["AAA", "BBB"]
+    assert list(panel_dates) == dates
+    assert np.isnan(arrays['Close'][1, :20]).all()
+
+    result = evaluate_panel(arrays['High'], arrays['Low'], arrays['Close'], 20, 10, symbols)
+    assert result.loc["AAA", 'Signal'] == turtle_strategy(aaa)
+    assert result.loc["BBB", 'Signal'] == turtle_strategy(bbb)
+
+    frames = panel_to_frames(panel)
+    assert len(frames["BBB"]) == 40
+    np.testing.assert_allclose(frames["AAA"]['Close'], aaa['Close'])
+
+
+def test_yfinance_bulk_download(monkeypatch):
+    """yfinance 数据源批量获取只调用一次 yf.download，没有数据的股票被去掉"""
+    index = pd.DatetimeIndex(pd.bdate_range("2024-01-01", periods=5, tz="America/New_York"), name='Date')
+    columns = pd.MultiIndex.from_product([['Close', 'High', 'Low', 'Open', 'Volume'], ['AAA', 'BAD']],
+                                         names=['Price', 'Ticker'])
+    raw = pd.DataFrame(np.arange(50, dtype=float).reshape(5, 10), index=index, columns=columns)
+    raw.loc[:, (slice(None), 'BAD')] = np.nan
+
+    calls = []
+    monkeypatch.setattr(providers.yf, "download", lambda *args, **kwargs: calls.append(args) or raw)
+
+    panel = YFinanceProvider().fetch_many(["aaa", "bad"], period="5d")
+
+    assert len(calls) == 1
+    assert list(panel.columns.get_level_values(0).unique()) == providers.PRICE_FIELDS
+    assert list(panel.columns.get_level_values(1).unique()) == ["AAA"]
+    assert list(panel.index) == list(index.date)
+
+
+def test_provider_must_implement_history():
+    """没有实现 history() 的数据源不能实例化"""
+    class Incomplete(MarketDataProvider):
+        name = "incomplete"
+
+    with pytest.raises(TypeError):
+        Incomplete()
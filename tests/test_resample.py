@@ -0,0 +1,83 @@
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.services.resample import base_interval, resample_bars
+
+
+def _minute_bars(days=2, seed=0):
+    """生成若干个交易日 9:30-16:00 的一分钟K线"""
+    rng = np.random.default_rng(seed)
+    stamps = np.concatenate([
+        pd.date_range(f"{day} 09:30", f"{day} 15:59", freq="1min")
+        for day in pd.bdate_range("2024-03-04", periods=days).date
+    ])
+    close = 100 + np.cumsum(rng.normal(0, 0.1, len(stamps)))
+    return pd.DataFrame({
+        'Date': pd.DatetimeIndex(stamps),
+        'Open': close + rng.normal(0, 0.05, len(stamps)),
+        'High': close + 0.2,
+        'Low': close - 0.2,
+        'Close': close,
+        'Volume': rng.integers(100, 1000, len(stamps))
+    })
+
+
+@pytest.mark.parametrize("interval, rule", [("5m", "5min"), ("15m", "15min"), ("1h", "60min")])
+def test_matches_pandas_resample(interval, rule):
+    """结果与 pandas resample（从开盘时刻对齐）一致"""
+    data = _minute_bars()
+    result = resample_bars(data, interval)
+
+    expected = data.set_index('Date').resample(rule, origin=pd.Timestamp("2024-03-04 09:30")).agg({
+        'Open': 'first', 'High': 'max', 'Low': 'min', 'Close': 'last', 'Volume': 'sum'
+    }).dropna().reset_index()
+
+    pd.testing.assert_frame_equal(result, expected, check_dtype=False)
+
+
+def test_hourly_bars_start_at_session_open():
+    """小时线从 9:30 开始，最后一根是 15:30-16:00 的半小时"""
+    result = resample_bars(_minute_bars(days=1), "1h")
+
+    assert result['Date'].dt.strftime("%H:%M").tolist() == [
+        "09:30", "10:30", "11:30", "12:30", "13:30", "14:30", "15:30"
+    ]
+    assert len(result) == 7
+
+
+def test_daily_from_minutes():
+    """分钟线合成日线，日期列为 date"""
+    data = _minute_bars(days=3)
+    result = resample_bars(data, "1d")
+
+    assert list(result['Date']) == list(pd.bdate_range("2024-03-04", periods=3).date)
+    assert result['Volume'].sum() == data['Volume'].sum()
+    assert result['Close'].iloc[0] == data['Close'].iloc[389]
+
+
+def test_weekly_from_daily():
+    """日线合成周线，按周一分组"""
+    dates = pd.bdate_range("2024-03-06", periods=10).date
+    data = pd.DataFrame({
+        'Date': dates, 'Open': np.arange(10.0), 'High': np.arange(10.0) + 1,
+        'Low': np.arange(10.0) - 1, 'Close': np.arange(10.0), 'Volume': np.ones(10)
+    })
+    result = resample_bars(data, "1wk")
+
+    assert list(result['Date']) == [date(2024, 3, 6), date(2024, 3, 11), date(2024, 3, 18)]
+    assert list(result['Volume']) == [3, 5, 2]
+
+
+def test_base_interval():
+    """选择能整除目标周期、回看范围足够的最细分钟线"""
+    today = date(2024, 6, 3)
+    assert base_interval("15m", "5d", today) == "1m"
+    assert base_interval("15m", "1mo", today) == "5m"
+    assert base_interval("1h", "1y", today) == "60m"
+    assert base_interval("90m", "5d", today) == "1m"
+
+    with pytest.raises(ValueError):
+        base_interval("5m", "1y", today)
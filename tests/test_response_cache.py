@@ -0,0 +1,105 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database.connection import Base, get_db
+from app.database.models import Stock
+from app.main import app
+from app.services.response_cache import ResponseCache, _matches, response_cache
+
+
+@pytest.fixture
+def client(tmp_path):
+    """使用 SQLite 数据库的测试客户端，预先写入一只股票"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'stocks.db'}")
+    Base.metadata.create_all(bind=engine)
+    sessions = sessionmaker(bind=engine)
+
+    with sessions() as db:
+        db.add(Stock(symbol="AAPL", name="AAPL", current_price=100.0, is_active=True))
+        db.commit()
+
+    def override():
+        with sessions() as db:
+            yield db
+
+    app.dependency_overrides[get_db] = override
+    response_cache.clear()
+    test_client = TestClient(app)
+    test_client.sessions = sessions
+    yield test_client
+    app.dependency_overrides.clear()
+    response_cache.clear()
+    engine.dispose()
+
+
+def _set_price(client, symbol, price):
+    with client.sessions() as db:
+        db.query(Stock).filter(Stock.symbol == symbol).update({"current_price": price})
+        db.commit()
+
+
+def test_versions_and_etags():
+    """bump 只改变相关股票和全局的版本号"""
+    cache = ResponseCache(max_bytes=1024)
+    aapl, msft, everything = cache.etag("AAPL"), cache.etag("MSFT"), cache.etag()
+
+    cache.bump("aapl")
+
+    assert cache.etag("AAPL") != aapl
+    assert cache.etag("MSFT") == msft
+    assert cache.etag() != everything
+
+    old = cache.etag("AAPL")
+    cache.clear()
+    assert cache.etag("AAPL") != old
+
+
+def test_if_none_match_parsing():
+    """支持多个值、弱 ETag 和 *"""
+    assert _matches('"a-1"', '"a-1"')
+    assert _matches('"x", W/"a-1"', '"a-1"')
+    assert _matches('*', '"a-1"')
+    assert not _matches('"a-2"', '"a-1"')
+    assert not _matches(None, '"a-1"')
+
+
+def test_conditional_get_returns_304(client):
+    """If-None-Match 匹配时返回 304，写入后返回新内容和新的 ETag"""
+    first = client.get("/stocks/aapl")
+    etag = first.headers["ETag"]
+    assert first.status_code == 200
+    assert first.json()["stock"]["current_price"] == 100.0
+
+    assert client.get("/stocks/AAPL", headers={"If-None-Match": etag}).status_code == 304
+
+    _set_price(client, "AAPL", 120.0)
+    response_cache.bump("AAPL")
+
+    second = client.get("/stocks/AAPL", headers={"If-None-Match": etag})
+    assert second.status_code == 200
+    assert second.headers["ETag"] != etag
+    assert second.json()["stock"]["current_price"] == 120.0
+
+
+def test_cached_body_served_until_bump(client):
+    """版本没变时直接返回缓存的内容，不查数据库"""
+    assert client.get("/stocks").json()["stocks"][0]["current_price"] == 100.0
+
+    _set_price(client, "AAPL", 130.0)
+    assert client.get("/stocks").json()["stocks"][0]["current_price"] == 100.0
+
+    response_cache.bump("MSFT")  # 任何股票变化都会让列表失效
+    assert client.get("/stocks").json()["stocks"][0]["current_price"] == 130.0
+
+
+def test_delete_invalidates_detail(client):
+    """删除股票后详情的 ETag 改变"""
+    etag = client.get("/stocks/AAPL").headers["ETag"]
+
+    assert client.delete("/stocks/AAPL").status_code == 200
+
+    response = client.get("/stocks/AAPL", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["stock"]["is_active"] is False
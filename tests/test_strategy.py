@@ -1,6 +1,6 @@
 import pytest
 import pandas as pd
-from strategy import turtle_strategy
+from app.services.strategy import turtle_strategy
 
 
 def test_signal():
@@ -13,4 +13,33 @@ def test_signal():
 
     signal = turtle_strategy(data)
     assert signal in ["BUY", "SELL", "HOLD"]
-    print(f"测试通过！信号: {signal}")
\ No newline at end of file
+    print(f"测试通过！信号: {signal}")
+
+def _random_data(n=80, seed=0):
+    """生成随机价格数据"""
+    import numpy as np
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 2, n))
+    return pd.DataFrame({
+        'Close': close,
+        'High': close + rng.uniform(0, 2, n),
+        'Low': close - rng.uniform(0, 2, n)
+    })
+
+
+@pytest.mark.parametrize("entry_period, exit_period", [(20, 10), (5, 15)])
+def test_turtle_signals_match_scalar(entry_period, exit_period):
+    """向量化信号和逐根调用 turtle_strategy 的结果一致"""
+    from app.services.strategy import turtle_signals
+
+    data = _random_data()
+    result = turtle_signals(data, entry_period, exit_period)
+
+    for i in range(len(data)):
+        expected = turtle_strategy(data.iloc[:i + 1], entry_period, exit_period)
+        assert result['Signal'].iloc[i] == expected
+
+    last = data.iloc[-entry_period:]
+    assert result['EntryChannel'].iloc[-1] == last['High'].max()
+    assert result['ExitChannel'].iloc[-1] == data['Low'].iloc[-exit_period:].min()
+    assert result['EntryChannel'].iloc[:entry_period - 1].isna().all()
@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.services.backtest import breakout_levels
+from app.services.strategy import rolling_max, rolling_min
+from app.services.sweep import RangeQueryTable, breakout_positions, sweep_parameters
+
+
+def _random_data(n=300, seed=2):
+    """生成随机价格数据"""
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0.0005, 0.02, n)))
+    return pd.DataFrame({
+        'Close': close,
+        'High': close * (1 + rng.uniform(0, 0.02, n)),
+        'Low': close * (1 - rng.uniform(0, 0.02, n))
+    })
+
+
+@pytest.mark.parametrize("window", [1, 2, 7, 20, 64, 299, 500])
+def test_range_query_matches_rolling(window):
+    """稀疏表查询和直接滚动计算结果相同"""
+    data = _random_data()
+    table = RangeQueryTable.from_data(data)
+
+    np.testing.assert_array_equal(table.rolling_max(window), rolling_max(data['High'], window))
+    np.testing.assert_array_equal(table.rolling_min(window), rolling_min(data['Low'], window))
+
+
+def test_breakout_levels_match_backtest():
+    """挂单价格和回测引擎一致"""
+    data = _random_data()
+    table = RangeQueryTable.from_data(data)
+
+    for expected, actual in zip(breakout_levels(data['High'], data['Low'], 55, 20),
+                                table.breakout_levels(55, 20)):
+        np.testing.assert_array_equal(actual, expected)
+
+
+def test_breakout_needs_close_above_prior_channel():
+    """收盘价等于前 N 日最高价不入场，高于才入场；低于前 M 日最低价离场"""
+    close = np.array([10.0, 11.0, 11.0, 12.0, 11.5, 9.0])
+    entry = np.array([np.inf, 10.0, 11.0, 11.0, 12.0, 12.0])
+    exit_ = np.array([-np.inf, 10.0, 10.0, 11.0, 11.0, 11.0])
+
+    np.testing.assert_array_equal(breakout_positions(close, entry, exit_), [0, 1, 1, 1, 1, 0])
+    np.testing.assert_array_equal(breakout_positions(close, np.full(6, 12.0), exit_), [0, 0, 0, 0, 0, 0])
+
+
+def test_sweep_grid():
+    """每个组合一行结果"""
+    data = _random_data()
+    result = sweep_parameters(data, [10, 20, 55], [5, 10])
+
+    assert len(result) == 6
+    assert list(result.index.names) == ['entry_period', 'exit_period']
+    assert (result['exposure'] >= 0).all() and (result['exposure'] <= 1).all()
+    assert (result['max_drawdown'] <= 0).all()
+    assert result['trades'].sum() > 0
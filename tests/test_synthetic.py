@@ -0,0 +1,81 @@
+import numpy as np
+import pytest
+
+from app.core.config import config
+from app.services import providers
+from app.services.fetch_data import fetch_data
+from app.services.memory_cache import data_cache
+from app.services.panel import evaluate_panel
+from app.services.synthetic import ReplayFeed, SyntheticProvider, generate_bars, synthetic_panel
+
+
+def test_generate_bars_is_valid_ohlc():
+    """生成的K线满足 Low <= Open/Close <= High，结果可复现"""
+    bars = generate_bars(50, 300, seed=7)
+
+    assert bars['Close'].shape == (50, 300)
+    assert (bars['High'] >= np.maximum(bars['Open'], bars['Close'])).all()
+    assert (bars['Low'] <= np.minimum(bars['Open'], bars['Close'])).all()
+    assert (bars['Low'] > 0).all() and (bars['Volume'] > 0).all()
+
+    np.testing.assert_array_equal(bars['Close'], generate_bars(50, 300, seed=7)['Close'])
+
+
+def test_gaps_and_volatility_are_configurable():
+    """跳空概率和波动率参数生效"""
+    calm = generate_bars(20, 500, volatility=0.1, gap_probability=0.0, seed=1)
+    wild = generate_bars(20, 500, volatility=0.6, gap_probability=0.2, gap_size=0.1, seed=1)
+
+    def overnight(bars):
+        return np.abs(np.log(bars['Open'][:, 1:] / bars['Close'][:, :-1]))
+
+    assert overnight(wild).mean() > 3 * overnight(calm).mean()
+    assert np.diff(np.log(wild['Close'])).std() > np.diff(np.log(calm['Close'])).std()
+
+
+def test_synthetic_panel_feeds_evaluate_panel():
+    """合成股票池可以直接批量计算信号"""
+    symbols, dates, arrays = synthetic_panel(200, 120, seed=3)
+    result = evaluate_panel(arrays['High'], arrays['Low'], arrays['Close'], symbols=symbols)
+
+    assert len(dates) == 120
+    assert list(result.index) == symbols
+    assert set(result['Signal']) <= {"BUY", "SELL", "HOLD"}
+
+
+@pytest.fixture
+def offline_provider(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(config, "OFFLINE", False)
+    monkeypatch.setattr(providers, "_instances", {})
+    data_cache.clear()
+    yield monkeypatch
+    data_cache.clear()
+
+
+def test_fetch_data_through_synthetic_provider(offline_provider):
+    """MARKET_DATA_PROVIDER=synthetic 时 fetch_data 不联网也能返回数据，同一代码数据固定"""
+    offline_provider.setattr(config, "MARKET_DATA_PROVIDER", "synthetic")
+
+    data = fetch_data("AAPL", "3mo")
+    assert data is not None and len(data) > 50
+    assert list(data.columns) == ['Date', 'Open', 'High', 'Low', 'Close', 'Volume']
+
+    again = SyntheticProvider().history("aapl", period="3mo")
+    np.testing.assert_array_equal(again['Close'], data['Close'])
+
+
+def test_replay_feed_releases_bars_over_time():
+    """回放数据源按速率放出新K线"""
+    now = [0.0]
+    feed = ReplayFeed(rate=2, warmup=100, n_bars=200, clock=lambda: now[0])
+
+    assert len(feed.history("XYZ", start="1900-01-01")) == 100
+
+    now[0] = 5.0
+    newer = feed.history("XYZ", start="1900-01-01")
+    assert len(newer) == 110
+    assert newer['Date'].is_monotonic_increasing
+
+    feed.advance(200)
+    assert len(feed.history("XYZ", start="1900-01-01")) == 200
@@ -0,0 +1,56 @@
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.services.sweep import RangeQueryTable, breakout_positions, strategy_returns
+from app.services.walk_forward import walk_forward
+
+
+def _random_data(n=800, seed=4):
+    """生成随机价格数据"""
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0.0003, 0.02, n)))
+    return pd.DataFrame({
+        'Date': pd.bdate_range("2015-01-01", periods=n),
+        'Close': close,
+        'High': close * (1 + rng.uniform(0, 0.02, n)),
+        'Low': close * (1 - rng.uniform(0, 0.02, n))
+    })
+
+
+@pytest.mark.parametrize("metric", ["sharpe", "return"])
+def test_walk_forward_picks_best_in_sample(metric):
+    """每折选中的参数就是样本内得分最高的组合"""
+    data = _random_data()
+    entries, exits = [10, 20, 40], [5, 10, 20]
+    result = walk_forward(data, entries, exits, train_size=250, test_size=100, metric=metric)
+    folds = result["folds"]
+
+    assert len(folds) == 5
+    assert len(result["equity"]) == 500
+
+    table = RangeQueryTable.from_data(data)
+    close = data['Close'].to_numpy()
+    for _, fold in folds.iterrows():
+        start = fold['fold'] * 100
+        scores = {}
+        for n in entries:
+            for m in exits:
+                returns = strategy_returns(close, breakout_positions(close, table.entry_levels(n), table.exit_levels(m)))
+                window = returns[start + 1:start + 250]
+                if metric == "return":
+                    scores[(n, m)] = np.prod(1 + window) - 1
+                else:
+                    scores[(n, m)] = window.mean() / window.std() * math.sqrt(252) if window.std() > 0 else -np.inf
+
+        best = max(scores, key=scores.get)
+        assert (fold['entry_period'], fold['exit_period']) == best
+        assert fold['in_sample_score'] == pytest.approx(scores[best])
+
+
+def test_walk_forward_requires_enough_data():
+    """数据不够一折时报错"""
+    with pytest.raises(ValueError):
+        walk_forward(_random_data(100), [10], [5], train_size=250, test_size=100)
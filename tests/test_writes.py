@@ -0,0 +1,96 @@
+import asyncio
+
+import pytest
+from sqlalchemy import event, select
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.database import writes
+from app.database.connection import Base
+from app.database.models import AlertHistory, Stock
+from app.database.writes import save_analyses, stock_rows, upsert_stocks_statement
+
+
+def _alert(symbol, price):
+    return {"symbol": symbol, "signal": "HOLD", "price": price, "message": f"{symbol} 当前信号: HOLD"}
+
+
+@pytest.fixture
+def database(tmp_path):
+    """SQLite 异步引擎，记录执行的 SQL 条数"""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'writes.db'}")
+    statements = []
+    event.listen(engine.sync_engine, "before_cursor_execute",
+                 lambda *args: statements.append(args[2]))
+
+    async def create_tables():
+        async with engine.begin() as connection:
+            await connection.run_sync(Base.metadata.create_all)
+
+    asyncio.run(create_tables())
+    yield async_sessionmaker(engine, expire_on_commit=False), statements
+    asyncio.run(engine.dispose())
+
+
+def _save_twice(sessions, statements):
+    """先写入 AAPL，再同时写入 AAPL（更新）和 MSFT（新建）"""
+    async def run():
+        async with sessions() as db:
+            first = await save_analyses(db, {"AAPL": 100.0}, [_alert("AAPL", 100.0)])
+            await db.commit()
+
+        async with sessions() as db:
+            await db.execute(select(Stock.id))  # 连接和 PRAGMA 不计入
+            statements.clear()
+            second = await save_analyses(
+                db, {"AAPL": 110.0, "MSFT": 200.0},
+                [_alert("AAPL", 110.0), _alert("MSFT", 200.0), _alert("AAPL", 111.0)]
+            )
+            executed = len(statements)
+            await db.commit()
+
+        async with sessions() as db:
+            stocks = {stock.symbol: stock for stock in (await db.execute(select(Stock))).scalars()}
+            alerts = {alert.id: alert for alert in (await db.execute(select(AlertHistory))).scalars()}
+        return first, second, executed, stocks, alerts
+
+    return asyncio.run(run())
+
+
+def test_upsert_and_returning_ids(database):
+    """已存在的股票更新价格，新股票被创建，提醒 ID 按参数顺序返回"""
+    sessions, statements = database
+
+    first, second, executed, stocks, alerts = _save_twice(sessions, statements)
+
+    assert executed == 2  # 一条 upsert + 一次批量 INSERT RETURNING
+    assert first == [1]
+    assert second == [2, 3, 4]
+    assert [alerts[i].symbol for i in second] == ["AAPL", "MSFT", "AAPL"]
+    assert alerts[4].price == 111.0
+    assert stocks["AAPL"].current_price == 110.0
+    assert stocks["MSFT"].is_active is True
+    assert len(stocks) == 2
+
+
+def test_fallback_without_on_conflict(database, monkeypatch):
+    """不支持 ON CONFLICT 的数据库退回到 SELECT + 批量 UPDATE / INSERT，结果相同"""
+    sessions, statements = database
+    monkeypatch.setattr(writes, "UPSERT_DIALECTS", {})
+
+    first, second, executed, stocks, alerts = _save_twice(sessions, statements)
+
+    assert second == [2, 3, 4]
+    assert stocks["AAPL"].current_price == 110.0
+    assert stocks["MSFT"].current_price == 200.0
+
+
+def test_postgresql_statement():
+    """PostgreSQL 下生成 ON CONFLICT (symbol) DO UPDATE"""
+    statement = upsert_stocks_statement("postgresql", stock_rows({"AAPL": 1.0, "MSFT": 2.0}))
+
+    sql = str(statement.compile(dialect=postgresql.dialect()))
+
+    assert "ON CONFLICT (symbol) DO UPDATE" in sql
+    assert "current_price = excluded.current_price" in sql
+    assert upsert_stocks_statement("mysql", []) is None